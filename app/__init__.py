@@ -1,5 +1,7 @@
 """Flaskアプリ全体の初期化処理とCLIコマンドを提供するモジュール。"""
 
+import time
+from pathlib import Path
 from typing import Optional, Union
 
 from flask import Flask
@@ -7,7 +9,20 @@ import click
 
 from dotenv import load_dotenv
 
+from .assets import init_assets
+from .audit import init_audit
+from .cache import init_cache
+from .compression import init_compression
 from .extensions import db, login_manager, migrate
+from .metrics import init_metrics
+from .partitioning import init_partitioning, organization_option
+from .reference_data import init_reference_data
+from .scheduler import init_scheduler
+from .slow_queries import init_slow_query_log
+from .sort_keys import init_sort_keys
+from .strict_loading import init_strict_loading
+from .tenant_duplicates import init_tenant_duplicates
+from .units import init_units
 
 
 def create_app(config_object: Optional[Union[str, type]] = None) -> Flask:
@@ -18,11 +33,25 @@ def create_app(config_object: Optional[Union[str, type]] = None) -> Flask:
     config_path = config_object or "config.Config"
     app.config.from_object(config_path)
 
+    # 計測フックはセッション破棄の後に接続プールを読むため、最初に登録する。
+    init_metrics(app)
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     login_manager.login_view = "auth.login"
     login_manager.login_message_category = "info"
+    partitions = init_partitioning(app, db)
+    init_compression(app)
+    init_assets(app)
+    init_audit(app)
+    init_cache(app)
+    init_reference_data(app)
+    init_units(app)
+    init_sort_keys(app)
+    init_tenant_duplicates(app)
+    init_strict_loading(app)
+    init_slow_query_log(app)
+    scheduler = init_scheduler(app)
 
     from .models import User  # noqa: WPS433
 
@@ -32,11 +61,25 @@ def create_app(config_object: Optional[Union[str, type]] = None) -> Flask:
             return None
         return db.session.get(User, int(user_id))
 
+    from .blueprints.admin.routes import admin_bp
+    from .blueprints.api.routes import api_bp
     from .blueprints.auth.routes import auth_bp
     from .blueprints.core.routes import core_bp
+    from .blueprints.reports.routes import reports_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(core_bp)
+    app.register_blueprint(reports_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(api_bp)
+
+    from .lease_status import advance_all_organizations
+
+    scheduler.add_job("advance-lease-status", app.config["LEASE_STATUS_INTERVAL"], advance_all_organizations)
+
+    from .lease_expiry import refresh_all_organizations
+
+    scheduler.add_job("lease-expiry-snapshot", app.config["LEASE_EXPIRY_SNAPSHOT_INTERVAL"], refresh_all_organizations)
 
     from .seed import seed_data
 
@@ -47,4 +90,347 @@ def create_app(config_object: Optional[Union[str, type]] = None) -> Flask:
         seed_data(with_reset=with_reset)
         click.echo("Seed data generation completed.")
 
+    @app.cli.command("rent-roll")
+    @click.option("--month", required=True, help="対象月 (YYYY-MM)")
+    @click.option("--output", type=click.Path(dir_okay=False), help="出力する zip のパス")
+    @click.option("--workers", type=int, default=None, help="ワーカープロセス数（既定: CPU コア数）")
+    @organization_option
+    def rent_roll_command(month: str, output: Optional[str], workers: Optional[int]) -> None:
+        """全物件のレントロール CSV を並列生成し zip にまとめます。"""
+        from .dates import parse_month
+        from .rent_roll import generate_rent_rolls
+
+        try:
+            month_start = parse_month(month)
+        except ValueError as exc:
+            raise click.BadParameter(str(exc), param_hint="--month") from None
+        output_path = output or f"rent_roll_{month_start:%Y-%m}.zip"
+
+        def progress(done: int, total: int, name: str) -> None:
+            click.echo(f"[{done}/{total}] {name}")
+
+        started = time.perf_counter()
+        results = generate_rent_rolls(partitions.current_engine(), month_start, output_path, workers=workers, progress=progress)
+        elapsed = time.perf_counter() - started
+        click.echo(f"{len(results)} 物件のレントロールを {output_path} に出力しました（{elapsed:.2f} 秒）。")
+
+    @app.cli.command("expiring-leases")
+    @click.option("--days", type=int, default=None, help="今日から何日以内に満了する契約を対象にするか")
+    @click.option("--snapshot", is_flag=True, help="当日分のダッシュボード用スナップショットを再計算します")
+    @organization_option
+    def expiring_leases_command(days: Optional[int], snapshot: bool) -> None:
+        """満了が近い契約を終了日順に一覧表示します。"""
+        from .lease_expiry import expiring_leases, refresh_expiry_snapshot
+
+        days = days or app.config["EXPIRING_LEASE_DAYS"]
+        leases = expiring_leases(days)
+        for lease in leases:
+            click.echo(
+                "\t".join(
+                    [
+                        str(lease.end_date),
+                        lease.property.name,
+                        lease.unit_number or "-",
+                        lease.tenant.name,
+                        lease.status,
+                    ],
+                ),
+            )
+        click.echo(f"{days}日以内に満了する契約: {len(leases)} 件")
+        if snapshot:
+            refreshed = refresh_expiry_snapshot(days)
+            click.echo(f"スナップショットを更新しました（{refreshed.snapshot_date}: {refreshed.expiring_count} 件）。")
+
+    @app.cli.command("advance-lease-status")
+    @click.option("--date", "today", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="基準日（既定: 今日）")
+    @click.option("--chunk-size", type=click.IntRange(min=1), default=None, help="1 回の UPDATE で更新する最大件数")
+    @organization_option
+    def advance_lease_status_command(today, chunk_size: Optional[int]) -> None:
+        """開始日・終了日を過ぎた契約の状態を一括で更新します。"""
+        from .lease_status import advance_lease_statuses
+
+        started = time.perf_counter()
+        counts = advance_lease_statuses(
+            today.date() if today else None,
+            chunk_size=chunk_size or app.config["LEASE_STATUS_CHUNK_SIZE"],
+        )
+        elapsed = time.perf_counter() - started
+        for transition, count in counts.items():
+            click.echo(f"{transition}: {count} 件")
+        click.echo(f"合計 {sum(counts.values())} 件の契約の状態を更新しました（{elapsed:.2f} 秒）。")
+
+    @app.cli.command("archive-leases")
+    @click.option("--older-than", "days", type=click.IntRange(min=0), required=True, help="終了日から何日経った解約済み契約を移すか")
+    @click.option("--chunk-size", type=click.IntRange(min=1), default=None, help="1 トランザクションで移す最大件数")
+    @organization_option
+    def archive_leases_command(days: int, chunk_size: Optional[int]) -> None:
+        """終了日から一定期間が経った解約済み契約を lease_archive へ移します。"""
+        from datetime import date, timedelta
+
+        from .lease_archive import archive_leases
+
+        cutoff = date.today() - timedelta(days=days)
+        started = time.perf_counter()
+        moved = archive_leases(cutoff, chunk_size=chunk_size or app.config["LEASE_ARCHIVE_CHUNK_SIZE"])
+        elapsed = time.perf_counter() - started
+        click.echo(f"終了日が {cutoff} より前の解約済み契約 {moved} 件をアーカイブしました（{elapsed:.2f} 秒）。")
+
+    @app.cli.command("rebuild-sort-keys")
+    @organization_option
+    def rebuild_sort_keys_command() -> None:
+        """物件名・入居者名の並べ替え用キーを作り直します（正規化の規則や読みの辞書を変えたあとに実行）。"""
+        from .sort_keys import rebuild_sort_keys
+
+        changed = rebuild_sort_keys()
+        click.echo(f"並べ替え用キーを {changed} 件更新しました。")
+
+    @app.cli.command("prune-units")
+    @organization_option
+    def prune_units_command() -> None:
+        """入居者・契約・アーカイブのどこからも参照されない号室を削除します（入居者の削除で空いた空室も消えます）。"""
+        from .units import prune_orphan_units
+
+        removed = prune_orphan_units(db.session)
+        db.session.commit()
+        click.echo(f"参照されていない号室を {removed} 件削除しました。")
+
+    @app.cli.command("find-duplicate-tenants")
+    @click.option("--max-block-size", type=click.IntRange(min=2), default=None, help="1 つのキーに集まってよい入居者数の上限（超えたキーは無視）")
+    @organization_option
+    def find_duplicate_tenants_command(max_block_size: Optional[int]) -> None:
+        """メールアドレス・電話番号・氏名のキーが一致する入居者を一覧します（統合は /tenants/duplicates で行います）。"""
+        from .tenant_duplicates import DEFAULT_MAX_BLOCK_SIZE, REASON_LABELS, find_duplicate_groups
+
+        started = time.perf_counter()
+        groups = find_duplicate_groups(max_block_size or DEFAULT_MAX_BLOCK_SIZE)
+        elapsed = time.perf_counter() - started
+        for group in groups:
+            reasons = "・".join(REASON_LABELS[reason] for reason in group.reasons)
+            click.echo(f"{', '.join(str(tenant_id) for tenant_id in group.tenant_ids)}\t{reasons}")
+        tenants = sum(len(group.tenant_ids) for group in groups)
+        click.echo(f"重複候補 {len(groups)} グループ（入居者 {tenants} 件）を見つけました（{elapsed:.2f} 秒）。")
+
+    @app.cli.command("check-overlaps")
+    @click.option("--batch-size", type=click.IntRange(min=1), default=None, help="1 回に読み込む契約の件数")
+    @organization_option
+    def check_overlaps_command(batch_size: Optional[int]) -> None:
+        """同じ部屋で期間の重なる契約を全件から探します（見つかれば終了コード 1）。"""
+        from .lease_overlaps import DEFAULT_BATCH_SIZE, find_overlaps
+
+        started = time.perf_counter()
+        found = 0
+        for overlap in find_overlaps(batch_size or DEFAULT_BATCH_SIZE):
+            found += 1
+            click.echo(
+                "\t".join(
+                    [
+                        str(overlap.property_id),
+                        overlap.unit_number,
+                        f"#{overlap.earlier_id}",
+                        f"#{overlap.later_id}",
+                        f"{overlap.overlap_start}〜{overlap.overlap_end or '期限なし'}",
+                    ],
+                ),
+            )
+        elapsed = time.perf_counter() - started
+        click.echo(f"期間の重なる契約: {found} 件（{elapsed:.2f} 秒）")
+        if found:
+            raise SystemExit(1)
+
+    @app.cli.command("backup")
+    @click.option("--all", "all_organizations", is_flag=True, help="共通 DB と全組織のパーティションを対象にします")
+    @click.option("--compress/--no-compress", default=None, help="gzip で圧縮します（既定: BACKUP_COMPRESS）")
+    @click.option("--keep", type=click.IntRange(min=0), default=None, help="残す世代数（既定: BACKUP_KEEP、0 で削除しない）")
+    @organization_option
+    def backup_command(all_organizations: bool, compress: Optional[bool], keep: Optional[int]) -> None:
+        """アプリを止めずに SQLite のオンラインバックアップを取ります。"""
+        from .backup import BackupError, database_targets, run_backups
+
+        try:
+            results = run_backups(app, database_targets(all_organizations), compress=compress, keep=keep)
+        except BackupError as exc:
+            raise click.ClickException(str(exc)) from None
+        for result in results:
+            click.echo(
+                f"{result.name}: {result.path} "
+                f"({result.bytes_copied / 1024 / 1024:.1f} MiB, {result.throughput / 1024 / 1024:.1f} MiB/s, "
+                f"{result.steps} ステップ, ロック合計 {result.lock_seconds * 1000:.0f} ms / "
+                f"最長 {result.max_lock_seconds * 1000:.1f} ms, {result.elapsed:.2f} 秒)",
+            )
+
+    @app.cli.command("restore")
+    @click.argument("backup_file", type=click.Path(exists=True, dir_okay=False))
+    @click.confirmation_option(prompt="現在のデータをバックアップの内容で上書きします。続けますか？")
+    @organization_option
+    def restore_command(backup_file: str) -> None:
+        """整合性を検査したうえで、バックアップを選択中の DB に書き戻します。"""
+        from .backup import BackupError, restore_database, sqlite_path
+        from .cache import dependency
+        from .reference_data import VERSIONED_TABLES
+
+        try:
+            target = sqlite_path(partitions.current_engine())
+            restore_database(Path(backup_file), target, pages=app.config["BACKUP_PAGES_PER_STEP"])
+        except BackupError as exc:
+            raise click.ClickException(str(exc)) from None
+        app.extensions["cache"].invalidate(dependency(table) for table in VERSIONED_TABLES)
+        click.echo(f"{backup_file} を {target} に復元しました（整合性検査 OK）。")
+
+    @app.cli.group("slow-queries")
+    def slow_queries_group() -> None:
+        """スロークエリログを集計します。"""
+
+    @slow_queries_group.command("report")
+    @click.option("--limit", type=click.IntRange(min=1), default=20, show_default=True, help="表示する SQL の件数")
+    @click.option("--plans/--no-plans", default=True, help="最も遅かった実行の実行計画を併せて表示します")
+    def slow_queries_report_command(limit: int, plans: bool) -> None:
+        """スロークエリを SQL の形ごとにまとめ、合計時間の長い順に表示します。"""
+        from .slow_queries import SlowQueryLog, read_entries, summarize
+
+        log = app.extensions.get("slow_queries") or SlowQueryLog(app)
+        groups = summarize(read_entries(log.path))
+        if not groups:
+            click.echo(f"{log.path} にスロークエリの記録はありません。")
+            return
+        for rank, group in enumerate(groups[:limit], start=1):
+            click.echo(
+                f"#{rank} 合計 {group.total_ms:.1f} ms / {group.count} 回 "
+                f"(平均 {group.average_ms:.1f} ms, 最大 {group.max_ms:.1f} ms) "
+                f"{', '.join(sorted(group.endpoints)) or '-'}",
+            )
+            click.echo(f"    {group.sql}")
+            if plans and group.plan:
+                for line in group.plan:
+                    click.echo(f"      {line}")
+        click.echo(f"SQL {len(groups)} 種類中 上位 {min(limit, len(groups))} 件を表示しました。")
+
+    @app.cli.command("profile-route")
+    @click.argument("path")
+    @click.option("--method", type=click.Choice(["GET", "POST"], case_sensitive=False), default="GET", show_default=True)
+    @click.option("--n", "repeat", type=click.IntRange(min=1), default=10, show_default=True, help="計測する呼び出し回数")
+    @click.option("--as-user", "user_email", default=None, help="このメールアドレスのユーザーとしてログインした状態で呼び出します")
+    @click.option("--data", "fields", multiple=True, metavar="KEY=VALUE", help="POST するフォームの値（複数指定可）")
+    @click.option("--top", type=click.IntRange(min=1), default=20, show_default=True, help="レポートに載せる件数")
+    @click.option("--output-dir", type=click.Path(file_okay=False, path_type=Path), default=None, help="出力先（既定: PROFILE_DIR）")
+    def profile_route_command(
+        path: str,
+        method: str,
+        repeat: int,
+        user_email: Optional[str],
+        fields: tuple[str, ...],
+        top: int,
+        output_dir: Optional[Path],
+    ) -> None:
+        """PATH をテストクライアントで呼び出し、cProfile とメモリ確保のレポートを書き出します。"""
+        from .profiling import profile_route, top_functions
+
+        data = {}
+        for field in fields:
+            key, separator, value = field.partition("=")
+            if not separator:
+                raise click.BadParameter(f"{field} は KEY=VALUE の形で指定してください。", param_hint="--data")
+            data[key] = value
+        try:
+            report = profile_route(app, path, method.upper(), repeat, user_email, data or None, output_dir, top)
+        except LookupError as exc:
+            raise click.BadParameter(str(exc), param_hint="--as-user") from None
+        codes = ", ".join(f"{code} x {count}" for code, count in sorted(report.status_codes.items()))
+        click.echo(
+            f"{method.upper()} {path} を {report.requests} 回: {report.elapsed / report.requests * 1000:.1f} ms/回"
+            f"（cProfile 込み）、最大メモリ {report.peak_bytes / 1024:.0f} KiB、ステータス {codes}",
+        )
+        for label, calls, own, cumulative in top_functions(report.stats, min(top, 10)):
+            click.echo(f"  {cumulative:8.3f}s {own:8.3f}s {calls:8d}  {label}")
+        for output in (report.pstats_path, report.collapsed_path, report.allocations_path):
+            click.echo(f"{output} に書き出しました。")
+
+    @app.cli.command("serve", with_appcontext=False)
+    @click.option("--host", default="127.0.0.1", show_default=True)
+    @click.option("--port", type=int, default=8000, show_default=True)
+    @click.option("--workers", type=click.IntRange(min=1), default=None, help="ワーカープロセス数（既定: SERVE_WORKERS、未設定なら CPU コア数）")
+    @click.option("--max-requests", type=click.IntRange(min=0), default=None, help="1 ワーカーが処理したら入れ替わるリクエスト数（0 で無制限）")
+    def serve_command(host: str, port: int, workers: Optional[int], max_requests: Optional[int]) -> None:
+        """アプリを読み込み・ウォームアップ済みの prefork サーバーで起動します（本番用）。"""
+        import os
+
+        from .server import PreforkServer, warm_up
+
+        if not hasattr(os, "fork"):
+            raise click.ClickException("flask serve は fork できる OS（Linux / macOS）でのみ使えます。")
+        server = PreforkServer(
+            app,
+            host,
+            port,
+            workers=workers or app.config["SERVE_WORKERS"] or os.cpu_count() or 1,
+            max_requests=app.config["SERVE_MAX_REQUESTS"] if max_requests is None else max_requests,
+            max_requests_jitter=app.config["SERVE_MAX_REQUESTS_JITTER"],
+            graceful_timeout=app.config["SERVE_GRACEFUL_TIMEOUT"],
+        )
+        bound_host, bound_port = server.bind()
+        report = warm_up(app)
+        click.echo(
+            f"モジュール {report.modules} 件・テンプレート {report.templates} 件・"
+            f"{report.organizations} パーティションのキャッシュを準備しました（{report.elapsed:.2f} 秒）。",
+        )
+        click.echo(f"http://{bound_host}:{bound_port} で {server.workers} ワーカーを起動します。")
+        server.run()
+
+    @app.cli.command("set-role")
+    @click.argument("email")
+    @click.argument("role", type=click.Choice(["member", "admin"]))
+    def set_role_command(email: str, role: str) -> None:
+        """ユーザーの権限を変更します（admin はバックアップなどの管理機能を使えます）。"""
+        from .models import User
+
+        user = db.session.execute(db.select(User).where(User.email == email.lower())).scalar_one_or_none()
+        if user is None:
+            raise click.BadParameter(f"{email} のユーザーは存在しません。", param_hint="EMAIL")
+        user.role = role
+        db.session.commit()
+        click.echo(f"{user.email} の権限を {role} にしました。")
+
+    @app.cli.group("partitions")
+    def partitions_group() -> None:
+        """組織ごとのデータベースパーティションを管理します。"""
+
+    @partitions_group.command("list")
+    def partitions_list_command() -> None:
+        """ユーザーに割り当てられている組織と接続先を表示します。"""
+        for organization in partitions.organizations():
+            target = organization if partitions.uses_schemas else partitions.database_uri_for(organization)
+            click.echo(f"{organization}\t{target}")
+
+    @partitions_group.command("assign")
+    @click.argument("email")
+    @click.argument("organization", required=False)
+    def partitions_assign_command(email: str, organization: Optional[str]) -> None:
+        """ユーザーを組織に割り当てます（ORGANIZATION を省略すると共通 DB に戻します）。"""
+        from .models import User
+        from .partitioning import InvalidOrganization, validate_organization
+
+        if organization is not None:
+            try:
+                validate_organization(organization)
+            except InvalidOrganization as exc:
+                raise click.BadParameter(str(exc), param_hint="ORGANIZATION") from None
+        user = db.session.execute(db.select(User).where(User.email == email.lower())).scalar_one_or_none()
+        if user is None:
+            raise click.BadParameter(f"{email} のユーザーは存在しません。", param_hint="EMAIL")
+        user.organization = organization
+        db.session.commit()
+        click.echo(f"{user.email} を {organization or '共通 DB'} に割り当てました。")
+
+    @partitions_group.command("upgrade")
+    @click.option("--org", "organizations", multiple=True, help="対象の組織コード（既定: 全組織）")
+    @click.option("--revision", default="head", show_default=True)
+    def partitions_upgrade_command(organizations: tuple[str, ...], revision: str) -> None:
+        """全組織のパーティションに flask db upgrade を順に適用します。"""
+        from .partitioning import InvalidOrganization, upgrade_partitions
+
+        try:
+            upgraded = upgrade_partitions(list(organizations) or None, revision=revision)
+        except InvalidOrganization as exc:
+            raise click.BadParameter(str(exc), param_hint="--org") from None
+        click.echo(f"{len(upgraded)} 組織のパーティションを {revision} に更新しました。")
+
     return app
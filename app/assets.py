@@ -0,0 +1,52 @@
+"""静的ファイルにフィンガープリント付き URL を与え、長期キャッシュさせるヘルパー。"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+
+from flask import Flask, Response, current_app, request, url_for
+
+# (パス, mtime) -> ダイジェスト。ファイルが更新されれば自動的に再計算される。
+_digest_cache: dict[tuple[str, float], str] = {}
+
+
+def init_assets(app: Flask) -> None:
+    """テンプレート関数 asset_url と静的ファイルのキャッシュヘッダーを登録する。"""
+    app.config.setdefault("ASSET_MAX_AGE", 60 * 60 * 24 * 365)
+    app.add_template_global(asset_url)
+    app.after_request(_cache_fingerprinted_assets)
+
+
+def asset_digest(filename: str) -> str:
+    """静的ファイルの内容ハッシュ（先頭 12 桁）を返す。"""
+    path = os.path.join(current_app.static_folder, filename)
+    key = (path, os.path.getmtime(path))
+    digest = _digest_cache.get(key)
+    if digest is None:
+        with open(path, "rb") as file_obj:
+            digest = hashlib.sha256(file_obj.read()).hexdigest()[:12]
+        _digest_cache[key] = digest
+    return digest
+
+
+def asset_url(filename: str) -> str:
+    """内容が変わるたびに URL が変わる静的ファイル URL を生成する。"""
+    return url_for("static", filename=filename, v=asset_digest(filename))
+
+
+def _cache_fingerprinted_assets(response: Response) -> Response:
+    if request.endpoint != "static" or "v" not in request.args:
+        return response
+    if response.status_code not in (200, 304):
+        return response
+    # 古い・でたらめな v で immutable を付けると、その URL が差し替え前の内容のまま固定されてしまう。
+    if request.args["v"] != asset_digest(request.view_args["filename"]):
+        return response
+    # URL に内容ハッシュが含まれるので、ブラウザは再検証せずに使い回せる。
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["ASSET_MAX_AGE"]
+    response.cache_control.immutable = True
+    response.cache_control.no_cache = None
+    response.expires = None
+    return response
@@ -0,0 +1,334 @@
+"""物件・入居者・契約の変更をフィールド単位で記録する監査ログ。
+
+変更は after_flush で差分として集め、コミット確定後にキューへ渡す。
+書き込みはバックグラウンドのライタースレッドがまとめて INSERT するため、
+リクエスト側のトランザクションに監査ログの書き込みコストは乗らない。
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from flask import Flask, current_app, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+from .extensions import db
+from .models import AuditEvent, Lease, Property, Tenant
+from .partitioning import PartitionedSession, current_organization
+
+AUDITED_MODELS = (Property, Tenant, Lease)
+# 差分に含めない列（主キーと、更新のたびに変わるだけで監査上の意味がないもの）。
+# name_sort_key などは他の列から導出する列なので差分に含めない。
+IGNORED_COLUMNS = frozenset({"id", "created_at", "updated_at", "name_sort_key", "email_key", "phone_key"})
+ACTION_CREATE = "create"
+ACTION_UPDATE = "update"
+ACTION_DELETE = "delete"
+# 解約済みの契約を lease_archive へ移した（app/lease_archive.py）。
+ACTION_ARCHIVE = "archive"
+ACTION_MERGE = "merge"
+# 外部キーの ON DELETE CASCADE で DB が削除する子テーブル（親モデル -> (子モデル, 外部キー列)）。
+CASCADED_DELETES = {
+    Property: ((Tenant, "property_id"), (Lease, "property_id")),
+    Tenant: ((Lease, "tenant_id"),),
+}
+
+_PENDING_KEY = "audit_pending"
+_STOP = object()
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _column_keys(obj) -> list[str]:
+    return [attr.key for attr in sa.inspect(obj).mapper.column_attrs if attr.key not in IGNORED_COLUMNS]
+
+
+def _snapshot(obj, before: bool) -> dict[str, list]:
+    """作成・削除時の全列の値を [変更前, 変更後] の形で返す。"""
+    state = sa.inspect(obj)
+    changes = {}
+    for key in _column_keys(obj):
+        if key not in state.dict:
+            continue
+        value = _json_value(state.dict[key])
+        changes[key] = [value, None] if before else [None, value]
+    return changes
+
+
+def _diff(obj) -> dict[str, list]:
+    """更新された列だけを [変更前, 変更後] の形で返す。"""
+    state = sa.inspect(obj)
+    changes = {}
+    for key in _column_keys(obj):
+        history = state.attrs[key].history
+        if not history.has_changes():
+            continue
+        old = history.deleted[0] if history.deleted else None
+        new = history.added[0] if history.added else None
+        if old != new:
+            changes[key] = [_json_value(old), _json_value(new)]
+    return changes
+
+
+def _request_context() -> tuple[Optional[int], Optional[str]]:
+    if not has_request_context():
+        return None, None
+    from flask_login import current_user
+
+    user_id = current_user.get_id() if current_user.is_authenticated else None
+    return (int(user_id) if user_id else None), request.endpoint
+
+
+def _collect_changes(session, _flush_context) -> None:
+    if not has_app_context() or "audit" not in current_app.extensions:
+        return
+    user_id, endpoint = _request_context()
+    occurred_at = datetime.now()
+    pending = session.info.setdefault(_PENDING_KEY, [])
+
+    def record(obj, action: str, changes: dict) -> None:
+        if changes:
+            pending.append(
+                {
+                    "occurred_at": occurred_at,
+                    "user_id": user_id,
+                    "entity_type": obj.__tablename__,
+                    "entity_id": obj.id,
+                    "action": action,
+                    "changes": changes,
+                    "endpoint": endpoint,
+                },
+            )
+
+    for obj in session.new:
+        if isinstance(obj, AUDITED_MODELS):
+            record(obj, ACTION_CREATE, _snapshot(obj, before=False))
+    for obj in session.dirty:
+        if isinstance(obj, AUDITED_MODELS):
+            record(obj, ACTION_UPDATE, _diff(obj))
+    for obj in session.deleted:
+        if isinstance(obj, AUDITED_MODELS):
+            record(obj, ACTION_DELETE, _snapshot(obj, before=True))
+
+
+def record_bulk_changes(session, model, ids: list[int], action: str, changes: dict) -> None:
+    """ORM を経由しない一括 UPDATE / DELETE の結果を、コミット時に監査ログへ残す。"""
+    if not ids or not has_app_context() or "audit" not in current_app.extensions:
+        return
+    user_id, endpoint = _request_context()
+    occurred_at = datetime.now()
+    changes = {key: [_json_value(old), _json_value(new)] for key, (old, new) in changes.items()}
+    session.info.setdefault(_PENDING_KEY, []).extend(
+        {
+            "occurred_at": occurred_at,
+            "user_id": user_id,
+            "entity_type": model.__tablename__,
+            "entity_id": entity_id,
+            "action": action,
+            "changes": changes,
+            "endpoint": endpoint,
+        }
+        for entity_id in ids
+    )
+
+
+def record_deleted_rows(session, model, rows) -> None:
+    """DELETE ... RETURNING や列指定の select で得た行を、削除イベントとしてコミット時に記録する。"""
+    if not rows or not has_app_context() or "audit" not in current_app.extensions:
+        return
+    user_id, endpoint = _request_context()
+    occurred_at = datetime.now()
+    session.info.setdefault(_PENDING_KEY, []).extend(
+        {
+            "occurred_at": occurred_at,
+            "user_id": user_id,
+            "entity_type": model.__tablename__,
+            "entity_id": row["id"],
+            "action": ACTION_DELETE,
+            "changes": {
+                key: [_json_value(value), None]
+                for key, value in row.items()
+                if key not in IGNORED_COLUMNS and value is not None
+            },
+            "endpoint": endpoint,
+        }
+        for row in rows
+    )
+
+
+def record_cascaded_deletes(session, model, ids: list[int], seen: Optional[set] = None) -> None:
+    """ON DELETE CASCADE で DB が消す子・孫の行を、親を削除する前に列指定で読んで記録する。"""
+    if not ids or not has_app_context() or "audit" not in current_app.extensions:
+        return
+    seen = set() if seen is None else seen
+    for child, column in CASCADED_DELETES.get(model, ()):
+        table = child.__table__
+        rows = session.execute(sa.select(table).where(table.c[column].in_(ids))).mappings().all()
+        rows = [row for row in rows if (child, row["id"]) not in seen]
+        seen.update((child, row["id"]) for row in rows)
+        record_deleted_rows(session, child, rows)
+        record_cascaded_deletes(session, child, [row["id"] for row in rows], seen)
+
+
+def _collect_cascades(session, _flush_context, _instances) -> None:
+    """session.delete() された親の、ORM が読み込まずに DB が削除する子を記録する。"""
+    if not has_app_context() or "audit" not in current_app.extensions:
+        return
+    deleted = [obj for obj in session.deleted if isinstance(obj, AUDITED_MODELS)]
+    # ORM が自分で削除する（読み込み済みの）子は after_flush 側で記録される。
+    seen = {(type(obj), obj.id) for obj in deleted}
+    for model in CASCADED_DELETES:
+        ids = [obj.id for obj in deleted if isinstance(obj, model)]
+        record_cascaded_deletes(session, model, ids, seen)
+
+
+def _enqueue_committed(session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events and has_app_context() and "audit" in current_app.extensions:
+        current_app.extensions["audit"].submit(current_organization(), events)
+
+
+def _discard_pending(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+def _track_previous_values() -> None:
+    """コミット後に失効した列へ代入しても変更前の値が履歴に残るようにする。"""
+    for model in AUDITED_MODELS:
+        for attr in sa.inspect(model).column_attrs:
+            instrumented = getattr(model, attr.key)
+            if attr.key not in IGNORED_COLUMNS and not event.contains(instrumented, "set", _keep_previous_value):
+                event.listen(instrumented, "set", _keep_previous_value, active_history=True, retval=True)
+
+
+class AuditWriter:
+    """監査イベントを上限付きキューで受け取り、別スレッドでまとめて書き込む。"""
+
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+        self.asynchronous = app.config["AUDIT_ASYNC"]
+        self.batch_size = app.config["AUDIT_BATCH_SIZE"]
+        self.poll_interval = app.config["AUDIT_POLL_INTERVAL"]
+        self.enqueue_timeout = app.config["AUDIT_ENQUEUE_TIMEOUT"]
+        self.queue_size = app.config["AUDIT_QUEUE_SIZE"]
+        self.written = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork 後の子プロセスは親のスレッドを引き継がないため作り直す。
+                self._reset()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, organization: Optional[str], events: list[dict]) -> None:
+        items = [(organization, item) for item in events]
+        if not self.asynchronous:
+            self._write(items)
+            return
+        self._ensure_started()
+        for index, item in enumerate(items):
+            try:
+                self._queue.put(item, timeout=self.enqueue_timeout)
+            except queue.Full:
+                # ライターが追いつかない間は呼び出し元で書き込み、イベントを落とさない。
+                self.app.logger.warning("audit queue is full; writing %d events inline", len(items) - index)
+                self._write(items[index:])
+                return
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+            batch, stop = [], item is _STOP
+            if not stop:
+                batch.append(item)
+            # 溜まっている分をまとめて 1 回の INSERT にする。
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            try:
+                if batch:
+                    self._write(batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, items: list[tuple[Optional[str], dict]]) -> None:
+        grouped: dict[Optional[str], list[dict]] = {}
+        for organization, row in items:
+            grouped.setdefault(organization, []).append(row)
+        with self.app.app_context():
+            router = self.app.extensions["partitions"]
+            for organization, rows in grouped.items():
+                engine = router.engine_for(organization) if organization else db.engine
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(sa.insert(AuditEvent.__table__), rows)
+                except Exception:  # noqa: BLE001 - 監査ログの失敗で業務処理は止めない
+                    self.app.logger.exception("failed to write %d audit events", len(rows))
+                    continue
+                self.written += len(rows)
+
+    def flush(self) -> None:
+        """キューに残っているイベントがすべて書き込まれるまで待つ。"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._queue.join()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """残りを書き出してからライタースレッドを止める。"""
+        if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+
+def init_audit(app: Flask) -> AuditWriter:
+    """変更の収集フックを登録し、アプリごとのライターを用意する。"""
+    writer = AuditWriter(app)
+    if not app.config["AUDIT_ENABLED"]:
+        return writer
+    app.extensions["audit"] = writer
+    if not event.contains(PartitionedSession, "after_flush", _collect_changes):
+        event.listen(PartitionedSession, "before_flush", _collect_cascades)
+        event.listen(PartitionedSession, "after_flush", _collect_changes)
+        event.listen(PartitionedSession, "after_commit", _enqueue_committed)
+        event.listen(PartitionedSession, "after_rollback", _discard_pending)
+        _track_previous_values()
+    # プロセス終了時にキューの残りを書き出す。
+    atexit.register(writer.shutdown)
+    return writer
@@ -0,0 +1,358 @@
+"""SQLite のオンラインバックアップ API で、アプリを止めずに DB を複製・復元するモジュール。
+
+複製は pages ページずつ進め、各ステップの間に sleep 秒だけ待つ。元の DB の読み取り
+ロックはステップ中にしか保持しないため、その間も他の接続は読み書きを続けられる
+（コピー中に別の接続が書き込むと、SQLite がコピーを最初からやり直す）。
+バックアップは整合性を検査してから保存し、古いものは世代数で削除する。
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import sqlalchemy as sa
+from flask import Flask, current_app
+
+from .jobs import JobStore
+from .partitioning import current_organization
+
+MAIN_DATABASE = "main"
+_BACKUP_NAME = re.compile(r"^(?P<name>[a-z0-9][a-z0-9_-]*)-(?P<stamp>\d{8}-\d{6}(?:-\d+)?)\.db(?:\.gz)?$")
+
+
+class BackupError(RuntimeError):
+    """バックアップ・復元を続けられない場合に送出する。"""
+
+
+@dataclass
+class BackupResult:
+    """1 つの DB ファイルの複製結果。lock_seconds はステップ中（ロック保持中）の合計時間。"""
+
+    name: str
+    path: Path
+    bytes_copied: int
+    steps: int
+    elapsed: float
+    lock_seconds: float
+    max_lock_seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """1 秒あたりの複製バイト数（待ち時間を含む）。"""
+        return self.bytes_copied / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "path": str(self.path),
+            "bytes": self.bytes_copied,
+            "steps": self.steps,
+            "elapsed": round(self.elapsed, 3),
+            "lock_seconds": round(self.lock_seconds, 3),
+            "max_lock_seconds": round(self.max_lock_seconds, 3),
+            "throughput": round(self.throughput),
+        }
+
+
+def sqlite_path(engine: sa.Engine) -> Path:
+    """Engine が指す SQLite ファイルのパス。ファイル以外の DB はバックアップできない。"""
+    url = engine.url
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        raise BackupError(f"SQLite のファイル DB 以外はバックアップできません: {url.render_as_string()}")
+    return Path(url.database)
+
+
+def integrity_errors(path: Path) -> list[str]:
+    """PRAGMA integrity_check と foreign_key_check の結果。問題が無ければ空。"""
+    conn = sqlite3.connect(path)
+    try:
+        errors = [row[0] for row in conn.execute("PRAGMA integrity_check") if row[0] != "ok"]
+        errors += [f"外部キー違反: {row[0]} rowid={row[1]} -> {row[2]}" for row in conn.execute("PRAGMA foreign_key_check")]
+    except sqlite3.DatabaseError as exc:
+        errors = [str(exc)]
+    finally:
+        conn.close()
+    return errors
+
+
+def copy_database(source: Path, destination: Path, pages: int, sleep: float) -> tuple[int, float, float]:
+    """source を destination へ pages ページずつ複製し、(ステップ数, ロック合計秒, 最長ステップ秒) を返す。"""
+    steps = 0
+    lock_seconds = 0.0
+    max_lock = 0.0
+    step_started = time.perf_counter()
+
+    def progress(_status: int, remaining: int, _total: int) -> None:
+        nonlocal steps, lock_seconds, max_lock, step_started
+        held = time.perf_counter() - step_started
+        steps += 1
+        lock_seconds += held
+        max_lock = max(max_lock, held)
+        if remaining and sleep:
+            # 進捗コールバックはステップの合間に呼ばれるので、ここで待つ間はロックを持たない。
+            time.sleep(sleep)
+        step_started = time.perf_counter()
+
+    src = sqlite3.connect(source, timeout=30)
+    dst = sqlite3.connect(destination)
+    try:
+        src.backup(dst, pages=pages, progress=progress)
+    finally:
+        dst.close()
+        src.close()
+    return steps, lock_seconds, max_lock
+
+
+def backup_database(
+    source: Path,
+    directory: Path,
+    name: str = MAIN_DATABASE,
+    pages: int = 256,
+    sleep: float = 0.01,
+    compress: bool = True,
+) -> BackupResult:
+    """source をオンラインで複製し、整合性を確認してから directory に保存する。"""
+    if not source.exists():
+        raise BackupError(f"{source} が見つかりません。")
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    target = directory / f"{name}-{stamp}.db"
+    suffix = 1
+    while target.exists() or target.with_name(target.name + ".gz").exists():
+        suffix += 1
+        target = directory / f"{name}-{stamp}-{suffix}.db"
+    partial = target.with_name(target.name + ".partial")
+
+    started = time.perf_counter()
+    try:
+        steps, lock_seconds, max_lock = copy_database(source, partial, pages, sleep)
+        errors = integrity_errors(partial)
+        if errors:
+            raise BackupError(f"複製した {name} の整合性検査に失敗しました: {'; '.join(errors[:5])}")
+        bytes_copied = partial.stat().st_size
+        if compress:
+            target = target.with_name(target.name + ".gz")
+            with partial.open("rb") as raw, gzip.open(target, "wb", compresslevel=6) as packed:
+                shutil.copyfileobj(raw, packed, 1024 * 1024)
+        else:
+            partial.replace(target)
+    finally:
+        partial.unlink(missing_ok=True)
+    return BackupResult(name, target, bytes_copied, steps, time.perf_counter() - started, lock_seconds, max_lock)
+
+
+def list_backups(directory: Path, name: Optional[str] = None) -> list[Path]:
+    """バックアップファイルを新しい順に返す。name を指定するとその DB の分だけ。"""
+    if not directory.exists():
+        return []
+    found = []
+    for path in directory.iterdir():
+        match = _BACKUP_NAME.match(path.name)
+        if match and (name is None or match["name"] == name):
+            found.append((match["stamp"], path))
+    return [path for _stamp, path in sorted(found, reverse=True)]
+
+
+def prune_backups(directory: Path, name: str, keep: int) -> list[Path]:
+    """新しい keep 世代を残して古いバックアップを削除し、削除したパスを返す。"""
+    removed = list_backups(directory, name)[keep:] if keep > 0 else []
+    for path in removed:
+        path.unlink(missing_ok=True)
+    return removed
+
+
+def _table_versions(path: Path) -> dict[str, int]:
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute("SELECT table_name, version FROM table_version").fetchall())
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+
+
+def _advance_table_versions(path: Path, before: dict[str, int]) -> None:
+    """復元で巻き戻った版カウンタを復元前より先へ進め、古い版のキャッシュを使わせない。"""
+    restored = _table_versions(path)
+    names = sorted({*before, *restored})
+    if not names:
+        return
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO table_version (table_name, version) VALUES (?, ?) "
+                "ON CONFLICT (table_name) DO UPDATE SET version = excluded.version",
+                [(name, max(before.get(name, 0), restored.get(name, 0)) + 1) for name in names],
+            )
+    finally:
+        conn.close()
+
+
+def restore_database(backup: Path, target: Path, pages: int = 256, sleep: float = 0.0) -> None:
+    """整合性を確認したバックアップを、稼働中の target へバックアップ API で書き戻す。"""
+    if not backup.exists():
+        raise BackupError(f"{backup} が見つかりません。")
+    staging = target.with_name(f".{target.name}.restore-{uuid.uuid4().hex[:8]}")
+    try:
+        if backup.suffix == ".gz":
+            with gzip.open(backup, "rb") as packed, staging.open("wb") as raw:
+                shutil.copyfileobj(packed, raw, 1024 * 1024)
+        else:
+            shutil.copyfile(backup, staging)
+        errors = integrity_errors(staging)
+        if errors:
+            raise BackupError(f"{backup.name} の整合性検査に失敗しました: {'; '.join(errors[:5])}")
+        versions = _table_versions(target)
+        # ファイルを置き換えると開いている接続や WAL と食い違うため、接続越しに書き戻す。
+        copy_database(staging, target, pages, sleep)
+        _advance_table_versions(target, versions)
+    except (OSError, EOFError, gzip.BadGzipFile) as exc:
+        raise BackupError(f"{backup.name} を読み込めません: {exc}") from exc
+    finally:
+        staging.unlink(missing_ok=True)
+    errors = integrity_errors(target)
+    if errors:
+        raise BackupError(f"復元後の整合性検査に失敗しました: {'; '.join(errors[:5])}")
+
+
+def backup_directory(app: Flask) -> Path:
+    return Path(app.config.get("BACKUP_DIR") or Path(app.instance_path) / "backups")
+
+
+def database_targets(all_organizations: bool = False) -> dict[str, Path]:
+    """バックアップ対象の DB 名とファイル。既定は選択中の組織（未選択なら共通 DB）だけ。"""
+    partitions = current_app.extensions["partitions"]
+    if not all_organizations:
+        organization = current_organization()
+        return {organization or MAIN_DATABASE: sqlite_path(partitions.current_engine())}
+    if partitions.uses_schemas:
+        raise BackupError("組織をスキーマで分けている DB はバックアップできません。")
+    targets = {MAIN_DATABASE: sqlite_path(partitions.db.engine)}
+    for organization in partitions.organizations():
+        path = Path(sa.engine.make_url(partitions.database_uri_for(organization)).database)
+        if path.exists():
+            targets[organization] = path
+    return targets
+
+
+def run_backups(app: Flask, targets: dict[str, Path], compress: Optional[bool] = None, keep: Optional[int] = None) -> list[BackupResult]:
+    """対象の DB を順に複製し、世代数を超えた古いバックアップを削除する。"""
+    directory = backup_directory(app)
+    compress = app.config["BACKUP_COMPRESS"] if compress is None else compress
+    keep = app.config["BACKUP_KEEP"] if keep is None else keep
+    results = []
+    for name, path in targets.items():
+        results.append(
+            backup_database(
+                path,
+                directory,
+                name=name,
+                pages=app.config["BACKUP_PAGES_PER_STEP"],
+                sleep=app.config["BACKUP_STEP_SLEEP"],
+                compress=compress,
+            ),
+        )
+        prune_backups(directory, name, keep)
+    return results
+
+
+@dataclass
+class BackupJob:
+    """管理画面から起動したバックアップジョブの進捗。状態は BACKUP_DIR の JSON で全ワーカーと共有する。"""
+
+    id: str
+    # ジョブを起動した利用者の組織。別の組織からは参照できない。
+    organization: Optional[str] = None
+    state: str = "queued"
+    results: list[BackupResult] = field(default_factory=list)
+    error: Optional[str] = None
+    started_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+    # ジョブを動かしているプロセス。終了していれば失敗として扱う。
+    pid: int = field(default_factory=os.getpid)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "results": [result.to_dict() for result in self.results],
+            "error": self.error,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+        }
+
+    def to_record(self) -> dict:
+        return {**self.to_dict(), "organization": self.organization, "pid": self.pid}
+
+    @classmethod
+    def from_record(cls, record: dict) -> BackupJob:
+        return cls(
+            id=record["id"],
+            organization=record["organization"],
+            state=record["state"],
+            results=[
+                BackupResult(
+                    name=result["name"],
+                    path=Path(result["path"]),
+                    bytes_copied=result["bytes"],
+                    steps=result["steps"],
+                    elapsed=result["elapsed"],
+                    lock_seconds=result["lock_seconds"],
+                    max_lock_seconds=result["max_lock_seconds"],
+                )
+                for result in record["results"]
+            ],
+            error=record["error"],
+            started_at=datetime.fromisoformat(record["started_at"]),
+            finished_at=datetime.fromisoformat(record["finished_at"]) if record["finished_at"] else None,
+            pid=record["pid"],
+        )
+
+
+def get_job(directory: Path, job_id: str) -> Optional[BackupJob]:
+    """どのワーカーが起動したジョブでも、共有の状態ファイルから読み出す。"""
+    record = JobStore(directory).load(job_id)
+    return BackupJob.from_record(record) if record is not None else None
+
+
+def start_backup_job(app: Flask, targets: dict[str, Path], organization: Optional[str] = None) -> BackupJob:
+    """バックグラウンドスレッドでバックアップを取り、ジョブを即座に返す。"""
+    store = JobStore(backup_directory(app))
+    store.prune(app.config["BACKUP_JOB_TTL"])
+    job = BackupJob(id=uuid.uuid4().hex, organization=organization)
+    with store.locked():
+        # 同じ DB を同時に複製しても得るものは無いので、どのワーカーが起動したものでも
+        # 同じ組織の実行中のジョブがあればそれを返す。
+        for running in store.active():
+            if running["organization"] == organization:
+                return BackupJob.from_record(running)
+        store.save(job.to_record())
+
+    def run() -> None:
+        job.state = "running"
+        store.save(job.to_record())
+        try:
+            job.results = run_backups(app, targets)
+            job.state = "finished"
+        except Exception as exc:  # noqa: BLE001 - ジョブの失敗内容は状態として返す
+            app.logger.exception("backup job %s failed", job.id)
+            job.state = "failed"
+            job.error = str(exc)
+        finally:
+            job.finished_at = datetime.now()
+            store.save(job.to_record())
+
+    threading.Thread(target=run, name=f"backup-{job.id[:8]}", daemon=True).start()
+    return job
@@ -0,0 +1 @@
+"""監査ログなど管理者向け画面を提供するブループリントのパッケージ初期化。"""
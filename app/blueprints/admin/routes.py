@@ -0,0 +1,110 @@
+"""変更履歴（監査ログ）の閲覧など、管理系のルート。"""
+
+from __future__ import annotations
+
+from functools import wraps
+
+from flask import Blueprint, abort, current_app, jsonify, render_template, request, url_for
+from flask_login import current_user, login_required
+
+from ...audit import AUDITED_MODELS
+from ...backup import MAIN_DATABASE, BackupError, backup_directory, database_targets, get_job, list_backups, start_backup_job
+from ...extensions import db
+from ...models import AuditEvent, User
+from ...partitioning import current_organization
+
+admin_bp = Blueprint("admin", __name__)
+
+AUDIT_PAGE_SIZE = 100
+ENTITY_LABELS = {"property": "物件", "tenant": "入居者", "lease": "契約"}
+ACTION_LABELS = {"create": "作成", "update": "更新", "delete": "削除", "archive": "アーカイブ", "merge": "統合"}
+ADMIN_ROLE = "admin"
+
+
+def admin_required(view):
+    """login_required に加えて role が admin のユーザーだけを通す。"""
+
+    @wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        if current_user.role != ADMIN_ROLE:
+            abort(403)
+        return view(*args, **kwargs)
+
+    return wrapped
+
+
+@admin_bp.route("/audit")
+@login_required
+def audit():
+    """対象（entity と id）を指定して変更履歴を新しい順に表示する。"""
+    entity = request.args.get("entity") or None
+    entity_id = request.args.get("id", type=int)
+    before = request.args.get("before", type=int)
+    if entity not in {model.__tablename__ for model in AUDITED_MODELS}:
+        entity = None
+
+    # (entity_type, entity_id, id) の索引を前方一致で使い、id の降順で辿る。
+    stmt = db.select(AuditEvent).order_by(AuditEvent.id.desc()).limit(AUDIT_PAGE_SIZE + 1)
+    if entity is not None:
+        stmt = stmt.where(AuditEvent.entity_type == entity)
+        if entity_id is not None:
+            stmt = stmt.where(AuditEvent.entity_id == entity_id)
+    if before is not None:
+        stmt = stmt.where(AuditEvent.id < before)
+    events = list(db.session.scalars(stmt))
+    next_before = events[AUDIT_PAGE_SIZE - 1].id if len(events) > AUDIT_PAGE_SIZE else None
+    events = events[:AUDIT_PAGE_SIZE]
+
+    user_ids = {event.user_id for event in events if event.user_id is not None}
+    users = {}
+    if user_ids:
+        users = dict(db.session.execute(db.select(User.id, User.email).where(User.id.in_(user_ids))).all())
+
+    return render_template(
+        "admin/audit_list.html",
+        events=events,
+        users=users,
+        entity=entity,
+        entity_id=entity_id,
+        next_before=next_before,
+        entity_labels=ENTITY_LABELS,
+        action_labels=ACTION_LABELS,
+    )
+
+
+@admin_bp.route("/admin/backups")
+@admin_required
+def backups():
+    """自分の組織（未所属なら共通 DB）の保存済みバックアップを新しい順に返す。"""
+    name = current_organization() or MAIN_DATABASE
+    return jsonify(
+        backups=[
+            {"file": path.name, "bytes": path.stat().st_size}
+            for path in list_backups(backup_directory(current_app), name)
+        ],
+    )
+
+
+@admin_bp.route("/admin/backups", methods=["POST"])
+@admin_required
+def backup_start():
+    """選択中の DB のオンラインバックアップをバックグラウンドで開始する。"""
+    try:
+        targets = database_targets()
+    except BackupError as exc:
+        return jsonify(error=str(exc)), 400
+    job = start_backup_job(current_app._get_current_object(), targets, current_organization())
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers["Location"] = url_for("admin.backup_status", job_id=job.id)
+    return response
+
+
+@admin_bp.route("/admin/backups/<job_id>")
+@admin_required
+def backup_status(job_id: str):
+    job = get_job(backup_directory(current_app), job_id)
+    if job is None or job.organization != current_organization():
+        abort(404)
+    return jsonify(job.to_dict())
@@ -0,0 +1 @@
+"""外部連携向けの読み取り専用 JSON API（/api/v1）のパッケージ初期化。"""
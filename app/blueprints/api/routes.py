@@ -0,0 +1,131 @@
+"""物件・入居者・契約を ORM を介さずに返す読み取り専用 API。
+
+Core の select で必要な列だけを取得し、行をそのまま dict にして返す。
+ページングは id のキーセットで行い、続きの位置は不透明なカーソル文字列で渡す。
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+
+from flask import Blueprint, request
+from flask_login import login_required
+from sqlalchemy import Column, select
+
+from ...extensions import db
+from ...json_encoding import json_response
+from ...models import Lease, Property, Tenant
+
+api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class ApiParameterError(ValueError):
+    """クエリパラメータが不正な場合に送出する。"""
+
+
+@dataclass(frozen=True)
+class Resource:
+    table: object
+    fields: tuple[str, ...]
+    filters: tuple[str, ...] = ()
+
+    def column(self, name: str) -> Column:
+        return self.table.__table__.c[name]
+
+
+RESOURCES = {
+    "properties": Resource(Property, ("id", "name", "address", "note", "created_at", "updated_at")),
+    "tenants": Resource(
+        Tenant,
+        ("id", "name", "email", "phone", "property_id", "unit_number", "created_at", "updated_at"),
+        filters=("property_id",),
+    ),
+    "leases": Resource(
+        Lease,
+        (
+            "id",
+            "property_id",
+            "tenant_id",
+            "unit_number",
+            "rent",
+            "start_date",
+            "end_date",
+            "status",
+            "created_at",
+            "updated_at",
+        ),
+        filters=("property_id",),
+    ),
+}
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after = json.loads(raw)["after"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ApiParameterError("cursor が不正です。") from None
+    if not isinstance(after, int):
+        raise ApiParameterError("cursor が不正です。")
+    return after
+
+
+def _requested_fields(resource: Resource) -> list[str]:
+    raw = request.args.get("fields")
+    if not raw:
+        return list(resource.fields)
+    names = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in names if name not in resource.fields]
+    if unknown:
+        raise ApiParameterError(f"未知のフィールドです: {', '.join(unknown)}")
+    # カーソルを作るために id は常に含める。
+    return ["id", *[name for name in dict.fromkeys(names) if name != "id"]]
+
+
+@api_bp.errorhandler(ApiParameterError)
+def handle_parameter_error(exc: ApiParameterError):
+    return json_response({"error": str(exc)}, status=400)
+
+
+@api_bp.route("/<any(properties, tenants, leases):name>")
+@login_required
+def list_resource(name: str):
+    """fields= で列を選び、property_id などで絞り込んだ一覧を id 順に返す。"""
+    resource = RESOURCES[name]
+    fields = _requested_fields(resource)
+    limit = request.args.get("limit", DEFAULT_LIMIT, type=int)
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ApiParameterError(f"limit は 1〜{MAX_LIMIT} の範囲で指定してください。")
+
+    id_column = resource.column("id")
+    stmt = select(*[resource.column(field) for field in fields]).order_by(id_column).limit(limit + 1)
+    for key in resource.filters:
+        if key in request.args:
+            value = request.args.get(key, type=int)
+            if value is None:
+                raise ApiParameterError(f"{key} は整数で指定してください。")
+            stmt = stmt.where(resource.column(key) == value)
+    cursor = request.args.get("cursor")
+    if cursor:
+        stmt = stmt.where(id_column > decode_cursor(cursor))
+
+    rows = db.session.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return json_response(
+        {
+            "data": [dict(zip(fields, row)) for row in rows],
+            "next_cursor": encode_cursor(rows[-1][0]) if has_more else None,
+        },
+    )
@@ -1,7 +1,7 @@
 """ログインとユーザー登録用フォームの定義をまとめたモジュール。"""
 
 from flask_wtf import FlaskForm
-from wtforms import EmailField, PasswordField, StringField, SubmitField
+from wtforms import EmailField, PasswordField, SubmitField
 from wtforms.validators import DataRequired, Email, EqualTo, Length
 
 
@@ -30,5 +30,4 @@ class RegisterForm(FlaskForm):
             EqualTo("password", message="パスワードが一致しません。"),
         ],
     )
-    role = StringField("権限（任意）")
     submit = SubmitField("登録")
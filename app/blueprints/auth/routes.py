@@ -38,8 +38,6 @@ def register():
     if form.validate_on_submit():
         user = User(email=form.email.data.lower())
         user.set_password(form.password.data)
-        if form.role.data:
-            user.role = form.role.data
         db.session.add(user)
         try:
             db.session.commit()
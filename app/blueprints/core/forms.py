@@ -3,7 +3,17 @@
 from __future__ import annotations
 
 from flask_wtf import FlaskForm
-from wtforms import DateField, DecimalField, HiddenField, SelectField, StringField, SubmitField, TextAreaField
+from wtforms import (
+    DateField,
+    DecimalField,
+    HiddenField,
+    RadioField,
+    SelectField,
+    SelectMultipleField,
+    StringField,
+    SubmitField,
+    TextAreaField,
+)
 from wtforms.validators import DataRequired, Email, Optional
 
 from ...models import LeaseStatus
@@ -71,3 +81,10 @@ class DeleteTenantForm(FlaskForm):
     tenant_id = HiddenField(validators=[DataRequired()])
     next_url = HiddenField(validators=[Optional()])
     submit = SubmitField("削除")
+
+
+class MergeTenantsForm(FlaskForm):
+    # 候補はグループごとに変わるため、選択肢の検証はせず統合処理側で存在を確かめる。
+    target_id = RadioField("残す入居者", coerce=int, validate_choice=False, validators=[DataRequired()])
+    duplicate_ids = SelectMultipleField("統合する入居者", coerce=int, validate_choice=False)
+    submit = SubmitField("統合")
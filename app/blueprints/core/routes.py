@@ -4,68 +4,89 @@ from __future__ import annotations
 
 from datetime import date, timedelta
 from decimal import Decimal
-from types import SimpleNamespace
+from itertools import groupby
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, url_for
 from flask_login import login_required
-from sqlalchemy import func, or_
-from sqlalchemy.orm import joinedload
+from sqlalchemy import delete, func, or_, select, union_all, update
+from sqlalchemy.orm import joinedload, selectinload
 from urllib.parse import urlparse
 
+from ...audit import ACTION_MERGE, record_bulk_changes, record_cascaded_deletes, record_deleted_rows
+from ...cache import dependency
+from ...dates import parse_month
 from ...extensions import db
-from ...models import Lease, LeaseStatus, Property, Tenant
+from ...lease_archive import archived_during
+from ...lease_expiry import expiring_count, expiring_leases
+from ...lease_overlaps import overlapping_leases
+from ...models import Lease, LeaseArchive, LeaseStatus, Property, Tenant, Unit
+from ...partitioning import current_organization, database_identity
+from ...reference_data import property_choices, tenant_count, units_by_property
+from ...tenant_duplicates import REASON_LABELS, find_duplicate_groups, merge_tenants
+from ...view_models import lease_rows, property_rows, tenant_rows
 from .forms import (
     LEASE_STATUS_CHOICES,
     DeletePropertyForm,
     DeleteTenantForm,
     LeaseForm,
+    MergeTenantsForm,
     PropertyForm,
     TenantForm,
 )
 
 core_bp = Blueprint("core", __name__)
 STATUS_LABELS = dict(LEASE_STATUS_CHOICES)
+MAX_EXPIRING_DAYS = 366
+# 重複候補の確認画面に一度に並べるグループ数。
+MAX_DUPLICATE_GROUPS = 100
 
 
-@core_bp.route("/")
-@login_required
-def index():
-    """ダッシュボード: 直近データの集計結果をカード+チャートで表示する。"""
+def build_dashboard_data(month_start: date) -> dict:
+    """ダッシュボード用の件数と物件別集計（前月実績・当月予想）を組み立てる。"""
     property_count = Property.query.count()
     tenant_count = Tenant.query.count()
-    lease_count = Lease.query.count()
+    # 契約数はアーカイブへ移した分も含める。
+    lease_count = Lease.query.count() + db.session.scalar(db.select(func.count(LeaseArchive.id)))
 
     # 先月分の稼働実績を算出するために月初・月末を固定しておく。
-    today = date.today().replace(day=1)
+    today = month_start
     next_month_start = (today + timedelta(days=32)).replace(day=1)
 
     last_month_end = today
     last_month_start = (today - timedelta(days=1)).replace(day=1)
     last_day_prev_month = last_month_end - timedelta(days=1)
 
+    # 物件名 -> 並び順（name_sort_key, id）。軸ラベルは物件一覧と同じ順に並べる。
+    label_order: dict[str, tuple[str, int]] = {}
+
     def aggregate_property_metrics(start: date, end: date) -> tuple[dict[str, float], dict[str, int]]:
-        """指定期間に稼働する契約を物件ごとに集計する."""
+        """指定期間に稼働する契約を物件ごとに集計する（期間に掛かるアーカイブ済みの契約も含む）."""
+        active = union_all(
+            db.select(Lease.property_id, Lease.rent)
+            .where(Lease.start_date <= end)
+            .where(or_(Lease.end_date.is_(None), Lease.end_date >= start)),
+            db.select(LeaseArchive.property_id, LeaseArchive.rent).where(archived_during(start, end)),
+        ).subquery()
         lease_rows = (
-            db.session.query(Property.id, Property.name, func.sum(Lease.rent), func.count(Lease.id))
-            .join(Property, Lease.property_id == Property.id)
-            .filter(Lease.start_date <= end)
-            .filter(or_(Lease.end_date.is_(None), Lease.end_date >= start))
+            db.session.query(Property.id, Property.name, Property.name_sort_key, func.sum(active.c.rent), func.count())
+            .join(Property, active.c.property_id == Property.id)
             .group_by(Property.id)
-            .order_by(Property.name)
+            .order_by(Property.name_sort_key, Property.id)
             .all()
         )
         totals: dict[str, float] = {}
         counts: dict[str, int] = {}
-        for _, name, total, count in lease_rows:
+        for property_id, name, sort_key, total, count in lease_rows:
             totals[name] = float(total)
             counts[name] = int(count)
+            label_order.setdefault(name, (sort_key, property_id))
         return totals, counts
 
     property_totals, property_counts = aggregate_property_metrics(last_month_start, last_day_prev_month)
     forecast_totals, forecast_counts = aggregate_property_metrics(today, next_month_start - timedelta(days=1))
 
     # 実績・予測どちらかに存在する物件名をすべて軸ラベル化する。
-    property_labels = sorted(set(property_totals.keys()) | set(forecast_totals.keys()))
+    property_labels = sorted(label_order, key=label_order.__getitem__)
     if not property_labels:
         property_labels = ["データなし"]
 
@@ -78,17 +99,149 @@ def index():
     ] or [0.0]
     forecast_counts_values = [forecast_counts.get(label, 0) for label in property_labels] or [0]
 
-    return render_template(
-        "index.html",
-        property_count=property_count,
-        tenant_count=tenant_count,
-        lease_count=lease_count,
-        property_labels=property_labels,
-        property_values=property_values,
-        property_counts=property_counts_values,
-        forecast_values=forecast_values,
-        forecast_counts=forecast_counts_values,
+    # 満了予定件数は当日のスナップショットがあればそれを読み、無ければ索引で数える（GET では書き込まない）。
+    expiring_days = current_app.config["EXPIRING_LEASE_DAYS"]
+    expiring_total = expiring_count(expiring_days)
+
+    return {
+        "month": today.strftime("%Y-%m"),
+        "property_count": property_count,
+        "tenant_count": tenant_count,
+        "lease_count": lease_count,
+        "expiring_count": expiring_total,
+        "expiring_days": expiring_days,
+        "property_labels": property_labels,
+        "property_values": property_values,
+        "property_counts": property_counts_values,
+        "forecast_values": forecast_values,
+        "forecast_counts": forecast_counts_values,
+    }
+
+
+def merge_duplicate_properties(target: Property, duplicates: list[Property]) -> None:
+    """重複物件の入居者・契約（アーカイブ分を含む）を target に付け替えてから重複物件を削除する。"""
+    if not duplicates:
+        return
+    # 付け替え対象のコレクションは物件ごとに遅延ロードせず、まとめて読み込む。
+    duplicates = db.session.scalars(
+        db.select(Property)
+        .where(Property.id.in_([duplicate.id for duplicate in duplicates]))
+        .options(selectinload(Property.tenants), selectinload(Property.leases))
+        .execution_options(populate_existing=True),
+    ).all()
+    for duplicate in duplicates:
+        for tenant in list(duplicate.tenants):
+            tenant.property = target
+        for lease in list(duplicate.leases):
+            lease.property = target
+    # 付け替えを先に反映し、ON DELETE CASCADE で付け替え済みの行が消えないようにする。
+    db.session.flush()
+    _merge_archived_leases(target, [duplicate.id for duplicate in duplicates])
+    for duplicate in duplicates:
+        db.session.delete(duplicate)
+
+
+def _merge_archived_leases(target: Property, duplicate_ids: list[int]) -> None:
+    """アーカイブ済み契約を一括 UPDATE で target とその号室へ付け替え、監査ログに残す。"""
+    rows = db.session.execute(
+        select(LeaseArchive.lease_id, LeaseArchive.property_id, LeaseArchive.unit_number).where(
+            LeaseArchive.property_id.in_(duplicate_ids),
+        ),
+    ).all()
+    if not rows:
+        return
+    # 重複物件の号室は物件と一緒に消えるので、target 側に同じ号室が無ければ先に作っておく。
+    unit_numbers = {row.unit_number for row in rows if row.unit_number}
+    existing = set(
+        db.session.scalars(
+            select(Unit.unit_number).where(Unit.property_id == target.id, Unit.unit_number.in_(unit_numbers)),
+        ),
+    )
+    for unit_number in sorted(unit_numbers - existing):
+        db.session.add(Unit(property_id=target.id, unit_number=unit_number))
+    db.session.flush()
+    target_unit = (
+        select(Unit.id)
+        .where(Unit.property_id == target.id, Unit.unit_number == LeaseArchive.unit_number)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(LeaseArchive)
+        .where(LeaseArchive.property_id.in_(duplicate_ids))
+        .values(property_id=target.id, unit_id=target_unit),
+        execution_options={"synchronize_session": False},
+    )
+    for old_property_id, grouped in groupby(sorted(rows, key=lambda row: row[1]), key=lambda row: row[1]):
+        ids = [row[0] for row in grouped]
+        record_bulk_changes(db.session, Lease, ids, ACTION_MERGE, {"property_id": (old_property_id, target.id)})
+
+
+def delete_with_cascade(model, entity_id: int) -> bool:
+    """1 回の DELETE で削除し、子レコードは外部キーの ON DELETE CASCADE に任せる。"""
+    record_cascaded_deletes(db.session, model, [entity_id])
+    rows = (
+        db.session.execute(
+            delete(model).where(model.id == entity_id).returning(*model.__table__.columns),
+            execution_options={"synchronize_session": False},
+        )
+        .mappings()
+        .all()
+    )
+    if not rows:
+        db.session.rollback()
+        return False
+    record_deleted_rows(db.session, model, rows)
+    db.session.commit()
+    return True
+
+
+def _reject_overlap(
+    property_id: int,
+    unit_number: str | None,
+    start_date: date,
+    end_date: date | None,
+    exclude_id: int | None = None,
+) -> bool:
+    """同じ部屋に期間の重なる契約があればメッセージを出して True を返す。"""
+    overlaps = overlapping_leases(property_id, unit_number, start_date, end_date, exclude_id=exclude_id)
+    if not overlaps:
+        return False
+    periods = "、".join(f"#{lease.id}（{lease.start_date}〜{lease.end_date or '期限なし'}）" for lease in overlaps)
+    flash(f"号室 {unit_number} には期間の重なる契約があります: {periods}", "danger")
+    return True
+
+
+@core_bp.route("/")
+@login_required
+def index():
+    """ダッシュボード: 集計は /api/dashboard から後読みし、ここでは枠だけを返す。"""
+    return render_template("index.html", month=request.args.get("month", ""))
+
+
+@core_bp.route("/api/dashboard")
+@login_required
+def dashboard_data():
+    """ダッシュボードのカード・チャート用データを JSON で返す。"""
+    try:
+        month_start = parse_month(request.args.get("month"))
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    if month_start is None:
+        month_start = date.today().replace(day=1)
+
+    # 集計は物件・入居者・契約・満了スナップショットのいずれかがコミットされるまで全ワーカーで使い回す。
+    today = date.today()
+    payload = current_app.extensions["cache"].get_or_set(
+        f"dashboard:{database_identity()}:{current_organization() or '-'}:{month_start.isoformat()}:{today.isoformat()}",
+        lambda: build_dashboard_data(month_start),
+        depends_on=tuple(dependency(table) for table in ("property", "tenant", "lease", "lease_expiry_snapshot")),
+        name="dashboard",
     )
+    response = jsonify(payload)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config["DASHBOARD_CACHE_MAX_AGE"]
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 @core_bp.route("/properties", methods=["GET", "POST"])
@@ -131,12 +284,7 @@ def properties():
             property_obj.note = form.note.data
 
             duplicates = [prop for prop in existing_properties if prop.id != property_obj.id]
-            for duplicate in duplicates:
-                for tenant in list(duplicate.tenants):
-                    tenant.property = property_obj
-                for lease in list(duplicate.leases):
-                    lease.property = property_obj
-                db.session.delete(duplicate)
+            merge_duplicate_properties(property_obj, duplicates)
 
             db.session.commit()
             flash("物件情報を更新しました。", "success")
@@ -150,12 +298,7 @@ def properties():
             canonical_property.note = form.note.data
 
             duplicates = existing_properties[1:]
-            for duplicate in duplicates:
-                for tenant in list(duplicate.tenants):
-                    tenant.property = canonical_property
-                for lease in list(duplicate.leases):
-                    lease.property = canonical_property
-                db.session.delete(duplicate)
+            merge_duplicate_properties(canonical_property, duplicates)
 
             db.session.commit()
             flash("物件情報を更新しました。", "success")
@@ -178,14 +321,13 @@ def properties():
         except (TypeError, ValueError):
             flash("削除対象の情報が正しくありません。", "danger")
             return redirect(url_for("core.properties"))
-        property_obj = Property.query.get_or_404(property_id)
-        db.session.delete(property_obj)
-        db.session.commit()
+        if not delete_with_cascade(Property, property_id):
+            abort(404)
         flash("物件と関連情報を削除しました。", "info")
         return redirect(url_for("core.properties"))
 
-    # 一覧テーブルを描画するためのデータと削除フォームを構築。
-    properties_list = Property.query.order_by(Property.name).all()
+    # 一覧テーブルは列だけを読む行オブジェクトで描画し、削除フォームを添える。
+    properties_list = property_rows()
     delete_forms = {}
     for property_obj in properties_list:
         instance = DeletePropertyForm()
@@ -205,14 +347,14 @@ def properties():
 def tenants():
     """入居者の物件別フィルタ・一覧・編集を 1 画面で提供する。"""
     form = TenantForm()
-    properties = Property.query.order_by(Property.name).all()
-    property_choices = [(prop.id, prop.name) for prop in properties]
-    form.property_id.choices = property_choices
+    # 選択肢は物件テーブルが変更されるまでワーカー内のキャッシュを使い回す。
+    choices = property_choices()
+    form.property_id.choices = list(choices)
     # 物件が無い場合は早期に利用者へ案内する。
-    if not properties:
+    if not choices:
         flash("先に物件を登録してください。", "warning")
 
-    property_ids = [choice[0] for choice in property_choices]
+    property_ids = [choice[0] for choice in choices]
     selected_property_id = form.property_id.data if form.property_id.data in property_ids else None
     if selected_property_id is None:
         # URL クエリから選択物件を決め、なければ先頭をフォールバック。
@@ -278,15 +420,8 @@ def tenants():
     if request.method == "GET" and selected_property_id is not None:
         form.property_id.data = selected_property_id
 
-    # テーブルは property -> tenant の順で並べる。joinedload で N+1 を防ぐ。
-    tenants_query = (
-        Tenant.query.options(joinedload(Tenant.property))
-        .outerjoin(Property)
-        .order_by(Property.name.asc(), Tenant.unit_number.asc(), Tenant.name.asc())
-    )
-    if selected_property_id is not None:
-        tenants_query = tenants_query.filter(Tenant.property_id == selected_property_id)
-    tenants_list = tenants_query.all()
+    # テーブルは property -> tenant の順で並べる。物件名は結合して同じ行で取得する。
+    tenants_list = tenant_rows(selected_property_id)
     delete_forms = {}
     for tenant in tenants_list:
         delete_instance = DeleteTenantForm()
@@ -302,15 +437,58 @@ def tenants():
     )
 
 
+@core_bp.route("/tenants/duplicates")
+@login_required
+def tenant_duplicates():
+    """同一人物と思われる入居者をグループごとに並べ、残す入居者を選んで統合する画面。"""
+    groups = find_duplicate_groups()
+    shown = groups[:MAX_DUPLICATE_GROUPS]
+    tenant_ids = [tenant_id for group in shown for tenant_id in group.tenant_ids]
+    tenants_by_id = {tenant.id: tenant for tenant in tenant_rows(tenant_ids=tenant_ids)} if tenant_ids else {}
+    lease_counts = {}
+    if tenant_ids:
+        lease_counts = dict(
+            db.session.execute(
+                db.select(Lease.tenant_id, func.count()).where(Lease.tenant_id.in_(tenant_ids)).group_by(Lease.tenant_id),
+            ).all(),
+        )
+    return render_template(
+        "core/tenant_duplicates.html",
+        groups=shown,
+        total_groups=len(groups),
+        tenants_by_id=tenants_by_id,
+        lease_counts=lease_counts,
+        reason_labels=REASON_LABELS,
+        form=MergeTenantsForm(),
+    )
+
+
+@core_bp.route("/tenants/duplicates/merge", methods=["POST"])
+@login_required
+def merge_tenant_duplicates():
+    form = MergeTenantsForm()
+    if not form.validate_on_submit():
+        flash("残す入居者を選択してください。", "danger")
+        return redirect(url_for("core.tenant_duplicates"))
+    duplicate_ids = [tenant_id for tenant_id in form.duplicate_ids.data if tenant_id != form.target_id.data]
+    if not duplicate_ids:
+        flash("統合する入居者を選択してください。", "warning")
+        return redirect(url_for("core.tenant_duplicates"))
+    try:
+        moved = merge_tenants(form.target_id.data, duplicate_ids)
+    except LookupError:
+        abort(404)
+    flash(f"入居者 {len(duplicate_ids)} 件を統合し、契約 {moved} 件を付け替えました。", "success")
+    return redirect(url_for("core.tenant_duplicates"))
+
+
 @core_bp.route("/leases", methods=["GET", "POST"])
 @login_required
 def leases():
     """契約の一覧＋フォーム。物件/部屋に応じて入居者候補を自動選択する。"""
     form = LeaseForm()
-    properties = Property.query.order_by(Property.name).all()
-    tenants = Tenant.query.order_by(Tenant.name).all()
-    # SelectField の選択肢は都度再構築し、未登録時は警告を出す。
-    properties_choices = [(prop.id, prop.name) for prop in properties]
+    # 物件・号室の選択肢は参照データキャッシュから組み立て、入居者一覧は描画時だけ読む。
+    properties_choices = list(property_choices())
     form.property_id.choices = properties_choices
 
     if request.method == "GET":
@@ -344,19 +522,12 @@ def leases():
     if selected_property_id is not None:
         form.property_id.data = selected_property_id
 
-    # 物件ごとの入居者一覧から号室の選択肢を構築する。
-    tenants_by_property: dict[int, list[Tenant]] = {}
-    for tenant in tenants:
-        if tenant.property_id is None or not tenant.unit_number:
-            continue
-        tenants_by_property.setdefault(tenant.property_id, []).append(tenant)
-
+    # 号室の選択肢は unit テーブルの号室から構築する。
     def build_unit_choices(property_id: int | None) -> list[tuple[str, str]]:
         base_choice = [("", "号室を選択")]
         if property_id is None:
             return base_choice
-        units = sorted({tenant.unit_number for tenant in tenants_by_property.get(property_id, []) if tenant.unit_number})
-        return base_choice + [(unit, unit) for unit in units]
+        return base_choice + [(unit, unit) for unit in units_by_property().get(property_id, ())]
 
     unit_choices = build_unit_choices(selected_property_id)
     form.unit_number.choices = unit_choices
@@ -384,7 +555,7 @@ def leases():
         form.submit.label.text = "契約を保存"
         form.lease_id.data = ""
 
-    if request.method == "POST" and (not properties_choices or not tenants):
+    if request.method == "POST" and (not properties_choices or not tenant_count()):
         flash("契約を作成する前に物件と入居者を登録してください。", "warning")
         return redirect(url_for("core.leases"))
 
@@ -401,10 +572,12 @@ def leases():
         rent_value = Decimal(str(form.rent.data or 0)) * Decimal("10000")
 
         if lease_id_value:
-            lease = Lease.query.get(int(lease_id_value))
+            lease = db.session.get(Lease, int(lease_id_value))
             if lease is None:
                 flash("対象の契約が見つかりません。", "danger")
                 return redirect(url_for("core.leases"))
+            if _reject_overlap(property_id, unit_number, form.start_date.data, form.end_date.data, exclude_id=lease.id):
+                return redirect(url_for("core.leases", property_id=property_id, lease_id=lease.id))
             lease.property_id = property_id
             lease.unit_number = unit_number
             lease.tenant_id = tenant_id
@@ -416,98 +589,29 @@ def leases():
             flash("契約情報を更新しました。", "success")
             return redirect(url_for("core.leases", property_id=property_id))
 
-        existing_lease = None
-        if unit_number is not None:
-            existing_lease = Lease.query.filter_by(
-                property_id=property_id,
-                unit_number=unit_number,
-            ).first()
-
-        if existing_lease:
-            existing_lease.tenant_id = tenant_id
-            existing_lease.rent = rent_value
-            existing_lease.start_date = form.start_date.data
-            existing_lease.end_date = form.end_date.data
-            existing_lease.status = form.status.data
-            db.session.commit()
-            flash("契約情報を更新しました。", "success")
-        else:
-            new_lease = Lease(
-                property_id=property_id,
-                tenant_id=tenant_id,
-                rent=rent_value,
-                unit_number=unit_number,
-                start_date=form.start_date.data,
-                end_date=form.end_date.data,
-                status=form.status.data,
-            )
-            db.session.add(new_lease)
-            db.session.commit()
-            flash("契約を登録しました。", "success")
-        return redirect(url_for("core.leases", property_id=property_id))
-
-    lease_query = (
-        Lease.query.options(
-            joinedload(Lease.property),
-            joinedload(Lease.tenant),
-        )
-        .join(Property)
-        .order_by(Property.name.asc(), Lease.unit_number.asc(), Lease.start_date.desc())
-    )
-
-    # 一覧は選択された物件で絞り込み可能。
-    if selected_property_id is not None:
-        lease_query = lease_query.filter(Lease.property_id == selected_property_id)
-
-    leases_list = lease_query.all()
-
-    occupied_keys = {
-        (lease.property_id, lease.unit_number)
-        for lease in leases_list
-        if lease.property_id is not None and lease.unit_number
-    }
-
-    vacancy_rows: list[SimpleNamespace] = []
-    for tenant in tenants:
-        if tenant.property_id is None or not tenant.unit_number:
-            continue
-        if tenant.name.strip() != "空室":
-            continue
-        if selected_property_id is not None and tenant.property_id != selected_property_id:
-            continue
-        key = (tenant.property_id, tenant.unit_number)
-        if key in occupied_keys:
-            continue
-        vacancy_rows.append(
-            SimpleNamespace(
-                id=None,
-                property=tenant.property,
-                property_id=tenant.property_id,
-                unit_number=tenant.unit_number,
-                tenant=tenant,
-                rent=None,
-                status="空室",
-                start_date=None,
-                end_date=None,
-                is_vacancy=True,
-            ),
+        # 同じ部屋の既存契約は上書きせず、期間が重なる場合は登録しない。
+        if _reject_overlap(property_id, unit_number, form.start_date.data, form.end_date.data):
+            return redirect(url_for("core.leases", property_id=property_id))
+        new_lease = Lease(
+            property_id=property_id,
+            tenant_id=tenant_id,
+            rent=rent_value,
+            unit_number=unit_number,
+            start_date=form.start_date.data,
+            end_date=form.end_date.data,
+            status=form.status.data,
         )
+        db.session.add(new_lease)
+        db.session.commit()
+        flash("契約を登録しました。", "success")
+        return redirect(url_for("core.leases", property_id=property_id))
 
-    if vacancy_rows:
-        date_min_ordinal = date.min.toordinal()
-
-        def lease_sort_key(lease: Lease | SimpleNamespace) -> tuple[str, str, int, int]:
-            property_name = lease.property.name if getattr(lease, "property", None) else ""
-            unit_value = lease.unit_number or ""
-            is_vacancy = 1 if getattr(lease, "is_vacancy", False) else 0
-            start_date = getattr(lease, "start_date", None)
-            if isinstance(start_date, date):
-                start_ordinal = -start_date.toordinal()
-            else:
-                start_ordinal = -date_min_ordinal
-            return (property_name, unit_value, is_vacancy, start_ordinal)
-
-        leases_list = sorted([*leases_list, *vacancy_rows], key=lease_sort_key)
+    # 一覧は選択された物件で絞り込み可能。ORM オブジェクトは生成せず列だけを読む。
+    # アーカイブ済みの契約は ?archived=1 のときだけ併せて表示する。
+    # 空室（契約の無い号室）は unit テーブルから同じ文で併せて読む。
+    include_archived = request.args.get("archived") == "1"
+    leases_list = lease_rows(selected_property_id, include_archived=include_archived, include_vacancies=True)
+    tenants = tenant_rows(order_by_property=False)
 
     # 前面の JavaScript で物件 -> (入居者, 号室) を引き当てるための辞書。
     tenants_data: dict[str, list[dict[str, str]]] = {}
@@ -536,6 +640,65 @@ def leases():
         status_labels=STATUS_LABELS,
         selected_property_id=selected_property_id,
         editing_lease=editing_lease,
+        include_archived=include_archived,
+    )
+
+
+def _expiring_days_from_request() -> int:
+    days = request.args.get("days", current_app.config["EXPIRING_LEASE_DAYS"], type=int)
+    if not 1 <= days <= MAX_EXPIRING_DAYS:
+        raise ValueError(f"days は 1〜{MAX_EXPIRING_DAYS} の範囲で指定してください。")
+    return days
+
+
+@core_bp.route("/leases/expiring")
+@login_required
+def leases_expiring():
+    """満了が近い契約を終了日順に並べた更新対応キュー。"""
+    try:
+        days = _expiring_days_from_request()
+    except ValueError as exc:
+        flash(str(exc), "warning")
+        days = current_app.config["EXPIRING_LEASE_DAYS"]
+    today = date.today()
+    return render_template(
+        "core/leases_expiring.html",
+        leases=expiring_leases(days, today),
+        days=days,
+        today=today,
+        status_labels=STATUS_LABELS,
+    )
+
+
+@core_bp.route("/api/leases/expiring")
+@login_required
+def leases_expiring_api():
+    try:
+        days = _expiring_days_from_request()
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    today = date.today()
+    leases_list = expiring_leases(days, today)
+    return jsonify(
+        days=days,
+        today=today.isoformat(),
+        count=len(leases_list),
+        leases=[
+            {
+                "id": lease.id,
+                "property_id": lease.property_id,
+                "property_name": lease.property.name,
+                "unit_number": lease.unit_number,
+                "tenant_id": lease.tenant_id,
+                "tenant_name": lease.tenant.name,
+                "rent": float(lease.rent),
+                "status": lease.status,
+                "start_date": lease.start_date.isoformat(),
+                "end_date": lease.end_date.isoformat(),
+                "days_left": (lease.end_date - today).days,
+            }
+            for lease in leases_list
+        ],
     )
 
 
@@ -551,9 +714,8 @@ def delete_tenant(tenant_id: int):
     if int(form.tenant_id.data) != tenant_id:
         flash("削除対象の情報が一致しません。", "danger")
         return redirect(url_for("core.leases"))
-    tenant = Tenant.query.get_or_404(tenant_id)
-    db.session.delete(tenant)
-    db.session.commit()
+    if not delete_with_cascade(Tenant, tenant_id):
+        abort(404)
     flash("入居者と関連契約を削除しました。", "info")
     next_url = form.next_url.data or request.form.get("next_url")
     if next_url:
@@ -0,0 +1 @@
+"""稼働分析などの集計レポートを提供するブループリントのパッケージ初期化。"""
@@ -0,0 +1,215 @@
+"""物件×号室×月の稼働分析を JSON / CSV で返すレポート系ルート。"""
+
+from __future__ import annotations
+
+import csv
+import io
+from datetime import date
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request, send_file, stream_with_context, url_for
+from flask_login import login_required
+
+from ...analytics import OccupancyMatrix, compute_occupancy, load_lease_intervals, load_units
+from ...dates import add_months, parse_month
+from ...extensions import db
+from ...models import LeaseStatus, Property
+from ...partitioning import current_organization
+from ...jobs import JobLimitReached
+from ...rent_roll import RentRollJob, get_job, rent_roll_directory, start_rent_roll_job
+
+reports_bp = Blueprint("reports", __name__, url_prefix="/reports")
+
+MAX_MONTHS = 120
+
+
+class ReportParameterError(ValueError):
+    """クエリパラメータが不正な場合に送出する。"""
+
+
+def _occupancy_from_request() -> OccupancyMatrix:
+    months = request.args.get("months", 12, type=int)
+    if not 1 <= months <= MAX_MONTHS:
+        raise ReportParameterError(f"months は 1〜{MAX_MONTHS} の範囲で指定してください。")
+    try:
+        first_month = parse_month(request.args.get("from"))
+    except ValueError as exc:
+        raise ReportParameterError(str(exc)) from None
+    if first_month is None:
+        # 既定は当月を含む直近 months か月。
+        first_month = add_months(date.today().replace(day=1), -(months - 1))
+
+    statuses = request.args.getlist("status")
+    unknown = set(statuses) - set(LeaseStatus.ALL)
+    if unknown:
+        raise ReportParameterError(f"未知のステータスです: {', '.join(sorted(unknown))}")
+
+    property_id = request.args.get("property_id", type=int)
+    intervals = load_lease_intervals(property_id=property_id, statuses=statuses or None, since=first_month)
+    return compute_occupancy(intervals, first_month, months, units=load_units(property_id))
+
+
+def _property_names(property_ids: list[int]) -> dict[int, str]:
+    if not property_ids:
+        return {}
+    rows = db.session.execute(db.select(Property.id, Property.name).where(Property.id.in_(property_ids)))
+    return dict(rows.all())
+
+
+@reports_bp.errorhandler(ReportParameterError)
+def handle_parameter_error(exc: ReportParameterError):
+    return jsonify(error=str(exc)), 400
+
+
+@reports_bp.errorhandler(JobLimitReached)
+def handle_job_limit(exc: JobLimitReached):
+    return jsonify(error=str(exc)), 429, {"Retry-After": "30"}
+
+
+@reports_bp.route("/occupancy")
+@login_required
+def occupancy():
+    """物件ごとの稼働率・賃料と号室ごとの稼働フラグを JSON で返す。"""
+    matrix = _occupancy_from_request()
+    names = _property_names(matrix.property_ids)
+
+    units_by_property: dict[int, list[dict]] = {}
+    for row, (property_id, unit_number) in enumerate(matrix.unit_keys):
+        units_by_property.setdefault(property_id, []).append(
+            {
+                "unit_number": unit_number,
+                "occupied": matrix.occupied[row].astype(int).tolist(),
+                "revenue": matrix.unit_revenue[row].tolist(),
+            },
+        )
+
+    rates = matrix.occupancy_rate
+    properties = []
+    for row, property_id in enumerate(matrix.property_ids):
+        properties.append(
+            {
+                "id": property_id,
+                "name": names.get(property_id, ""),
+                "unit_count": int(matrix.unit_counts[row]),
+                "occupied_units": matrix.occupied_units[row].tolist(),
+                "occupancy_rate": [round(value, 4) for value in rates[row].tolist()],
+                "revenue": matrix.property_revenue[row].tolist(),
+                "units": units_by_property.get(property_id, []),
+            },
+        )
+    return jsonify(months=[month.strftime("%Y-%m") for month in matrix.months], properties=properties)
+
+
+@reports_bp.route("/occupancy.csv")
+@login_required
+def occupancy_csv():
+    """稼働行列を縦持ちの CSV としてストリーミングで返す。level=property で物件単位。"""
+    matrix = _occupancy_from_request()
+    names = _property_names(matrix.property_ids)
+    month_labels = [month.strftime("%Y-%m") for month in matrix.months]
+    by_property = request.args.get("level") == "property"
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush() -> str:
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return value
+
+        if by_property:
+            writer.writerow(["property_id", "property_name", "month", "unit_count", "occupied_units", "occupancy_rate", "revenue"])
+            # 行が 1 件も無くてもヘッダー行だけは返す。
+            yield flush()
+            rates = matrix.occupancy_rate
+            for row, property_id in enumerate(matrix.property_ids):
+                for col, month in enumerate(month_labels):
+                    writer.writerow(
+                        [
+                            property_id,
+                            names.get(property_id, ""),
+                            month,
+                            int(matrix.unit_counts[row]),
+                            int(matrix.occupied_units[row, col]),
+                            f"{rates[row, col]:.4f}",
+                            f"{matrix.property_revenue[row, col]:.2f}",
+                        ],
+                    )
+                yield flush()
+            return
+
+        writer.writerow(["property_id", "property_name", "unit_number", "month", "occupied", "revenue"])
+        yield flush()
+        for row, (property_id, unit_number) in enumerate(matrix.unit_keys):
+            for col, month in enumerate(month_labels):
+                writer.writerow(
+                    [
+                        property_id,
+                        names.get(property_id, ""),
+                        unit_number,
+                        month,
+                        int(matrix.occupied[row, col]),
+                        f"{matrix.unit_revenue[row, col]:.2f}",
+                    ],
+                )
+            yield flush()
+
+    filename = f"occupancy_{month_labels[0]}_{len(month_labels)}m.csv"
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@reports_bp.route("/rent-roll", methods=["POST"])
+@login_required
+def rent_roll_start():
+    """指定月のレントロール生成ジョブを開始し、進捗確認用 URL を返す。"""
+    payload = request.get_json(silent=True) or request.form
+    try:
+        month = parse_month(payload.get("month"))
+    except ValueError as exc:
+        raise ReportParameterError(str(exc)) from None
+    if month is None:
+        raise ReportParameterError("month を YYYY-MM 形式で指定してください。")
+
+    engine = current_app.extensions["partitions"].current_engine()
+    job = start_rent_roll_job(current_app._get_current_object(), engine, month, organization=current_organization())
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers["Location"] = url_for("reports.rent_roll_status", job_id=job.id)
+    return response
+
+
+def _own_job(job_id: str) -> RentRollJob:
+    """自分の組織で起動したジョブだけを返す。他の組織のジョブは存在しないものとして 404。"""
+    job = get_job(rent_roll_directory(current_app), job_id)
+    if job is None or job.organization != current_organization():
+        abort(404)
+    return job
+
+
+@reports_bp.route("/rent-roll/<job_id>")
+@login_required
+def rent_roll_status(job_id: str):
+    job = _own_job(job_id)
+    data = job.to_dict()
+    if job.state == "finished":
+        data["download_url"] = url_for("reports.rent_roll_download", job_id=job.id)
+    return jsonify(data)
+
+
+@reports_bp.route("/rent-roll/<job_id>/download")
+@login_required
+def rent_roll_download(job_id: str):
+    job = _own_job(job_id)
+    if job.state != "finished":
+        abort(409)
+    return send_file(
+        job.path,
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name=f"rent_roll_{job.month:%Y-%m}.zip",
+    )
@@ -0,0 +1,237 @@
+"""ワーカー内 LRU と、同一ホストのワーカー間で共有する SQLite の 2 段キャッシュ。
+
+各エントリは依存先（組織ごとのテーブル名など）の世代番号を一緒に保存する。
+コミットしたワーカーが共有ストアの世代番号を進めると、他のワーカーは
+CACHE_GENERATION_POLL 秒以内に新しい世代番号を読み直し、古い世代で作られた
+エントリを使わなくなる。共有ストアを設定しない場合は LRU とプロセス内の
+世代番号だけで動く（テスト設定・単一プロセス向け）。
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, TypeVar
+
+from flask import Flask
+
+from .partitioning import current_organization, database_identity
+
+T = TypeVar("T")
+Generations = tuple[int, ...]
+
+
+def dependency(table: str, organization: Optional[str] = None) -> str:
+    """DB・組織ごとのテーブルを表す依存名。organization 省略時は現在の組織。
+
+    共有ストアは同じ instance パスの別 DB（負荷試験用の一時 DB など）とも共有され得るので、
+    世代番号が混ざらないよう DB の識別子を先頭に付ける。
+    """
+    organization = organization or current_organization()
+    return f"{database_identity(organization)}:{organization or '-'}:{table}"
+
+
+class LRUTier:
+    """pickle 後のバイト数の合計で上限を管理する LRU。"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[int, Generations, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[tuple[Generations, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key: str, generations: Generations, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[0]
+            self._entries[key] = (size, generations, value)
+            self.size += size
+            while self.size > self.max_bytes:
+                _key, (evicted_size, _generations, _value) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class SharedTier:
+    """同一ホストのワーカーが共有する SQLite ファイル（エントリと世代番号）。"""
+
+    def __init__(self, path: Path, max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entry "
+                "(key TEXT PRIMARY KEY, generations TEXT NOT NULL, value BLOB NOT NULL, stored_at REAL NOT NULL)",
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_generation (name TEXT PRIMARY KEY, generation INTEGER NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            # fork 前の接続は子プロセスで使えないため、プロセスごとに開き直す。
+            self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[tuple[Generations, bytes]]:
+        with self._lock:
+            row = self._connection().execute("SELECT generations, value FROM cache_entry WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return tuple(int(part) for part in row[0].split(",") if part), row[1]
+
+    def set(self, key: str, generations: Generations, blob: bytes) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entry (key, generations, value, stored_at) VALUES (?, ?, ?, ?)",
+                (key, ",".join(map(str, generations)), blob, time.time()),
+            )
+            if self.max_entries and conn.execute("SELECT count(*) FROM cache_entry").fetchone()[0] > self.max_entries:
+                conn.execute(
+                    "DELETE FROM cache_entry WHERE key IN "
+                    "(SELECT key FROM cache_entry ORDER BY stored_at LIMIT max(1, ? / 10))",
+                    (self.max_entries,),
+                )
+
+    def generations(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._connection().execute("SELECT name, generation FROM cache_generation").fetchall())
+
+    def bump(self, names: Iterable[str]) -> None:
+        with self._lock:
+            self._connection().executemany(
+                "INSERT INTO cache_generation (name, generation) VALUES (?, 1) "
+                "ON CONFLICT (name) DO UPDATE SET generation = generation + 1",
+                [(name,) for name in names],
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM cache_entry")
+
+
+class Cache:
+    """get_or_set で読み、invalidate で依存先の世代を進める 2 段キャッシュ。"""
+
+    def __init__(
+        self,
+        memory_bytes: int,
+        shared: Optional[SharedTier] = None,
+        poll_interval: float = 1.0,
+        metrics=None,
+    ) -> None:
+        self.memory = LRUTier(memory_bytes)
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self.metrics = metrics
+        self._generations: dict[str, int] = {}
+        self._generations_read_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _current_generations(self) -> dict[str, int]:
+        if self.shared is None:
+            return self._generations
+        now = time.monotonic()
+        if now - self._generations_read_at >= self.poll_interval:
+            # 共有ストアの世代番号は一定間隔でまとめて読み直す（無効化の遅延の上限）。
+            generations = self.shared.generations()
+            with self._lock:
+                self._generations, self._generations_read_at = generations, now
+        return self._generations
+
+    def _count(self, name: str, result: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc("cache_requests_total", {"name": name, "result": result})
+
+    def _stamp(self, depends_on: tuple[str, ...]) -> Generations:
+        generations = self._current_generations()
+        return tuple(generations.get(name, 0) for name in depends_on)
+
+    def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], T],
+        depends_on: tuple[str, ...] = (),
+        name: str = "default",
+    ) -> T:
+        """key の値を返す。無いか依存先の世代が進んでいれば loader で作り直す。name はメトリクス用の分類。"""
+        stamp = self._stamp(depends_on)
+        entry = self.memory.get(key)
+        if entry is not None and entry[0] == stamp:
+            self._count(name, "memory")
+            return entry[1]
+        if self.shared is not None:
+            stored = self.shared.get(key)
+            if stored is not None and stored[0] == stamp:
+                value = pickle.loads(stored[1])
+                self.memory.set(key, stamp, value, len(stored[1]))
+                self._count(name, "shared")
+                return value
+        self._count(name, "miss")
+        value = loader()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.memory.set(key, stamp, value, len(blob))
+        if self.shared is not None:
+            self.shared.set(key, stamp, blob)
+        return value
+
+    def invalidate(self, names: Iterable[str]) -> None:
+        """依存先の世代を進める。このワーカーには即時、他のワーカーには次回の読み直しで伝わる。"""
+        names = sorted(set(names))
+        if not names:
+            return
+        if self.shared is not None:
+            self.shared.bump(names)
+            with self._lock:
+                self._generations_read_at = float("-inf")
+            return
+        with self._lock:
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+
+def init_cache(app: Flask) -> Cache:
+    """設定に従ってキャッシュを組み立て、app.extensions["cache"] に登録する。"""
+    shared = None
+    if app.config["CACHE_SHARED_ENABLED"]:
+        path = Path(app.config.get("CACHE_SHARED_PATH") or Path(app.instance_path) / "cache.sqlite")
+        shared = SharedTier(path, app.config["CACHE_SHARED_MAX_ENTRIES"])
+    cache = Cache(
+        app.config["CACHE_MEMORY_BYTES"],
+        shared,
+        app.config["CACHE_GENERATION_POLL"],
+        metrics=app.extensions.get("metrics"),
+    )
+    app.extensions["cache"] = cache
+    return cache
@@ -0,0 +1,147 @@
+"""HTML/JSON などのレスポンスを gzip / brotli で圧縮する after_request フック。"""
+
+from __future__ import annotations
+
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import Flask, Response, current_app, request
+
+try:  # brotli は任意依存。未インストールなら gzip のみで動作する。
+    import brotli
+except ImportError:  # pragma: no cover - 環境依存
+    brotli = None
+
+# 圧縮しても意味がない / 壊してはいけないステータスコード。
+SKIP_STATUS_CODES = {204, 206, 304}
+
+
+def init_compression(app: Flask) -> None:
+    """設定に従って圧縮フックをアプリへ登録する。"""
+    app.config.setdefault("COMPRESS_ENABLED", True)
+    app.config.setdefault("COMPRESS_ALGORITHMS", ("br", "gzip"))
+    app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+    app.config.setdefault("COMPRESS_LEVEL", 6)
+    app.config.setdefault("COMPRESS_BROTLI_LEVEL", 4)
+    app.config.setdefault("COMPRESS_MIMETYPES", ("text/html", "application/json"))
+    if not app.config["COMPRESS_ENABLED"]:
+        return
+    app.after_request(compress_response)
+
+
+def available_encodings() -> list[str]:
+    """この環境で利用可能なエンコーディングを優先度順に返す。"""
+    encodings = []
+    for encoding in current_app.config["COMPRESS_ALGORITHMS"]:
+        if encoding == "br" and brotli is None:
+            continue
+        if encoding in ("br", "gzip"):
+            encodings.append(encoding)
+    return encodings
+
+
+def choose_encoding() -> Optional[str]:
+    """Accept-Encoding とサーバー側の優先度から使用するエンコーディングを決める。"""
+    accepted = request.accept_encodings
+    for encoding in available_encodings():
+        if accepted[encoding] > 0:
+            return encoding
+    return None
+
+
+def _should_compress(response: Response) -> bool:
+    if request.method == "HEAD":
+        return False
+    if response.status_code < 200 or response.status_code in SKIP_STATUS_CODES:
+        return False
+    # 既に圧縮済み・部分レスポンス・変換禁止のものは触らない。
+    if "Content-Encoding" in response.headers or "Content-Range" in response.headers:
+        return False
+    if response.cache_control.no_transform:
+        return False
+    if response.mimetype not in current_app.config["COMPRESS_MIMETYPES"]:
+        return False
+    if response.content_length is not None and response.content_length < current_app.config["COMPRESS_MIN_SIZE"]:
+        return False
+    return True
+
+
+class _Compressor:
+    """gzip / brotli の差異を吸収するストリーミング圧縮器。"""
+
+    def __init__(self, encoding: str, level: int, brotli_level: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=brotli_level)
+        else:
+            # wbits=31 で gzip ヘッダー付きの deflate ストリームになる。
+            self._impl = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """チャンクを圧縮し、クライアントへ即時に届くようフラッシュする。"""
+        if self.encoding == "br":
+            return self._impl.process(chunk) + self._impl.flush()
+        return self._impl.compress(chunk) + self._impl.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._impl.finish()
+        return self._impl.flush(zlib.Z_FINISH)
+
+
+def compress_bytes(data: bytes, encoding: str, level: int, brotli_level: int) -> bytes:
+    """一括で圧縮する（ストリームでないレスポンス用）。"""
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_stream(chunks: Iterable, compressor: _Compressor, charset: str) -> Iterator[bytes]:
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(charset)
+            if not chunk:
+                continue
+            yield compressor.compress(chunk)
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def compress_response(response: Response) -> Response:
+    """条件を満たすレスポンスを圧縮し、関連ヘッダーを整える。"""
+    if not _should_compress(response):
+        return response
+    encoding = choose_encoding()
+    if encoding is None:
+        response.vary.add("Accept-Encoding")
+        return response
+
+    level = current_app.config["COMPRESS_LEVEL"]
+    brotli_level = current_app.config["COMPRESS_BROTLI_LEVEL"]
+
+    if response.is_streamed or response.direct_passthrough:
+        # ジェネレータやファイルはバッファせずチャンク単位で圧縮して流す。
+        compressor = _Compressor(encoding, level, brotli_level)
+        response.response = _compress_stream(response.response, compressor, "utf-8")
+        response.direct_passthrough = False
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config["COMPRESS_MIN_SIZE"]:
+            return response
+        response.set_data(compress_bytes(data, encoding, level, brotli_level))
+
+    response.headers["Content-Encoding"] = encoding
+    # バイト範囲は元の表現を前提にしており、圧縮後の本文とは位置が合わない。
+    response.headers.pop("Accept-Ranges", None)
+    response.vary.add("Accept-Encoding")
+    # 表現が変わるので強い ETag は弱い ETag に落とす（If-None-Match は弱比較）。
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,27 @@
+"""月単位の期間計算と "YYYY-MM" パラメータの解釈をまとめたヘルパー。"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+
+def parse_month(value: str | None) -> date | None:
+    """"YYYY-MM" 形式の文字列を月初日に変換する。未指定なら None。"""
+    if not value:
+        return None
+    try:
+        year_text, month_text = value.split("-", 1)
+        return date(int(year_text), int(month_text), 1)
+    except ValueError:
+        raise ValueError(f"month は YYYY-MM 形式で指定してください: {value}") from None
+
+
+def add_months(month_start: date, months: int) -> date:
+    """月初日に months か月を加算した月初日を返す（負数も可）。"""
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_end(month_start: date) -> date:
+    """月初日からその月の末日を求める。"""
+    return add_months(month_start, 1) - timedelta(days=1)
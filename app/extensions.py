@@ -1,9 +1,25 @@
 """Flask拡張のインスタンスを集中管理するモジュール。"""
 
+import sqlite3
+
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .partitioning import PartitionedSession
 
-db = SQLAlchemy()
+# 組織ごとのパーティションへ振り分けるため、セッションクラスを差し替える。
+db = SQLAlchemy(session_options={"class_": PartitionedSession})
 migrate = Migrate()
 login_manager = LoginManager()
+
+
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, _connection_record) -> None:
+    """SQLite は接続ごとに外部キー制約（ON DELETE CASCADE を含む）を有効にする必要がある。"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
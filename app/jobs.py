@@ -0,0 +1,104 @@
+"""Web から起動するバックグラウンドジョブの状態を、ワーカー間で共有するファイルに置く。
+
+prefork のどのワーカーが進捗確認を受けても同じ状態を返せるよう、ジョブごとに
+<id>.job.json を出力先ディレクトリへ書き出す。新しいジョブの登録と同時実行数の判定は
+ディレクトリの .jobs.lock を flock で取って直列化する。ジョブを動かしていたプロセスが
+終了していれば、その時点で失敗として扱う。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:  # fcntl は POSIX のみ。無い環境では同じプロセス内の排他だけを取る。
+    import fcntl
+except ImportError:  # pragma: no cover - 環境依存
+    fcntl = None
+
+ACTIVE_STATES = ("queued", "running")
+LOCK_FILE = ".jobs.lock"
+_SUFFIX = ".job.json"
+_thread_lock = threading.Lock()
+
+
+class JobLimitReached(RuntimeError):
+    """同時に実行できるジョブ数の上限に達している場合に送出する。"""
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """ジョブ 1 件を JSON 1 ファイルとして保存する。値は JSON にできる dict で受け渡す。"""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}{_SUFFIX}"
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """登録・上限判定・削除の間は、ほかのワーカーの同じ操作を待たせる。"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with _thread_lock, open(self.directory / LOCK_FILE, "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def save(self, record: dict) -> None:
+        """一時ファイルに書いてから置き換え、読み手に書きかけの JSON を見せない。"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(record["id"])
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        temporary.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+        os.replace(temporary, path)
+
+    def load(self, job_id: str) -> Optional[dict]:
+        if not job_id.isalnum():
+            return None
+        try:
+            record = json.loads(self._path(job_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        if record["state"] in ACTIVE_STATES and not _process_alive(record["pid"]):
+            # 実行中のままワーカーが落ちた（再起動・入れ替えを含む）ジョブは二度と進まない。
+            record.update(state="failed", error="ジョブを実行していたプロセスが終了しました。")
+            record["finished_at"] = record["finished_at"] or datetime.now().isoformat(timespec="seconds")
+            self.save(record)
+        return record
+
+    def records(self) -> list[dict]:
+        records = (self.load(path.name[: -len(_SUFFIX)]) for path in self.directory.glob(f"*{_SUFFIX}"))
+        return [record for record in records if record is not None]
+
+    def active(self) -> list[dict]:
+        return [record for record in self.records() if record["state"] in ACTIVE_STATES]
+
+    def prune(self, ttl: float) -> list[dict]:
+        """終了から ttl 秒を過ぎたジョブを消し、消したジョブの内容を返す。"""
+        cutoff = (datetime.now() - timedelta(seconds=ttl)).isoformat(timespec="seconds")
+        removed = []
+        with self.locked():
+            for record in self.records():
+                if record["finished_at"] is not None and record["finished_at"] < cutoff:
+                    self._path(record["id"]).unlink(missing_ok=True)
+                    removed.append(record)
+        return removed
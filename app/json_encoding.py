@@ -0,0 +1,33 @@
+"""API レスポンス用の高速 JSON エンコード。orjson があれば使い、なければ標準の json に戻す。"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from flask import Response
+
+try:  # orjson は任意依存。未インストールなら標準ライブラリで同じ形式を出力する。
+    import orjson
+except ImportError:  # pragma: no cover - 環境依存
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    return Response(dumps(payload), status=status, mimetype="application/json")
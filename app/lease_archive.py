@@ -0,0 +1,70 @@
+"""解約から時間の経った契約を lease_archive へ移し、lease テーブルを現役の契約だけに保つ。
+
+移動は (status, end_date) 索引で対象を chunk_size 件ずつ選び、INSERT ... SELECT と
+DELETE を同じトランザクションで実行してチャンクごとにコミットする。一覧画面は既定で
+lease だけを読み、集計やレポートは対象期間に掛かるアーカイブ分だけを
+ix_lease_archive_end_date の範囲検索で足し合わせる。
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import ColumnElement, delete, insert, select
+
+from .audit import ACTION_ARCHIVE, record_bulk_changes
+from .extensions import db
+from .models import Lease, LeaseArchive, LeaseStatus
+
+DEFAULT_CHUNK_SIZE = 1000
+# lease と lease_archive で同じ意味を持つ列（id 以外）。
+COPIED_COLUMNS = (
+    "property_id",
+    "tenant_id",
+    "rent",
+    "unit_number",
+    "unit_id",
+    "start_date",
+    "end_date",
+    "status",
+    "created_at",
+    "updated_at",
+)
+
+
+def archive_leases(cutoff: date, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """終了日が cutoff より前の解約済み契約をアーカイブへ移し、移した件数を返す。"""
+    moved = 0
+    while True:
+        ids = db.session.scalars(
+            select(Lease.id)
+            .where(Lease.status == LeaseStatus.TERMINATED, Lease.end_date < cutoff)
+            .order_by(Lease.end_date, Lease.id)
+            .limit(chunk_size),
+        ).all()
+        if not ids:
+            return moved
+        db.session.execute(
+            insert(LeaseArchive).from_select(
+                ["lease_id", *COPIED_COLUMNS],
+                select(Lease.id, *(getattr(Lease, column) for column in COPIED_COLUMNS)).where(Lease.id.in_(ids)),
+            ),
+        )
+        db.session.execute(delete(Lease).where(Lease.id.in_(ids)), execution_options={"synchronize_session": False})
+        record_bulk_changes(db.session, Lease, ids, ACTION_ARCHIVE, {"table": ("lease", "lease_archive")})
+        db.session.commit()
+        moved += len(ids)
+        if len(ids) < chunk_size:
+            return moved
+
+
+def archived_during(start: date, end: Optional[date] = None) -> ColumnElement[bool]:
+    """start〜end（両端を含む）に契約期間が掛かるアーカイブ行の条件。
+
+    アーカイブの終了日は必ず入っているので、終了日の範囲検索だけで候補を絞れる。
+    """
+    condition = LeaseArchive.end_date >= start
+    if end is not None:
+        condition &= LeaseArchive.start_date <= end
+    return condition
@@ -0,0 +1,99 @@
+"""満了が近い契約の抽出（更新対応キュー）と日次スナップショットを扱うモジュール。
+
+スナップショットは CLI とスケジューラだけが作り、作成時点の lease の版カウンタを一緒に保存する。
+ダッシュボードは版が進んでいない（その後に契約が変わっていない）スナップショットだけを読み、
+そうでなければ (status, end_date) 索引で数えた件数を使う。
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import Select, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from .extensions import db
+from .models import Lease, LeaseExpirySnapshot, LeaseStatus, TableVersion
+from .partitioning import use_organization
+
+# 解約済みは更新対応の対象外。(status, end_date) 索引の先頭列で絞り込める。
+EXPIRING_STATUSES = (LeaseStatus.ACTIVE, LeaseStatus.PENDING)
+
+
+def _expiring_filter(stmt: Select, days: int, today: date) -> Select:
+    return (
+        stmt.where(Lease.status.in_(EXPIRING_STATUSES))
+        .where(Lease.end_date >= today)
+        .where(Lease.end_date <= today + timedelta(days=days))
+    )
+
+
+def expiring_leases(days: int, today: Optional[date] = None, limit: Optional[int] = None) -> list[Lease]:
+    """今日から days 日以内に終了日を迎える契約を終了日の早い順に返す。"""
+    today = today or date.today()
+    stmt = _expiring_filter(
+        select(Lease).options(joinedload(Lease.property), joinedload(Lease.tenant)),
+        days,
+        today,
+    ).order_by(Lease.end_date, Lease.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return list(db.session.scalars(stmt))
+
+
+def count_expiring_leases(days: int, today: Optional[date] = None) -> int:
+    today = today or date.today()
+    return db.session.scalar(_expiring_filter(select(func.count(Lease.id)), days, today))
+
+
+def _lease_version() -> int:
+    return db.session.scalar(select(TableVersion.version).where(TableVersion.table_name == "lease")) or 0
+
+
+def refresh_expiry_snapshot(days: int, today: Optional[date] = None) -> LeaseExpirySnapshot:
+    """当日分のスナップショットを再計算して保存する。"""
+    today = today or date.today()
+    # 版は数える前に読む。数えている間に契約が変わっても、古い版として扱われるだけで済む。
+    lease_version = _lease_version()
+    count = count_expiring_leases(days, today)
+    snapshot = db.session.get(LeaseExpirySnapshot, (today, days))
+    if snapshot is None:
+        snapshot = LeaseExpirySnapshot(snapshot_date=today, horizon_days=days)
+        db.session.add(snapshot)
+    snapshot.expiring_count = count
+    snapshot.lease_version = lease_version
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # 別のプロセスが同時に作成した場合は、その行を今回の件数で上書きする。
+        db.session.rollback()
+        snapshot = db.session.get(LeaseExpirySnapshot, (today, days))
+        snapshot.expiring_count = count
+        snapshot.lease_version = lease_version
+        db.session.commit()
+    return snapshot
+
+
+def expiring_count(days: int, today: Optional[date] = None) -> int:
+    """ダッシュボード用の件数（書き込みはしない）。
+
+    当日のスナップショットが作成後に契約の変わっていないものならそれを読み、そうでなければその場で数える。
+    """
+    today = today or date.today()
+    snapshot = db.session.get(LeaseExpirySnapshot, (today, days))
+    if snapshot is not None and snapshot.lease_version == _lease_version():
+        return snapshot.expiring_count
+    return count_expiring_leases(days, today)
+
+
+def refresh_all_organizations(today: Optional[date] = None) -> dict[Optional[str], int]:
+    """共通 DB と全組織のパーティションについて当日分のスナップショットを作り直す（定期実行用）。"""
+    days = current_app.config["EXPIRING_LEASE_DAYS"]
+    results = {}
+    for organization in [None, *current_app.extensions["partitions"].organizations()]:
+        with use_organization(organization):
+            results[organization] = refresh_expiry_snapshot(days, today).expiring_count
+    return results
@@ -0,0 +1,79 @@
+"""開始日・終了日に合わせて契約の状態（予定→有効→解約）を一括で進めるモジュール。
+
+ORM オブジェクトを 1 件ずつ読み込まず、索引で絞り込んだ id をサブクエリにした
+UPDATE ... WHERE id IN (...) をチャンク単位で発行する。チャンクごとにコミットし、
+書き込みロックを長時間保持しないようにしている。
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import ColumnElement, or_, select, update
+
+from .audit import ACTION_UPDATE, record_bulk_changes
+from .extensions import db
+from .models import Lease, LeaseStatus
+from .partitioning import use_organization
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _transitions(today: date) -> list[tuple[str, str, ColumnElement]]:
+    """(変更前, 変更後, 条件) の一覧。終了済みの判定を先に行い、予定→有効に進めない。"""
+    return [
+        (LeaseStatus.PENDING, LeaseStatus.TERMINATED, Lease.end_date < today),
+        (LeaseStatus.ACTIVE, LeaseStatus.TERMINATED, Lease.end_date < today),
+        (
+            LeaseStatus.PENDING,
+            LeaseStatus.ACTIVE,
+            (Lease.start_date <= today) & or_(Lease.end_date.is_(None), Lease.end_date >= today),
+        ),
+    ]
+
+
+def _advance(from_status: str, to_status: str, condition: ColumnElement, chunk_size: int) -> int:
+    changed = 0
+    while True:
+        # (status, end_date) / (status, start_date) 索引で対象 id を chunk_size 件ずつ取る。
+        chunk = (
+            select(Lease.id)
+            .where(Lease.status == from_status)
+            .where(condition)
+            .limit(chunk_size)
+            .scalar_subquery()
+        )
+        ids = db.session.scalars(
+            update(Lease)
+            .where(Lease.id.in_(chunk))
+            .values(status=to_status)
+            .returning(Lease.id),
+            execution_options={"synchronize_session": False},
+        ).all()
+        record_bulk_changes(db.session, Lease, ids, ACTION_UPDATE, {"status": (from_status, to_status)})
+        db.session.commit()
+        changed += len(ids)
+        if len(ids) < chunk_size:
+            return changed
+
+
+def advance_lease_statuses(today: Optional[date] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict[str, int]:
+    """選択中のパーティションの契約状態を進め、遷移ごとの更新件数を返す。"""
+    today = today or date.today()
+    counts: dict[str, int] = {}
+    for from_status, to_status, condition in _transitions(today):
+        key = f"{from_status}->{to_status}"
+        counts[key] = counts.get(key, 0) + _advance(from_status, to_status, condition, chunk_size)
+    return counts
+
+
+def advance_all_organizations(today: Optional[date] = None) -> dict[Optional[str], dict[str, int]]:
+    """共通 DB と全組織のパーティションについて契約状態を進める（定期実行用）。"""
+    chunk_size = current_app.config["LEASE_STATUS_CHUNK_SIZE"]
+    results = {}
+    for organization in [None, *current_app.extensions["partitions"].organizations()]:
+        with use_organization(organization):
+            results[organization] = advance_lease_statuses(today, chunk_size=chunk_size)
+    return results
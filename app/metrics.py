@@ -0,0 +1,395 @@
+"""Prometheus 形式の /metrics エンドポイントと、複数ワーカー間で集計できる計測値ストア。
+
+カウンタ・ヒストグラムは「プロセス 1 つにつき 1 ファイル」の mmap に float64 で
+加算し、同じプロセスのスレッド間はロックで直列化する。/metrics の読み出し時に
+ディレクトリ内の全ファイルを合算する。終了したプロセスのファイルは読み出し時
+（prefork のワーカーは終了時）に aggregate.db へ合算してから削除するので、
+ワーカーが入れ替わってもファイルは増え続けない。
+接続プールのようなゲージはプロセス単位のファイルに最新値を上書きし、
+生存しているプロセスの値だけを合計する。
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:  # fcntl は POSIX のみ。無い環境では同じプロセス内の排他だけを取る。
+    import fcntl
+except ImportError:  # pragma: no cover - 環境依存
+    fcntl = None
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+HISTOGRAM_BUCKETS = {
+    "http_request_duration_seconds": LATENCY_BUCKETS,
+    "http_request_db_seconds": DB_TIME_BUCKETS,
+}
+
+METRIC_HELP = {
+    "http_requests_total": ("counter", "エンドポイント・メソッド・ステータス別のリクエスト数"),
+    "http_request_duration_seconds": ("histogram", "エンドポイント別のリクエスト処理時間"),
+    "http_request_db_seconds": ("histogram", "1 リクエストあたりの DB 実行時間の合計"),
+    "db_statements_total": ("counter", "エンドポイント別の SQL 実行回数"),
+    "db_pool_checked_out": ("gauge", "貸し出し中の接続数"),
+    "db_pool_overflow": ("gauge", "プールサイズを超えて開いている接続数"),
+    "db_pool_size": ("gauge", "接続プールのサイズ"),
+    "cache_requests_total": ("counter", "キャッシュの参照回数（result=memory/shared/miss）"),
+}
+
+_HEADER = struct.Struct("i")
+_LENGTH = struct.Struct("i")
+_VALUE = struct.Struct("d")
+_INITIAL_SIZE = 1 << 16
+# 終了したプロセスのカウンタを合算しておくファイル。
+AGGREGATE_FILE = "aggregate.db"
+LOCK_FILE = ".lock"
+
+# fork 直後の子で親のスレッドが握ったままのロックを引き継がないよう、子では作り直す。
+_process_lock = threading.Lock()
+
+
+def _reset_process_lock() -> None:
+    global _process_lock
+    _process_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_process_lock)
+
+
+def _encode_key(name: str, labels: dict[str, str]) -> str:
+    return json.dumps([name, sorted(labels.items())], ensure_ascii=False, separators=(",", ":"))
+
+
+class MmapValues:
+    """キー（メトリクス名+ラベル）ごとの float64 を mmap ファイルに保持する。
+
+    ファイル先頭 4 バイトが使用済みサイズで、続いて [キー長][キー][パディング][値] が並ぶ。
+    エントリを書き終えてから使用済みサイズを更新するため、読み手が途中の行を見ることはない。
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = open(path, "a+b")  # noqa: SIM115 - mmap の寿命に合わせて開いたままにする
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(_INITIAL_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._positions: dict[str, int] = {}
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        if self._used == _HEADER.size:
+            _HEADER.pack_into(self._map, 0, self._used)
+        for key, _value, position in _iter_entries(self._map, self._used):
+            self._positions[key] = position
+
+    def _allocate(self, key: str) -> int:
+        encoded = key.encode("utf-8")
+        padding = -(_LENGTH.size + len(encoded)) % 8
+        needed = _LENGTH.size + len(encoded) + padding + _VALUE.size
+        while self._used + needed > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        _LENGTH.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + _LENGTH.size : self._used + _LENGTH.size + len(encoded)] = encoded
+        position = self._used + needed - _VALUE.size
+        _VALUE.pack_into(self._map, position, 0.0)
+        self._used += needed
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def add(self, key: str, amount: float) -> None:
+        position = self._positions.get(key) or self._allocate(key)
+        _VALUE.pack_into(self._map, position, _VALUE.unpack_from(self._map, position)[0] + amount)
+
+    def set(self, key: str, value: float) -> None:
+        position = self._positions.get(key) or self._allocate(key)
+        _VALUE.pack_into(self._map, position, value)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+def _iter_entries(data, used: int) -> Iterator[tuple[str, float, int]]:
+    offset = _HEADER.size
+    while offset < used:
+        length = _LENGTH.unpack_from(data, offset)[0]
+        key = bytes(data[offset + _LENGTH.size : offset + _LENGTH.size + length]).decode("utf-8")
+        padding = -(_LENGTH.size + length) % 8
+        position = offset + _LENGTH.size + length + padding
+        yield key, _VALUE.unpack_from(data, position)[0], position
+        offset = position + _VALUE.size
+
+
+def read_values(path: Path) -> Iterator[tuple[str, float]]:
+    data = path.read_bytes()
+    if len(data) < _HEADER.size:
+        return
+    used = _HEADER.unpack_from(data, 0)[0]
+    for key, value, _position in _iter_entries(data, used):
+        yield key, value
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _file_pid(path: Path) -> Optional[int]:
+    """counter_{pid}.db / gauge_{pid}.db の pid（旧形式の counter_{pid}_{thread}.db を含む）。"""
+    parts = path.stem.split("_")
+    if len(parts) < 2 or parts[0] not in ("counter", "gauge") or not parts[1].isdigit():
+        return None
+    return int(parts[1])
+
+
+class MetricsStore:
+    """ディレクトリ内の mmap ファイル群として計測値を保持・集計する。"""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._counters: Optional[MmapValues] = None
+        self._gauges: Optional[MmapValues] = None
+
+    def _writer_lock(self) -> threading.Lock:
+        pid = os.getpid()
+        if self._pid != pid:
+            with _process_lock:
+                if self._pid != pid:
+                    # fork 後の子は親のファイルとロックを使わず、自分の pid のファイルを開き直す。
+                    self._lock = threading.Lock()
+                    self._counters = self._gauges = None
+                    self._pid = pid
+        return self._lock
+
+    def _counter_values(self) -> MmapValues:
+        if self._counters is None:
+            self._counters = MmapValues(self.directory / f"counter_{self._pid}.db")
+        return self._counters
+
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        """合算・削除の間はほかのプロセスの collect / retire を待たせる。"""
+        with _process_lock, open(self.directory / LOCK_FILE, "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _merge_into_aggregate(self, paths: list[Path]) -> None:
+        if not paths:
+            return
+        aggregate = MmapValues(self.directory / AGGREGATE_FILE)
+        try:
+            for path in paths:
+                for key, value in read_values(path):
+                    aggregate.add(key, value)
+                path.unlink(missing_ok=True)
+        finally:
+            aggregate.close()
+
+    def _compact(self) -> None:
+        """終了したプロセスのカウンタを aggregate.db に合算し、そのファイルとゲージを削除する。"""
+        dead_counters = []
+        for path in sorted(self.directory.glob("*.db")):
+            pid = _file_pid(path)
+            if pid is None or pid == os.getpid() or _process_alive(pid):
+                continue
+            if path.name.startswith("gauge_"):
+                path.unlink(missing_ok=True)
+            else:
+                dead_counters.append(path)
+        self._merge_into_aggregate(dead_counters)
+
+    def retire(self) -> None:
+        """このプロセスのカウンタを aggregate.db に移し、自分のファイルを削除する（ワーカーの終了時）。"""
+        with self._writer_lock():
+            for values in (self._counters, self._gauges):
+                if values is not None:
+                    values.close()
+            self._counters = self._gauges = None
+            counters = self.directory / f"counter_{self._pid}.db"
+            with self._directory_lock():
+                self._merge_into_aggregate([counters] if counters.exists() else [])
+                (self.directory / f"gauge_{self._pid}.db").unlink(missing_ok=True)
+
+    def inc(self, name: str, labels: dict[str, str], amount: float = 1.0) -> None:
+        with self._writer_lock():
+            self._counter_values().add(_encode_key(name, labels), amount)
+
+    def observe(self, name: str, labels: dict[str, str], value: float) -> None:
+        buckets = HISTOGRAM_BUCKETS[name]
+        index = bisect_left(buckets, value)
+        le = "+Inf" if index == len(buckets) else repr(buckets[index])
+        with self._writer_lock():
+            counters = self._counter_values()
+            counters.add(_encode_key(f"{name}_bucket", {**labels, "le": le}), 1.0)
+            counters.add(_encode_key(f"{name}_sum", labels), value)
+            counters.add(_encode_key(f"{name}_count", labels), 1.0)
+
+    def set_gauge(self, name: str, labels: dict[str, str], value: float) -> None:
+        with self._writer_lock():
+            if self._gauges is None:
+                self._gauges = MmapValues(self.directory / f"gauge_{self._pid}.db")
+            self._gauges.set(_encode_key(name, labels), value)
+
+    def collect(self) -> dict[str, dict[tuple, float]]:
+        """終了したプロセスの分を畳んでから全ファイルを合算し、メトリクス名 -> {ラベル組: 値} を返す。"""
+        totals: dict[str, dict[tuple, float]] = {}
+        with self._directory_lock():
+            self._compact()
+            for path in sorted(self.directory.glob("*.db")):
+                for key, value in read_values(path):
+                    name, labels = json.loads(key)
+                    series = totals.setdefault(name, {})
+                    label_key = tuple(tuple(item) for item in labels)
+                    series[label_key] = series.get(label_key, 0.0) + value
+        return totals
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render_exposition(totals: dict[str, dict[tuple, float]]) -> str:
+    """Prometheus のテキスト形式に整形する。ヒストグラムのバケットは累積値に直す。"""
+    lines: list[str] = []
+    for name, (kind, help_text) in METRIC_HELP.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind != "histogram":
+            for labels, value in sorted(totals.get(name, {}).items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            continue
+        observed: dict[tuple, dict[str, float]] = {}
+        for labels, value in totals.get(f"{name}_bucket", {}).items():
+            series = tuple(item for item in labels if item[0] != "le")
+            observed.setdefault(series, {})[dict(labels)["le"]] = value
+        sums, counts = totals.get(f"{name}_sum", {}), totals.get(f"{name}_count", {})
+        for series, by_bucket in sorted(observed.items()):
+            cumulative = 0.0
+            for le in [*map(repr, HISTOGRAM_BUCKETS[name]), "+Inf"]:
+                cumulative += by_bucket.get(le, 0.0)
+                lines.append(f"{name}_bucket{_format_labels((*series, ('le', le)))} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(series)} {_format_value(sums.get(series, 0.0))}")
+            lines.append(f"{name}_count{_format_labels(series)} {_format_value(counts.get(series, 0.0))}")
+    return "\n".join(lines) + "\n"
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    started = conn.info.get("metrics_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if has_request_context() and "metrics_db_time" in g:
+        g.metrics_db_time += elapsed
+        g.metrics_db_statements += 1
+
+
+def _record_pool_gauges(store: MetricsStore, app: Flask) -> None:
+    from .extensions import db
+
+    engines = {"default": db.engine}
+    router = app.extensions.get("partitions")
+    if router is not None:
+        engines.update(router.engines())
+    for database, engine in engines.items():
+        pool = engine.pool
+        labels = {"database": database}
+        for name, method in (
+            ("db_pool_checked_out", "checkedout"),
+            ("db_pool_overflow", "overflow"),
+            ("db_pool_size", "size"),
+        ):
+            # NullPool や SingletonThreadPool など統計を持たないプールは対象外。
+            if hasattr(pool, method):
+                store.set_gauge(name, labels, float(getattr(pool, method)()))
+
+
+def init_metrics(app: Flask) -> Optional[MetricsStore]:
+    """METRICS_ENABLED のときだけ計測フックと /metrics を登録する。
+
+    teardown は登録の逆順に呼ばれるため、db.init_app より前に呼び出すこと。
+    """
+    if not app.config.get("METRICS_ENABLED"):
+        return None
+    directory = Path(app.config.get("METRICS_DIR") or Path(app.instance_path) / "metrics")
+    store = MetricsStore(directory)
+    app.extensions["metrics"] = store
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def start_request_timer() -> None:
+        g.metrics_started = time.perf_counter()
+        g.metrics_db_time = 0.0
+        g.metrics_db_statements = 0
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop("metrics_started", None)
+        if started is None or request.endpoint == "metrics":
+            return response
+        labels = {"endpoint": request.endpoint or "unknown", "method": request.method}
+        store.observe("http_request_duration_seconds", labels, time.perf_counter() - started)
+        store.inc("http_requests_total", {**labels, "status": str(response.status_code)})
+        store.observe("http_request_db_seconds", {"endpoint": labels["endpoint"]}, g.metrics_db_time)
+        store.inc("db_statements_total", {"endpoint": labels["endpoint"]}, g.metrics_db_statements)
+        g.metrics_recorded = True
+        return response
+
+    @app.teardown_appcontext
+    def record_pool_metrics(_exc) -> None:
+        # セッションが接続を返却した後の値を記録する（create_app で db.init_app より先に登録する）。
+        if g.pop("metrics_recorded", False):
+            _record_pool_gauges(store, app)
+
+    @app.route("/metrics")
+    def metrics() -> Response:
+        """全ワーカーの計測値を合算して Prometheus のテキスト形式で返す。"""
+        body = render_exposition(current_app.extensions["metrics"].collect())
+        return Response(body, mimetype="text/plain; version=0.0.4")
+
+    return store
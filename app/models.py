@@ -21,6 +21,8 @@ class User(UserMixin, TimestampMixin, db.Model):
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(50), default="member", nullable=False)
+    # 所属する管理会社。設定されていれば業務データはその組織のパーティションに置く。
+    organization = db.Column(db.String(64), nullable=True, index=True)
 
     def set_password(self, password: str) -> None:
         self.password_hash = generate_password_hash(password, method="pbkdf2:sha256")
@@ -35,26 +37,55 @@ class User(UserMixin, TimestampMixin, db.Model):
 class Property(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
+    # 一覧の並び順。name への代入時に app/sort_keys.py が埋める（読み・全半角を揃えたキー）。
+    name_sort_key = db.Column(db.String(255), nullable=False, default="", server_default="", index=True)
     address = db.Column(db.String(255), nullable=False)
     note = db.Column(db.Text, nullable=True)
 
-    leases = db.relationship("Lease", back_populates="property", cascade="all, delete-orphan")
-    tenants = db.relationship("Tenant", back_populates="property", cascade="all, delete-orphan")
+    # 子レコードは外部キーの ON DELETE CASCADE で DB が削除するため、削除時に読み込まない。
+    leases = db.relationship("Lease", back_populates="property", cascade="all, delete-orphan", passive_deletes=True)
+    tenants = db.relationship("Tenant", back_populates="property", cascade="all, delete-orphan", passive_deletes=True)
+    units = db.relationship("Unit", back_populates="property", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self) -> str:  # pragma: no cover
         return f"<Property {self.name}>"
 
 
+class Unit(TimestampMixin, db.Model):
+    """物件の号室。入居者・契約は unit_id でここを参照し、号室の一覧や空室判定はこの表を引く。"""
+
+    __table_args__ = (db.UniqueConstraint("property_id", "unit_number", name="uq_unit_property_unit_number"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey("property.id", ondelete="CASCADE"), nullable=False)
+    unit_number = db.Column(db.String(50), nullable=False)
+
+    property = db.relationship("Property", back_populates="units")
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<Unit {self.property_id}-{self.unit_number}>"
+
+
 class Tenant(TimestampMixin, db.Model):
+    # 物件別の一覧は物件ごとに号室・氏名順で、契約フォームの候補は氏名順で索引から読む。
+    __table_args__ = (db.Index("ix_tenant_property_unit_name_sort_key", "property_id", "unit_number", "name_sort_key"),)
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
+    name_sort_key = db.Column(db.String(255), nullable=False, default="", server_default="", index=True)
     email = db.Column(db.String(255), nullable=False)
     phone = db.Column(db.String(50), nullable=True)
-    property_id = db.Column(db.Integer, db.ForeignKey("property.id"), nullable=True)
+    # 重複候補探しのブロッキングキー。代入時に app/tenant_duplicates.py が埋める。
+    email_key = db.Column(db.String(255), nullable=False, default="", server_default="", index=True)
+    phone_key = db.Column(db.String(50), nullable=False, default="", server_default="", index=True)
+    property_id = db.Column(db.Integer, db.ForeignKey("property.id", ondelete="CASCADE"), nullable=True)
     unit_number = db.Column(db.String(50), nullable=True)
+    # unit_number と同じ号室を指す。保存時に app/units.py が (property_id, unit_number) から解決する。
+    unit_id = db.Column(db.Integer, db.ForeignKey("unit.id", ondelete="SET NULL"), nullable=True, index=True)
 
-    leases = db.relationship("Lease", back_populates="tenant", cascade="all, delete-orphan")
+    leases = db.relationship("Lease", back_populates="tenant", cascade="all, delete-orphan", passive_deletes=True)
     property = db.relationship("Property", back_populates="tenants")
+    unit = db.relationship("Unit")
 
     def __repr__(self) -> str:  # pragma: no cover
         return f"<Tenant {self.name}>"
@@ -69,17 +100,102 @@ class LeaseStatus:
 
 
 class Lease(TimestampMixin, db.Model):
+    # 満了予定の抽出・状態の自動更新は status で絞ってから日付を範囲検索する。
+    __table_args__ = (
+        db.Index("ix_lease_status_end_date", "status", "end_date"),
+        db.Index("ix_lease_status_start_date", "status", "start_date"),
+        # 同じ部屋の期間重複の判定と全件点検は、部屋ごとに開始日順で読む。
+        db.Index("ix_lease_property_unit_start_date", "property_id", "unit_number", "start_date"),
+        # 最大の id の契約をアーカイブしても採番を戻さず、lease_archive.lease_id や監査ログと衝突させない。
+        {"sqlite_autoincrement": True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    property_id = db.Column(db.Integer, db.ForeignKey("property.id"), nullable=False)
-    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), nullable=False)
+    property_id = db.Column(db.Integer, db.ForeignKey("property.id", ondelete="CASCADE"), nullable=False)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id", ondelete="CASCADE"), nullable=False)
     rent = db.Column(db.Numeric(10, 2), nullable=False)
     unit_number = db.Column(db.String(50), nullable=True)
+    # 空室の判定は号室ごとにこの列で契約を引く。
+    unit_id = db.Column(db.Integer, db.ForeignKey("unit.id", ondelete="SET NULL"), nullable=True, index=True)
     start_date = db.Column(db.Date, nullable=False, default=date.today)
     end_date = db.Column(db.Date, nullable=True)
     status = db.Column(db.String(50), nullable=False, default=LeaseStatus.PENDING)
 
     property = db.relationship("Property", back_populates="leases")
     tenant = db.relationship("Tenant", back_populates="leases")
+    unit = db.relationship("Unit")
 
     def __repr__(self) -> str:  # pragma: no cover
         return f"<Lease {self.id}: {self.property_id} -> {self.tenant_id}>"
+
+
+class LeaseArchive(TimestampMixin, db.Model):
+    """解約から時間の経った契約の保管先。lease_id は移動前の lease.id（監査ログの entity_id）。"""
+
+    __tablename__ = "lease_archive"
+    # 集計・レポートは対象期間に掛かる終了日だけを範囲検索し、履歴全体は走査しない。
+    __table_args__ = (
+        db.Index("ix_lease_archive_end_date", "end_date"),
+        db.Index("ix_lease_archive_property_unit_start_date", "property_id", "unit_number", "start_date"),
+    )
+
+    # SQLite は最大の rowid を削除すると再利用するため、lease.id を主キーにはしない。
+    id = db.Column(db.Integer, primary_key=True)
+    lease_id = db.Column(db.Integer, nullable=False, index=True)
+    property_id = db.Column(db.Integer, db.ForeignKey("property.id", ondelete="CASCADE"), nullable=False)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id", ondelete="CASCADE"), nullable=False)
+    rent = db.Column(db.Numeric(10, 2), nullable=False)
+    unit_number = db.Column(db.String(50), nullable=True)
+    unit_id = db.Column(db.Integer, db.ForeignKey("unit.id", ondelete="SET NULL"), nullable=True)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=True)
+    status = db.Column(db.String(50), nullable=False)
+    archived_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<LeaseArchive {self.id}: {self.property_id} -> {self.tenant_id}>"
+
+
+class LeaseExpirySnapshot(db.Model):
+    """CLI・スケジューラが作る「N 日以内に満了する契約数」。ダッシュボードはこれを読む。"""
+
+    snapshot_date = db.Column(db.Date, primary_key=True)
+    horizon_days = db.Column(db.Integer, primary_key=True)
+    expiring_count = db.Column(db.Integer, nullable=False)
+    # 作成時点の table_version（lease）。版が進んでいれば件数は古いので読まない。
+    lease_version = db.Column(db.Integer, nullable=False, server_default="0")
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<LeaseExpirySnapshot {self.snapshot_date} +{self.horizon_days}d: {self.expiring_count}>"
+
+
+class AuditEvent(db.Model):
+    """物件・入居者・契約の変更履歴。追記専用で、更新・削除は行わない。"""
+
+    __tablename__ = "audit_event"
+    __table_args__ = (db.Index("ix_audit_event_entity", "entity_type", "entity_id", "id"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    occurred_at = db.Column(db.DateTime, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    entity_type = db.Column(db.String(50), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(20), nullable=False)
+    changes = db.Column(db.JSON, nullable=False)
+    endpoint = db.Column(db.String(100), nullable=True)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<AuditEvent {self.entity_type}#{self.entity_id} {self.action}>"
+
+
+class TableVersion(db.Model):
+    """テーブルごとの変更カウンタ。コミットのたびに加算し、参照データキャッシュの鍵に使う。"""
+
+    __tablename__ = "table_version"
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<TableVersion {self.table_name}: {self.version}>"
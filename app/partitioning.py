@@ -0,0 +1,260 @@
+"""組織（管理会社）ごとにデータベースを分割し、リクエスト単位で接続先を切り替える。
+
+ユーザー情報（user テーブル）だけは共通 DB に置き、物件・入居者・契約などの
+業務データは組織ごとのパーティションに保存する。SQLite では組織ごとに別ファイル、
+サーバー DB では組織名のスキーマを schema_translate_map で割り当てる。
+組織が未設定のユーザーは従来どおり共通 DB をそのまま使う。
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import click
+import sqlalchemy as sa
+from flask import Flask, current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+
+# 共通 DB に残すテーブル。それ以外はすべて組織パーティション側に置く。
+SHARED_TABLES = frozenset({"user", "alembic_version"})
+ORGANIZATION_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+
+class InvalidOrganization(ValueError):
+    """組織コードとして使えない文字列が指定された場合に送出する。"""
+
+
+def validate_organization(organization: str) -> str:
+    if not ORGANIZATION_PATTERN.match(organization or ""):
+        raise InvalidOrganization(f"組織コードは英小文字・数字・-_ のみ使用できます: {organization!r}")
+    return organization
+
+
+def current_organization() -> Optional[str]:
+    """現在のアプリコンテキストで選択されている組織コード（未選択なら None）。"""
+    if not has_app_context():
+        return None
+    return g.get("organization")
+
+
+def database_identity(organization: Optional[str] = None) -> str:
+    """組織（省略時は現在の組織）のデータを置く DB の識別子（アプリコンテキスト外では "-"）。"""
+    if not has_app_context() or "partitions" not in current_app.extensions:
+        return "-"
+    return current_app.extensions["partitions"].database_identity(organization or current_organization())
+
+
+@contextmanager
+def use_organization(organization: Optional[str]) -> Iterator[None]:
+    """CLI やバックグラウンド処理で一時的に組織パーティションを選択する。"""
+    if organization is not None:
+        validate_organization(organization)
+    previous = g.get("organization")
+    g.organization = organization
+    try:
+        yield
+    finally:
+        g.organization = previous
+
+
+def _statement_table(clause: Any) -> Optional[sa.Table]:
+    if isinstance(clause, sa.Table):
+        return clause
+    if isinstance(clause, sa.sql.dml.UpdateBase) and isinstance(clause.table, sa.Table):
+        return clause.table
+    if isinstance(clause, sa.CompoundSelect):
+        # UNION などは構成する SELECT のどれかが業務テーブルを読んでいれば振り分ける。
+        for select in clause.selects:
+            table = _statement_table(select)
+            if table is not None:
+                return table
+    if isinstance(clause, sa.Select):
+        for from_clause in clause.columns_clause_froms:
+            if isinstance(from_clause, sa.Table):
+                return from_clause
+            if isinstance(from_clause, sa.sql.selectable.Subquery):
+                table = _statement_table(from_clause.element)
+                if table is not None:
+                    return table
+    return None
+
+
+class PartitionedSession(Session):
+    """組織が選択されていれば、業務テーブルへの操作をその組織の Engine へ振り分ける。"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            organization = current_organization()
+            if organization is not None:
+                table = sa.inspect(mapper).local_table if mapper is not None else _statement_table(clause)
+                if table is not None and table.name not in SHARED_TABLES:
+                    return current_app.extensions["partitions"].engine_for(organization)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class PartitionRouter:
+    """組織コードから Engine を引き当て、生成済みの Engine を使い回す。"""
+
+    def __init__(self, app: Flask, db) -> None:
+        self.app = app
+        self.db = db
+        self.uri_template = app.config["ORG_DATABASE_URI_TEMPLATE"]
+        self._engines: dict[str, sa.Engine] = {}
+        self._identities: dict[Optional[str], str] = {}
+        self._lock = threading.Lock()
+        # flask partitions upgrade 実行中に migrations/env.py が参照する組織。
+        self.migration_organization: Optional[str] = None
+
+    @property
+    def uses_schemas(self) -> bool:
+        """共通 DB が SQLite 以外なら、組織はファイルではなくスキーマで分ける。"""
+        return sa.engine.make_url(self.app.config["SQLALCHEMY_DATABASE_URI"]).get_backend_name() != "sqlite"
+
+    def database_uri_for(self, organization: str) -> str:
+        validate_organization(organization)
+        return self.uri_template.format(instance_path=self.app.instance_path, organization=organization)
+
+    def database_identity(self, organization: Optional[str] = None) -> str:
+        """組織（None は共通 DB）のデータを置く DB の短い識別子。
+
+        共有キャッシュのキーと世代番号を DB ごとに分けるために使う。SQLite の相対パスは
+        絶対パスに直すので、同じファイルを指す設定どうしは同じ識別子になる。
+        """
+        identity = self._identities.get(organization)
+        if identity is not None:
+            return identity
+        url = sa.engine.make_url(self.app.config["SQLALCHEMY_DATABASE_URI"])
+        base = self.app.instance_path
+        if organization is not None and not self.uses_schemas:
+            url, base = sa.engine.make_url(self.database_uri_for(organization)), os.getcwd()
+        if url.get_backend_name() == "sqlite":
+            if url.database in (None, "", ":memory:"):
+                # インメモリ DB はアプリごとに別物なので、同じ URL でも識別子を分ける。
+                url = url.set(query={"instance": uuid.uuid4().hex})
+            else:
+                # Flask-SQLAlchemy は共通 DB の相対パスを instance_path から、組織 DB は作業ディレクトリから解決する。
+                url = url.set(database=os.path.abspath(os.path.join(base, url.database)))
+        name = url.render_as_string(hide_password=True)
+        if organization is not None and self.uses_schemas:
+            name = f"{name}#{organization}"
+        identity = hashlib.sha1(name.encode("utf-8")).hexdigest()[:12]
+        self._identities[organization] = identity
+        return identity
+
+    def engine_for(self, organization: str) -> sa.Engine:
+        engine = self._engines.get(organization)
+        if engine is not None:
+            return engine
+        with self._lock:
+            engine = self._engines.get(organization)
+            if engine is None:
+                engine = self._create_engine(validate_organization(organization))
+                self._engines[organization] = engine
+        return engine
+
+    def _create_engine(self, organization: str) -> sa.Engine:
+        if self.uses_schemas:
+            # 共通 Engine の接続プールを共有したまま、既定スキーマだけ差し替える。
+            with self.app.app_context():
+                base = self.db.engine
+            return base.execution_options(schema_translate_map={None: organization})
+        uri = self.database_uri_for(organization)
+        database = sa.engine.make_url(uri).database
+        if database and database != ":memory:":
+            Path(database).parent.mkdir(parents=True, exist_ok=True)
+        return sa.create_engine(uri, **self.app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+
+    def engines(self) -> dict[str, sa.Engine]:
+        """これまでに開いた組織ごとの Engine（組織コード -> Engine）。"""
+        with self._lock:
+            return dict(self._engines)
+
+    def current_engine(self) -> sa.Engine:
+        """選択中の組織の Engine。組織未選択なら共通 Engine。"""
+        organization = current_organization()
+        if organization is None:
+            return self.db.engine
+        return self.engine_for(organization)
+
+    def organizations(self) -> list[str]:
+        """ユーザーに割り当てられている組織コードの一覧。"""
+        from .models import User
+
+        rows = self.db.session.execute(
+            sa.select(User.organization).where(User.organization.is_not(None)).distinct().order_by(User.organization),
+        )
+        return [organization for (organization,) in rows]
+
+    def create_all(self, organization: str) -> None:
+        """マイグレーションを使わずに組織パーティションのテーブルを作成する（テスト用）。"""
+        engine = self.engine_for(organization)
+        if self.uses_schemas:
+            with engine.begin() as conn:
+                conn.execute(sa.schema.CreateSchema(organization, if_not_exists=True))
+        self.db.metadata.create_all(engine)
+
+    def dispose(self) -> None:
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+
+
+def init_partitioning(app: Flask, db) -> PartitionRouter:
+    """ルーターを登録し、ログインユーザーの組織をリクエストごとに選択する。"""
+    app.config.setdefault("ORG_DATABASE_URI_TEMPLATE", "sqlite:///{instance_path}/orgs/{organization}.db")
+    router = PartitionRouter(app, db)
+    app.extensions["partitions"] = router
+
+    @app.before_request
+    def select_organization_partition() -> None:
+        from flask import request
+        from flask_login import current_user
+
+        if request.endpoint == "static":
+            return
+        # current_user の読み込みは共通 DB の user テーブルに対して行われる。
+        g.organization = getattr(current_user, "organization", None) or None
+
+    return router
+
+
+def organization_option(command):
+    """CLI コマンドに --org オプションを追加し、その組織のパーティションで実行する。"""
+
+    @click.option("--org", "organization", default=None, help="対象の組織コード（未指定なら共通 DB）")
+    @functools.wraps(command)
+    def wrapper(*args, organization: Optional[str] = None, **kwargs):
+        if organization is not None:
+            try:
+                validate_organization(organization)
+            except InvalidOrganization as exc:
+                raise click.BadParameter(str(exc), param_hint="--org") from None
+        with use_organization(organization):
+            return command(*args, **kwargs)
+
+    return wrapper
+
+
+def upgrade_partitions(organizations: Optional[list[str]] = None, revision: str = "head") -> list[str]:
+    """各組織パーティションに対して flask db upgrade 相当を実行する。"""
+    from flask_migrate import upgrade
+
+    router: PartitionRouter = current_app.extensions["partitions"]
+    targets = organizations if organizations is not None else router.organizations()
+    for organization in targets:
+        validate_organization(organization)
+        router.migration_organization = organization
+        try:
+            upgrade(revision=revision)
+        finally:
+            router.migration_organization = None
+    return targets
@@ -0,0 +1,223 @@
+"""ルート単位のプロファイラ（flask profile-route）。
+
+遅いページを手元で再現するため、指定したパスをテストクライアントで n 回呼び出し、
+cProfile の pstats・フレームグラフ用の collapsed stack・tracemalloc による
+メモリ確保の上位 N 件をファイルに書き出す。計測が互いの結果を歪めないよう、
+cProfile と tracemalloc は別々の周回で動かす（POST はそれぞれの周回で n 回実行される）。
+"""
+
+from __future__ import annotations
+
+import cProfile
+import pstats
+import re
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from flask import Flask
+from sqlalchemy import select
+
+from .extensions import db
+from .models import User
+
+# collapsed stack に書き出す最小の自己時間（マイクロ秒）。これより短い経路は省く。
+MIN_COLLAPSED_MICROSECONDS = 1
+# フレームグラフの経路をたどる最大の深さ（呼び出しグラフの循環対策を兼ねる）。
+MAX_STACK_DEPTH = 64
+# メモリ確保の集計から除くフレーム（計測そのものと import 機構）。
+_ALLOCATION_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+@dataclass
+class ProfileReport:
+    requests: int
+    status_codes: Counter
+    elapsed: float
+    peak_bytes: int
+    pstats_path: Path
+    collapsed_path: Path
+    allocations_path: Path
+    stats: pstats.Stats
+
+
+def profile_dir(app: Flask) -> Path:
+    return Path(app.config.get("PROFILE_DIR") or Path(app.instance_path) / "profiles")
+
+
+def _function_label(func: tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        # 組み込み関数は "<built-in method ...>" の形で名前だけが入る。
+        return name
+    return f"{Path(filename).name}:{lineno}({name})"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> dict[str, int]:
+    """pstats の呼び出しグラフから collapsed stack（"a;b;c" → 自己時間 μs）を組み立てる。
+
+    cProfile は呼び出し元と呼び出し先の 1 段ずつしか記録しないため、各経路の時間は
+    呼び出し元ごとの累積時間の比で按分した近似になる。
+    """
+    entries = stats.stats
+    children: dict[tuple, list[tuple[tuple, float]]] = {}
+    for func, (_cc, _nc, _tt, _ct, callers) in entries.items():
+        for caller, caller_stats in callers.items():
+            children.setdefault(caller, []).append((func, caller_stats[3]))
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    stacks: dict[str, int] = {}
+
+    def walk(func: tuple, path: tuple[str, ...], seen: frozenset, cumulative: float) -> None:
+        _cc, _nc, tottime, total, _callers = entries[func]
+        if total > 0:
+            own = round(cumulative * tottime / total * 1_000_000)
+            if own >= MIN_COLLAPSED_MICROSECONDS:
+                key = ";".join(path)
+                stacks[key] = stacks.get(key, 0) + own
+        if len(path) >= MAX_STACK_DEPTH or total <= 0:
+            return
+        for child, edge in children.get(func, ()):
+            if child in seen:
+                continue
+            share = cumulative * edge / total
+            if share * 1_000_000 >= MIN_COLLAPSED_MICROSECONDS:
+                walk(child, (*path, _function_label(child)), seen | {child}, share)
+
+    for root in roots:
+        walk(root, (_function_label(root),), frozenset({root}), entries[root][3])
+    return stacks
+
+
+def top_functions(stats: pstats.Stats, limit: int) -> list[tuple[str, int, float, float]]:
+    """累積時間の長い順に (関数, 呼び出し回数, 自己時間, 累積時間) を返す。"""
+    rows = [(_function_label(func), nc, tt, ct) for func, (_cc, nc, tt, ct, _callers) in stats.stats.items()]
+    return sorted(rows, key=lambda row: row[3], reverse=True)[:limit]
+
+
+def _write_collapsed(stats: pstats.Stats, path: Path) -> None:
+    with path.open("w", encoding="utf-8") as fp:
+        for stack, microseconds in sorted(collapsed_stacks(stats).items()):
+            fp.write(f"{stack} {microseconds}\n")
+
+
+def _write_allocations(
+    path: Path, title: str, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, peak: int, top: int
+) -> None:
+    differences = after.filter_traces(_ALLOCATION_FILTERS).compare_to(before.filter_traces(_ALLOCATION_FILTERS), "lineno")
+    with path.open("w", encoding="utf-8") as fp:
+        fp.write(f"{title}\n")
+        fp.write(f"peak traced memory: {peak / 1024:.1f} KiB\n")
+        fp.write(f"top {top} lines by memory still held after the requests:\n")
+        for statistic in differences[:top]:
+            fp.write(f"{statistic}\n")
+
+
+def _login(client, app: Flask, user_email: str) -> None:
+    with app.app_context():
+        user_id = db.session.execute(select(User.id).where(User.email == user_email)).scalar_one_or_none()
+    if user_id is None:
+        raise LookupError(f"user {user_email} does not exist")
+    # Flask-Login が読むセッションキーを直接入れ、パスワードなしでそのユーザーとして呼び出す。
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
+
+
+def _slug(method: str, path: str) -> str:
+    return f"{method.lower()}-{re.sub(r'[^0-9A-Za-z]+', '-', path).strip('-') or 'root'}"
+
+
+def profile_route(
+    app: Flask,
+    path: str,
+    method: str = "GET",
+    repeat: int = 10,
+    user_email: Optional[str] = None,
+    data: Optional[dict[str, str]] = None,
+    output_dir: Optional[Path] = None,
+    top: int = 20,
+) -> ProfileReport:
+    """path を repeat 回呼び出して計測し、3 種類のレポートを書き出す。
+
+    最初の 1 回はテンプレートのコンパイルやキャッシュの準備を計測に含めないための空回し。
+    CSRF トークンは計測中だけ検査を止めて省略する。
+    """
+    output_dir = output_dir or profile_dir(app)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = output_dir / f"{_slug(method, path)}-{datetime.now():%Y%m%d-%H%M%S}"
+    client = app.test_client()
+    if user_email:
+        _login(client, app, user_email)
+
+    status_codes: Counter = Counter()
+
+    def call() -> None:
+        response = client.open(path, method=method, data=data)
+        status_codes[response.status_code] += 1
+        response.close()
+
+    csrf_enabled = app.config.get("WTF_CSRF_ENABLED", True)
+    app.config["WTF_CSRF_ENABLED"] = False
+    try:
+        call()
+        status_codes.clear()
+
+        profiler = cProfile.Profile()
+        wsgi_app = app.wsgi_app
+
+        def profiled(environ, start_response):
+            # テストクライアント側の処理を含めず、アプリの WSGI 呼び出しだけを記録する。
+            profiler.enable()
+            try:
+                return wsgi_app(environ, start_response)
+            finally:
+                profiler.disable()
+
+        app.wsgi_app = profiled
+        started = time.perf_counter()
+        try:
+            for _ in range(repeat):
+                call()
+        finally:
+            app.wsgi_app = wsgi_app
+        elapsed = time.perf_counter() - started
+        profiled_codes = Counter(status_codes)
+
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            for _ in range(repeat):
+                call()
+            after = tracemalloc.take_snapshot()
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        app.config["WTF_CSRF_ENABLED"] = csrf_enabled
+
+    stats = pstats.Stats(profiler)
+    pstats_path = stem.with_suffix(".pstats")
+    stats.dump_stats(pstats_path)
+    collapsed_path = stem.with_suffix(".collapsed")
+    _write_collapsed(stats, collapsed_path)
+    allocations_path = stem.parent / f"{stem.name}-allocations.txt"
+    _write_allocations(allocations_path, f"{method} {path} x {repeat}", before, after, peak, top)
+    return ProfileReport(
+        requests=repeat,
+        status_codes=profiled_codes,
+        elapsed=elapsed,
+        peak_bytes=peak,
+        pstats_path=pstats_path,
+        collapsed_path=collapsed_path,
+        allocations_path=allocations_path,
+        stats=stats,
+    )
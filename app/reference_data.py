@@ -0,0 +1,158 @@
+"""フォームの選択肢など、めったに変わらない参照データのキャッシュ。
+
+業務テーブルを変更したトランザクションは、コミット直前に table_version の
+カウンタを加算する。参照データはカウンタの値をキーに含めてキャッシュ（app/cache.py）
+へ置くため、どのワーカーでコミットされた変更でも次のリクエストから確実に作り直される。
+コミット後にはキャッシュの世代番号も進め、ダッシュボードなど世代で無効化する
+エントリへ変更を伝える。
+"""
+
+from __future__ import annotations
+
+from typing import Callable, TypeVar
+
+import sqlalchemy as sa
+from flask import Flask, current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState
+
+from .cache import dependency
+from .extensions import db
+from .models import Property, TableVersion, Tenant, Unit
+from .partitioning import PartitionedSession, current_organization, database_identity
+
+T = TypeVar("T")
+
+# 変更を数えるテーブル。
+VERSIONED_TABLES = frozenset({"property", "unit", "tenant", "lease", "lease_expiry_snapshot"})
+# 削除が ON DELETE CASCADE で伝播する先（子テーブルの版も進める）。
+CASCADED_TABLES = {"property": ("unit", "tenant", "lease"), "tenant": ("lease",)}
+
+_TOUCHED_KEY = "reference_touched_tables"
+_COMMITTED_KEY = "reference_committed_tables"
+_VERSIONS_KEY = "reference_table_versions"
+
+
+def _touch(session, table_name: str, deleted: bool = False) -> None:
+    if table_name not in VERSIONED_TABLES:
+        return
+    touched = session.info.setdefault(_TOUCHED_KEY, set())
+    touched.add(table_name)
+    if deleted:
+        touched.update(CASCADED_TABLES.get(table_name, ()))
+
+
+def _collect_flushed(session, _flush_context) -> None:
+    for objects, deleted in ((session.new, False), (session.dirty, False), (session.deleted, True)):
+        for obj in objects:
+            table = getattr(obj, "__table__", None)
+            if table is not None:
+                _touch(session, table.name, deleted)
+
+
+def _collect_bulk(execute_state: ORMExecuteState) -> None:
+    """ORM を経由しない一括 INSERT / UPDATE / DELETE も変更として数える。"""
+    if not (execute_state.is_insert or execute_state.is_update or execute_state.is_delete):
+        return
+    table = getattr(execute_state.statement, "table", None)
+    if isinstance(table, sa.Table):
+        _touch(execute_state.session, table.name, execute_state.is_delete)
+
+
+def _bump_versions(session) -> None:
+    """変更のあったテーブルのカウンタを、同じトランザクション内で加算する。"""
+    session.flush()
+    touched = session.info.pop(_TOUCHED_KEY, None)
+    if not touched:
+        return
+    session.info[_COMMITTED_KEY] = touched
+    table = TableVersion.__table__
+    names = sorted(touched)
+    updated = session.scalars(
+        sa.update(table).where(table.c.table_name.in_(names)).values(version=table.c.version + 1).returning(table.c.table_name),
+    ).all()
+    missing = [name for name in names if name not in updated]
+    if missing:
+        # 対象に後から加えたテーブルなど、まだ行が無いものは 1 から数える。
+        session.execute(sa.insert(table), [{"table_name": name, "version": 1} for name in missing])
+
+
+def _seed_versions(table, connection, **_kwargs) -> None:
+    """create_all でテーブルを作った直後に、数える対象の行を 0 で用意する。"""
+    connection.execute(sa.insert(table), [{"table_name": name, "version": 0} for name in sorted(VERSIONED_TABLES)])
+
+
+event.listen(TableVersion.__table__, "after_create", _seed_versions)
+
+
+def _invalidate_committed(session) -> None:
+    committed = session.info.pop(_COMMITTED_KEY, None)
+    if has_app_context():
+        g.pop(_VERSIONS_KEY, None)
+        if committed and "cache" in current_app.extensions:
+            current_app.extensions["cache"].invalidate(dependency(table) for table in committed)
+
+
+def _forget(session) -> None:
+    session.info.pop(_TOUCHED_KEY, None)
+    session.info.pop(_COMMITTED_KEY, None)
+    if has_app_context():
+        g.pop(_VERSIONS_KEY, None)
+
+
+def table_versions() -> dict[str, int]:
+    """現在の組織の各テーブルのカウンタ。コミットまでは同じアプリコンテキスト内で使い回す。"""
+    by_organization = g.setdefault(_VERSIONS_KEY, {})
+    organization = current_organization()
+    if organization not in by_organization:
+        table = TableVersion.__table__
+        by_organization[organization] = dict(db.session.execute(sa.select(table.c.table_name, table.c.version)).all())
+    return by_organization[organization]
+
+
+def cached_reference(name: str, tables: tuple[str, ...], loader: Callable[[], T]) -> T:
+    """依存テーブルのカウンタをキーに含めてキャッシュする。カウンタが進めば別のキーになる。
+
+    カウンタは DB ごとに 0 から数えるため、共有キャッシュを使う別の DB と衝突しないよう DB の識別子も含める。
+    """
+    versions = table_versions()
+    stamp = "-".join(str(versions.get(table, 0)) for table in tables)
+    key = f"reference:{database_identity()}:{current_organization() or '-'}:{name}:{stamp}"
+    return current_app.extensions["cache"].get_or_set(key, loader, name=name)
+
+
+def property_choices() -> tuple[tuple[int, str], ...]:
+    """物件の SelectField 用 (id, 名前) を名前順で返す。"""
+
+    def load() -> tuple[tuple[int, str], ...]:
+        rows = db.session.execute(sa.select(Property.id, Property.name).order_by(Property.name_sort_key, Property.id))
+        return tuple((property_id, name) for property_id, name in rows)
+
+    return cached_reference("property_choices", ("property",), load)
+
+
+def units_by_property() -> dict[int, tuple[str, ...]]:
+    """unit テーブルの号室を物件ごとに号室順で並べた辞書。"""
+
+    def load() -> dict[int, tuple[str, ...]]:
+        rows = db.session.execute(sa.select(Unit.property_id, Unit.unit_number).order_by(Unit.property_id, Unit.unit_number))
+        units: dict[int, list[str]] = {}
+        for property_id, unit_number in rows:
+            units.setdefault(property_id, []).append(unit_number)
+        return {property_id: tuple(numbers) for property_id, numbers in units.items()}
+
+    return cached_reference("units_by_property", ("unit",), load)
+
+
+def tenant_count() -> int:
+    return cached_reference("tenant_count", ("tenant",), lambda: db.session.scalar(sa.select(sa.func.count(Tenant.id))))
+
+
+def init_reference_data(app: Flask) -> None:
+    """テーブルの変更を数え、コミット後にキャッシュの世代を進めるフックを登録する。"""
+    if not event.contains(PartitionedSession, "before_commit", _bump_versions):
+        event.listen(PartitionedSession, "after_flush", _collect_flushed)
+        event.listen(PartitionedSession, "do_orm_execute", _collect_bulk)
+        event.listen(PartitionedSession, "before_commit", _bump_versions)
+        event.listen(PartitionedSession, "after_commit", _invalidate_committed)
+        event.listen(PartitionedSession, "after_rollback", _forget)
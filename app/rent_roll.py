@@ -0,0 +1,305 @@
+"""月末のレントロール（物件ごとの号室・入居者・賃料一覧）を並列生成するモジュール。
+
+各物件の CSV はプロセスプール上で生成する。ワーカーは Flask アプリや
+親プロセスの接続を共有せず、初期化時に自前の Engine を開く。
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import re
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from flask import Flask
+from sqlalchemy import Engine, create_engine, or_, select, union_all
+
+from .blueprints.core.forms import LEASE_STATUS_CHOICES
+from .dates import month_end
+from .jobs import JobLimitReached, JobStore
+from .lease_archive import archived_during
+from .models import Lease, LeaseArchive, Property, Tenant, Unit
+
+STATUS_LABELS = dict(LEASE_STATUS_CHOICES)
+VACANCY_LABEL = "空室"
+CSV_HEADER = ["号室", "入居者", "賃料", "状態", "契約開始日", "契約終了日"]
+
+# ワーカープロセスごとの Engine（_init_worker で生成）。
+_worker_engine: Optional[Engine] = None
+
+ProgressCallback = Callable[[int, int, str], None]
+
+
+@dataclass
+class RentRollFile:
+    property_id: int
+    property_name: str
+    filename: str
+    content: bytes
+    rows: int
+
+
+def _init_worker(database_uri: str) -> None:
+    global _worker_engine
+    _worker_engine = create_engine(database_uri)
+
+
+def _safe_filename(property_id: int, name: str) -> str:
+    cleaned = re.sub(r"[\\/:*?\"<>|\s]+", "_", name).strip("_") or "property"
+    return f"{property_id:05d}_{cleaned}.csv"
+
+
+def build_rent_roll_rows(engine: Engine, property_id: int, month: date) -> list[list[str]]:
+    """1 物件分のレントロール行を号室順に組み立てる。契約のない号室は空室行にする。"""
+    period_end = month_end(month)
+    with engine.connect() as conn:
+        # 過去の月を出力する場合に備え、その月に掛かるアーカイブ済みの契約も含める。
+        active = union_all(
+            select(Lease.unit_number, Lease.tenant_id, Lease.rent, Lease.status, Lease.start_date, Lease.end_date)
+            .where(Lease.property_id == property_id)
+            .where(Lease.start_date <= period_end)
+            .where(or_(Lease.end_date.is_(None), Lease.end_date >= month)),
+            select(
+                LeaseArchive.unit_number,
+                LeaseArchive.tenant_id,
+                LeaseArchive.rent,
+                LeaseArchive.status,
+                LeaseArchive.start_date,
+                LeaseArchive.end_date,
+            )
+            .where(LeaseArchive.property_id == property_id)
+            .where(archived_during(month, period_end)),
+        ).subquery()
+        lease_rows = conn.execute(
+            select(active.c.unit_number, Tenant.name, active.c.rent, active.c.status, active.c.start_date, active.c.end_date)
+            .join(Tenant, active.c.tenant_id == Tenant.id)
+            .order_by(active.c.unit_number, active.c.start_date.desc()),
+        ).all()
+        units = conn.scalars(select(Unit.unit_number).where(Unit.property_id == property_id)).all()
+
+    occupied_units = {row.unit_number or "" for row in lease_rows}
+    vacant_units = {unit for unit in units if unit not in occupied_units}
+
+    rows: list[tuple[str, int, list[str]]] = []
+    for unit_number, tenant_name, rent, status, start_date, end_date in lease_rows:
+        rows.append(
+            (
+                unit_number or "",
+                0,
+                [
+                    unit_number or "",
+                    tenant_name,
+                    f"{rent:.0f}" if rent is not None else "",
+                    STATUS_LABELS.get(status, status),
+                    start_date.isoformat() if start_date else "",
+                    end_date.isoformat() if end_date else "",
+                ],
+            ),
+        )
+    for unit_number in vacant_units:
+        rows.append((unit_number, 1, [unit_number, "", "", VACANCY_LABEL, "", ""]))
+    rows.sort(key=lambda item: (item[0], item[1]))
+    return [row for _, _, row in rows]
+
+
+def render_property_csv(engine: Engine, property_id: int, property_name: str, month: date) -> RentRollFile:
+    rows = build_rent_roll_rows(engine, property_id, month)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    writer.writerows(rows)
+    return RentRollFile(
+        property_id=property_id,
+        property_name=property_name,
+        filename=_safe_filename(property_id, property_name),
+        # Excel で開いても文字化けしないよう BOM 付き UTF-8 で出力する。
+        content=buffer.getvalue().encode("utf-8-sig"),
+        rows=len(rows),
+    )
+
+
+def _render_in_worker(property_id: int, property_name: str, month: date) -> RentRollFile:
+    return render_property_csv(_worker_engine, property_id, property_name, month)
+
+
+def _is_memory_database(engine: Engine) -> bool:
+    return engine.url.get_backend_name() == "sqlite" and engine.url.database in (None, "", ":memory:")
+
+
+def generate_rent_rolls(
+    engine: Engine,
+    month: date,
+    destination,
+    workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> list[RentRollFile]:
+    """全物件のレントロール CSV を生成し、destination（パスまたはファイル）へ zip で書き出す。"""
+    with engine.connect() as conn:
+        properties = conn.execute(select(Property.id, Property.name).order_by(Property.id)).all()
+
+    total = len(properties)
+    workers = workers or os.cpu_count() or 1
+    results: list[RentRollFile] = []
+
+    def report(result: RentRollFile) -> None:
+        results.append(result)
+        if progress is not None:
+            progress(len(results), total, result.property_name)
+
+    if workers == 1 or total <= 1 or _is_memory_database(engine):
+        # インメモリ DB は別プロセスから見えないため、その場で順に生成する。
+        for property_id, name in properties:
+            report(render_property_csv(engine, property_id, name, month))
+    else:
+        database_uri = engine.url.render_as_string(hide_password=False)
+        with ProcessPoolExecutor(
+            max_workers=min(workers, total),
+            initializer=_init_worker,
+            initargs=(database_uri,),
+        ) as executor:
+            futures = [executor.submit(_render_in_worker, property_id, name, month) for property_id, name in properties]
+            for future in as_completed(futures):
+                report(future.result())
+
+    results.sort(key=lambda item: item.property_id)
+    with zipfile.ZipFile(destination, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for result in results:
+            archive.writestr(f"rent_roll_{month:%Y-%m}/{result.filename}", result.content)
+    return results
+
+
+@dataclass
+class RentRollJob:
+    """Web から起動したレントロール生成ジョブの進捗。状態は出力先ディレクトリの JSON で全ワーカーと共有する。"""
+
+    id: str
+    month: date
+    path: Path
+    # ジョブを起動した利用者の組織。別の組織からは進捗もファイルも参照できない。
+    organization: Optional[str] = None
+    state: str = "queued"
+    done: int = 0
+    total: int = 0
+    error: Optional[str] = None
+    started_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+    # ジョブを動かしているプロセス。終了していれば失敗として扱う。
+    pid: int = field(default_factory=os.getpid)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "month": self.month.strftime("%Y-%m"),
+            "state": self.state,
+            "done": self.done,
+            "total": self.total,
+            "error": self.error,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+        }
+
+    def to_record(self) -> dict:
+        return {**self.to_dict(), "month": self.month.isoformat(), "path": str(self.path), "organization": self.organization, "pid": self.pid}
+
+    @classmethod
+    def from_record(cls, record: dict) -> RentRollJob:
+        return cls(
+            id=record["id"],
+            month=date.fromisoformat(record["month"]),
+            path=Path(record["path"]),
+            organization=record["organization"],
+            state=record["state"],
+            done=record["done"],
+            total=record["total"],
+            error=record["error"],
+            started_at=datetime.fromisoformat(record["started_at"]),
+            finished_at=datetime.fromisoformat(record["finished_at"]) if record["finished_at"] else None,
+            pid=record["pid"],
+        )
+
+
+def rent_roll_directory(app: Flask) -> Path:
+    return Path(app.config.get("RENT_ROLL_DIR") or Path(app.instance_path) / "rent_rolls")
+
+
+def get_job(output_dir: Path, job_id: str) -> Optional[RentRollJob]:
+    """どのワーカーが起動したジョブでも、共有の状態ファイルから読み出す。"""
+    record = JobStore(output_dir).load(job_id)
+    return RentRollJob.from_record(record) if record is not None else None
+
+
+def prune_jobs(output_dir: Path, ttl: float) -> int:
+    """終了から ttl 秒を過ぎたジョブの状態を消し、どのジョブも参照していない古い zip を消す。"""
+    store = JobStore(output_dir)
+    store.prune(ttl)
+    live = {Path(record["path"]) for record in store.records()}
+    cutoff = (datetime.now() - timedelta(seconds=ttl)).timestamp()
+    removed = 0
+    # 状態ファイルを失ったまま残った zip も、作成から ttl 秒を過ぎていれば消す。
+    for path in output_dir.glob("rent_roll_*.zip"):
+        if path not in live and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def start_rent_roll_job(
+    app: Flask,
+    engine: Engine,
+    month: date,
+    workers: Optional[int] = None,
+    organization: Optional[str] = None,
+) -> RentRollJob:
+    """バックグラウンドスレッドでレントロールを生成し、ジョブを即座に返す。
+
+    プロセスプールを使う重い処理なので、組織ごとに 1 件、全体で RENT_ROLL_MAX_JOBS 件までしか
+    同時に動かさない。上限に達していれば JobLimitReached を送出する。
+    """
+    output_dir = rent_roll_directory(app)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    prune_jobs(output_dir, app.config["RENT_ROLL_JOB_TTL"])
+    store = JobStore(output_dir)
+    job_id = uuid.uuid4().hex
+    job = RentRollJob(
+        id=job_id,
+        month=month,
+        path=output_dir / f"rent_roll_{month:%Y-%m}_{job_id}.zip",
+        organization=organization,
+    )
+    with store.locked():
+        active = store.active()
+        if any(record["organization"] == organization for record in active):
+            raise JobLimitReached("この組織のレントロールは生成中です。終わってからもう一度実行してください。")
+        if len(active) >= app.config["RENT_ROLL_MAX_JOBS"]:
+            raise JobLimitReached(f"同時に生成できるレントロールは {app.config['RENT_ROLL_MAX_JOBS']} 件までです。")
+        store.save(job.to_record())
+
+    def progress(done: int, total: int, _name: str) -> None:
+        job.done, job.total = done, total
+        store.save(job.to_record())
+
+    def run() -> None:
+        job.state = "running"
+        store.save(job.to_record())
+        try:
+            results = generate_rent_rolls(engine, month, job.path, workers=workers, progress=progress)
+            job.total = job.done = len(results)
+            job.state = "finished"
+        except Exception as exc:  # noqa: BLE001 - ジョブの失敗内容は状態として返す
+            app.logger.exception("rent roll job %s failed", job_id)
+            job.state = "failed"
+            job.error = str(exc)
+        finally:
+            job.finished_at = datetime.now()
+            store.save(job.to_record())
+
+    threading.Thread(target=run, name=f"rent-roll-{job_id[:8]}", daemon=True).start()
+    return job
@@ -0,0 +1,92 @@
+"""アプリのプロセス内で定期ジョブを実行する簡易スケジューラ。
+
+ジョブは最初のリクエストを受けたプロセスで起動する。複数ワーカー構成では
+ワーカーごとに実行されるため、登録するジョブは何度実行しても結果が変わらない
+（冪等な）処理に限る。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from flask import Flask
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    interval: float
+    func: Callable[[], object]
+    next_run: float = 0.0
+
+
+class Scheduler:
+    """登録したジョブを interval 秒ごとにアプリコンテキスト内で呼び出す。"""
+
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+        self.jobs: list[ScheduledJob] = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def add_job(self, name: str, interval: float, func: Callable[[], object]) -> ScheduledJob:
+        job = ScheduledJob(name=name, interval=interval, func=func)
+        self.jobs.append(job)
+        return job
+
+    def run_pending(self, now: Optional[float] = None) -> list[str]:
+        """実行時刻を過ぎたジョブを順に実行し、実行したジョブ名を返す。"""
+        now = time.monotonic() if now is None else now
+        executed = []
+        for job in self.jobs:
+            if job.next_run > now:
+                continue
+            job.next_run = now + job.interval
+            try:
+                with self.app.app_context():
+                    result = job.func()
+                self.app.logger.info("scheduled job %s finished: %s", job.name, result)
+            except Exception:  # noqa: BLE001 - 失敗しても次回の実行は続ける
+                self.app.logger.exception("scheduled job %s failed", job.name)
+            executed.append(job.name)
+        return executed
+
+    def _running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def start(self) -> None:
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_pending()
+            next_run = min((job.next_run for job in self.jobs), default=time.monotonic() + 60)
+            self._stop.wait(max(next_run - time.monotonic(), 1.0))
+
+
+def init_scheduler(app: Flask) -> Scheduler:
+    """スケジューラを登録し、有効なら最初のリクエストでスレッドを起動する。"""
+    scheduler = Scheduler(app)
+    app.extensions["scheduler"] = scheduler
+    if app.config["SCHEDULER_ENABLED"]:
+        app.before_request(scheduler.start)
+    return scheduler
@@ -0,0 +1,230 @@
+"""本番向けの prefork サーバー（flask serve）。
+
+親プロセスでアプリを読み込み、全モジュールの import・Jinja テンプレートのコンパイル・
+参照データキャッシュの準備を済ませてから待ち受けソケットを開いたまま fork する。
+子プロセスは親から受け継いだ DB 接続を使わないよう Engine を破棄してから処理を始め、
+max_requests 件を処理したら終了する。親は終了した子を検知して補充するので、
+デプロイ直後や入れ替え直後の最初のリクエストで遅延が跳ねない。
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import pkgutil
+import random
+import signal
+import socket
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import sqlalchemy as sa
+from flask import Flask
+from werkzeug.serving import BaseWSGIServer
+
+from .extensions import db
+from .partitioning import use_organization
+from .reference_data import property_choices, tenant_count, units_by_property
+
+# 子プロセスが停止要求を確認する間隔（秒）。
+POLL_INTERVAL = 0.5
+
+
+@dataclass
+class WarmupReport:
+    modules: int
+    templates: int
+    organizations: int
+    elapsed: float
+
+
+def import_all_modules() -> list[str]:
+    """app パッケージ配下（Blueprint・モデル・CLI から遅延 import するモジュール）をすべて読み込む。"""
+    package = importlib.import_module(__package__)
+    names = [info.name for info in pkgutil.walk_packages(package.__path__, f"{__package__}.")]
+    for name in names:
+        importlib.import_module(name)
+    return names
+
+
+def compile_templates(app: Flask) -> int:
+    """全テンプレートをコンパイルして Jinja 環境のキャッシュへ載せ、件数を返す。"""
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def warm_caches(app: Flask) -> int:
+    """共通 DB と各組織のパーティションで参照データを読み、キャッシュしたパーティション数を返す。"""
+    with app.app_context():
+        organizations = [None, *app.extensions["partitions"].organizations()]
+    for organization in organizations:
+        with app.app_context(), use_organization(organization):
+            property_choices()
+            units_by_property()
+            tenant_count()
+    return len(organizations)
+
+
+def warm_up(app: Flask) -> WarmupReport:
+    """fork 前の準備。DB に届かない場合もキャッシュの準備だけを諦めて起動は続ける。"""
+    started = time.perf_counter()
+    modules = import_all_modules()
+    templates = compile_templates(app)
+    try:
+        organizations = warm_caches(app)
+    except sa.exc.SQLAlchemyError:
+        app.logger.exception("cache warmup failed")
+        organizations = 0
+    return WarmupReport(len(modules), templates, organizations, time.perf_counter() - started)
+
+
+def dispose_engines(app: Flask, close: bool = True) -> None:
+    """共通 DB と組織パーティションの接続プールを破棄する。
+
+    fork 直後の子では close=False にして、親と共有しているソケットを閉じずにプールだけを捨てる。
+    """
+    with app.app_context():
+        engines = [db.engine, *app.extensions["partitions"].engines().values()]
+    for engine in engines:
+        engine.dispose(close=close)
+
+
+class PreforkServer:
+    """待ち受けソケットを共有する子プロセスを workers 個維持する。"""
+
+    def __init__(
+        self,
+        app: Flask,
+        host: str,
+        port: int,
+        workers: int,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        graceful_timeout: float = 30.0,
+    ) -> None:
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.socket: Optional[socket.socket] = None
+        self.children: dict[int, int] = {}
+        self._stopping = False
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.socket.getsockname()[:2]
+
+    def bind(self) -> tuple[str, int]:
+        """待ち受けソケットを開く。子は同じソケットで accept し、空振りは無視する。"""
+        if self.socket is None:
+            family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+            self.socket = socket.socket(family, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.socket.bind((self.host, self.port))
+            self.socket.listen(128)
+            # 複数の子が同じ接続で起こされても、accept できなかった側はすぐ待ちに戻る。
+            self.socket.setblocking(False)
+        return self.address
+
+    def run(self) -> None:
+        """親プロセスの本体。停止シグナルを受けるまで子の終了を検知して補充する。"""
+        self.bind()
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        # fork の前に親の接続を閉じ、子へ開いた接続を持ち込まない。
+        dispose_engines(self.app)
+        try:
+            while not self._stopping:
+                while len(self.children) < self.workers and not self._stopping:
+                    self._spawn(len(self.children))
+                self._reap(block=False)
+                time.sleep(POLL_INTERVAL)
+        finally:
+            self._stop_children()
+            self.socket.close()
+
+    def _request_stop(self, _signum, _frame) -> None:
+        self._stopping = True
+
+    def _spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                self._serve_in_worker()
+                code = 0
+            except BaseException:  # noqa: BLE001 - 子の例外は親の後始末へ伝えない
+                self.app.logger.exception("worker %s crashed", os.getpid())
+            finally:
+                os._exit(code)
+        self.children[pid] = index
+
+    def _reap(self, block: bool) -> None:
+        while self.children:
+            try:
+                pid, _status = os.waitpid(-1, 0 if block else os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            self.children.pop(pid, None)
+            if block:
+                return
+
+    def _stop_children(self) -> None:
+        for pid in list(self.children):
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self._reap(block=False)
+            time.sleep(0.05)
+        for pid in list(self.children):
+            os.kill(pid, signal.SIGKILL)
+        while self.children:
+            self._reap(block=True)
+
+    def _serve_in_worker(self) -> None:
+        stopping = False
+
+        def stop(_signum, _frame) -> None:
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # 親から受け継いだプールは捨て、接続は子で開き直す。
+        dispose_engines(self.app, close=False)
+
+        handled = 0
+
+        def counted(environ, start_response):
+            nonlocal handled
+            handled += 1
+            return self.app(environ, start_response)
+
+        server = BaseWSGIServer(self.host, self.port, counted, fd=self.socket.fileno())
+        server.timeout = POLL_INTERVAL
+        limit = self.max_requests
+        if limit and self.max_requests_jitter:
+            # 子が一斉に入れ替わらないよう上限を少しずつずらす。
+            limit += random.randint(0, self.max_requests_jitter)
+        try:
+            while not stopping and (not limit or handled < limit):
+                server.handle_request()
+        finally:
+            server.server_close()
+            audit = self.app.extensions.get("audit")
+            if audit is not None:
+                audit.shutdown()
+            # 入れ替わるワーカーの計測値は集計用ファイルへ移し、ワーカーごとのファイルを残さない。
+            metrics = self.app.extensions.get("metrics")
+            if metrics is not None:
+                metrics.retire()
+            dispose_engines(self.app)
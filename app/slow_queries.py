@@ -0,0 +1,168 @@
+"""しきい値を超えた SQL を実行計画付きで JSONL に記録するスロークエリログ。
+
+記録する SQL は空白と IN 句のプレースホルダ数を正規化し、パラメータは型名だけを残して
+値を伏せる。実行計画は同じ接続の DBAPI カーソルで EXPLAIN QUERY PLAN を取り直したもの。
+計画を取るのは SQLite だけ。サーバー DB では EXPLAIN の失敗が呼び出し元のトランザクションを
+中断させる（PostgreSQL など）ため、所要時間と SQL だけを記録し plan は null にする。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from flask import Flask, current_app, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .partitioning import current_organization
+
+_STARTED_KEY = "slow_query_started"
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))+\s*\)")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+
+def normalize_sql(statement: str) -> str:
+    """パラメータ数やリテラルの違いを吸収し、同じ形の SQL を同じ文字列にする。"""
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    return _PLACEHOLDER_LIST.sub("(?, ...)", normalized)
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """値を型名に置き換え、個人情報をログに残さない。"""
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return None
+
+
+def _explain(conn, statement: str, parameters: Any) -> Optional[list[str]]:
+    if conn.dialect.name != "sqlite" or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    # Connection.execute を使うとイベントが再帰するため、DBAPI カーソルで直接実行する。
+    # SQLite の EXPLAIN QUERY PLAN は失敗してもトランザクションに影響しない。
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters or ())
+        rows = cursor.fetchall()
+    except Exception as exc:  # noqa: BLE001 - 計画が取れなくても本来のクエリは止めない
+        return [f"(EXPLAIN に失敗しました: {exc})"]
+    finally:
+        cursor.close()
+    return [row[-1] for row in rows]
+
+
+class SlowQueryLog:
+    """しきい値と出力先（サイズでローテーションする JSONL）をまとめて持つ。"""
+
+    def __init__(self, app: Flask) -> None:
+        self.threshold = app.config["SLOW_QUERY_THRESHOLD_MS"] / 1000
+        self.path = Path(app.config.get("SLOW_QUERY_LOG") or Path(app.instance_path) / "slow_queries.jsonl")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # ロガー階層には載せず、ローテーションとスレッド間の排他だけハンドラに任せる。
+        self._handler = RotatingFileHandler(
+            self.path,
+            maxBytes=app.config["SLOW_QUERY_LOG_MAX_BYTES"],
+            backupCount=app.config["SLOW_QUERY_LOG_BACKUPS"],
+            encoding="utf-8",
+            delay=True,
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def write(self, entry: dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        self._handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+
+    def close(self) -> None:
+        self._handler.close()
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, statement, parameters, _context, executemany) -> None:
+    started = conn.info.get(_STARTED_KEY)
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    if not has_app_context() or "slow_queries" not in current_app.extensions:
+        return
+    log = current_app.extensions["slow_queries"]
+    if duration < log.threshold:
+        return
+    log.write(
+        {
+            "logged_at": datetime.now().isoformat(timespec="seconds"),
+            "duration_ms": round(duration * 1000, 3),
+            "sql": normalize_sql(statement),
+            "parameters": None if executemany else redact_parameters(parameters),
+            "executemany": executemany,
+            "endpoint": request.endpoint if has_request_context() else None,
+            "organization": current_organization(),
+            "plan": None if executemany else _explain(conn, statement, parameters),
+        },
+    )
+
+
+def init_slow_query_log(app: Flask) -> Optional[SlowQueryLog]:
+    """SLOW_QUERY_ENABLED のときだけ全 Engine の実行時間を計測する。"""
+    if not app.config["SLOW_QUERY_ENABLED"]:
+        return None
+    log = SlowQueryLog(app)
+    app.extensions["slow_queries"] = log
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    return log
+
+
+def read_entries(path: Path) -> Iterator[dict]:
+    """ローテーション済みのファイル（.1, .2, ...）も含めて記録を読み出す。"""
+    for candidate in sorted(path.parent.glob(f"{path.name}*"), reverse=True):
+        with candidate.open(encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+@dataclass
+class SlowQueryGroup:
+    sql: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    endpoints: set[str] = field(default_factory=set)
+    plan: Optional[list[str]] = None
+
+    @property
+    def average_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+def summarize(entries: Iterator[dict]) -> list[SlowQueryGroup]:
+    """SQL の形ごとに集計し、合計時間の長い順に並べる。"""
+    groups: dict[str, SlowQueryGroup] = {}
+    for entry in entries:
+        group = groups.setdefault(entry["sql"], SlowQueryGroup(sql=entry["sql"]))
+        group.count += 1
+        group.total_ms += entry["duration_ms"]
+        if entry["duration_ms"] >= group.max_ms:
+            group.max_ms = entry["duration_ms"]
+            group.plan = entry.get("plan")
+        if entry.get("endpoint"):
+            group.endpoints.add(entry["endpoint"])
+    return sorted(groups.values(), key=lambda group: group.total_ms, reverse=True)
@@ -0,0 +1,70 @@
+"""物件名・入居者名の並べ替え用キー（name_sort_key 列）を作るモジュール。
+
+名前をそのまま比べると全角・半角やカタカナ・ひらがなの違いで並びが崩れ、
+索引も使えないため一覧のたびにソートが発生する。保存時に NFKC 正規化・
+カタカナのひらがな化・大文字小文字の畳み込みを施したキーを列へ書き込み、
+一覧はその索引の順で読む。pykakasi があれば漢字も読み（ひらがな）に直す。
+"""
+
+from __future__ import annotations
+
+import unicodedata
+
+from flask import Flask
+from sqlalchemy import event, select, update
+
+from .extensions import db
+from .models import Property, Tenant
+
+try:  # pykakasi は任意依存。未インストールなら漢字は文字コード順のまま並ぶ。
+    import pykakasi
+except ImportError:  # pragma: no cover - 環境依存
+    pykakasi = None
+
+# name_sort_key 列の長さ。
+SORT_KEY_LENGTH = 255
+SORTED_MODELS = (Property, Tenant)
+# カタカナ（ァ〜ヶ）からひらがな（ぁ〜ゖ）への対応。
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+_kakasi = pykakasi.kakasi() if pykakasi is not None else None
+
+
+def _reading(text: str) -> str:
+    if _kakasi is None:
+        return text
+    return "".join(item["hira"] for item in _kakasi.convert(text))
+
+
+def sort_key(name: str | None) -> str:
+    """並べ替え用キー。全角英数・半角カナを揃え、カタカナはひらがなに寄せる。"""
+    text = unicodedata.normalize("NFKC", name or "")
+    text = _reading(" ".join(text.split()))
+    return text.translate(_KATAKANA_TO_HIRAGANA).casefold()[:SORT_KEY_LENGTH]
+
+
+def _fill_sort_key(target, value, _oldvalue, _initiator):
+    target.name_sort_key = sort_key(value)
+    return value
+
+
+def rebuild_sort_keys(batch_size: int = 1000) -> int:
+    """全件のキーを作り直し、変わった行数を返す。正規化の規則や辞書を変えたあとに使う。"""
+    changed = 0
+    for model in SORTED_MODELS:
+        updates = []
+        for row_id, name, current in db.session.execute(select(model.id, model.name, model.name_sort_key)):
+            key = sort_key(name)
+            if key != current:
+                updates.append({"id": row_id, "name_sort_key": key})
+        for start in range(0, len(updates), batch_size):
+            db.session.execute(update(model), updates[start : start + batch_size])
+        changed += len(updates)
+    db.session.commit()
+    return changed
+
+
+def init_sort_keys(app: Flask) -> None:
+    """name への代入のたびに name_sort_key を埋めるフックを登録する。"""
+    for model in SORTED_MODELS:
+        if not event.contains(model.name, "set", _fill_sort_key):
+            event.listen(model.name, "set", _fill_sort_key, retval=True)
@@ -0,0 +1,29 @@
+"""未計画の遅延ロード（N+1）を検出する strict loading モード。
+
+STRICT_LOADING が有効な間は、ORM の SELECT すべてに raiseload("*") を付ける。
+joinedload / selectinload などで明示したリレーションはそのまま読み込まれ、
+それ以外のリレーションに SQL が必要なアクセスをすると例外になる。
+テスト設定で有効にし、ルートやテンプレートに紛れ込んだ遅延ロードを落とす。
+"""
+
+from __future__ import annotations
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, raiseload
+
+from .partitioning import PartitionedSession
+
+
+def _apply_raiseload(execute_state: ORMExecuteState) -> None:
+    if not execute_state.is_select or execute_state.is_column_load:
+        return
+    if has_app_context() and current_app.config.get("STRICT_LOADING"):
+        # 識別マップから解決できる多対一は SQL を発行しないので許可する。
+        execute_state.statement = execute_state.statement.options(raiseload("*", sql_only=True))
+
+
+def init_strict_loading(app: Flask) -> None:
+    app.config.setdefault("STRICT_LOADING", False)
+    if not event.contains(PartitionedSession, "do_orm_execute", _apply_raiseload):
+        event.listen(PartitionedSession, "do_orm_execute", _apply_raiseload)
@@ -0,0 +1,142 @@
+"""同一人物と思われる入居者の候補探しと統合。
+
+全件を総当たりで比べる代わりに、保存時に正規化したブロッキングキー
+（小文字化したメールアドレス・数字だけの電話番号・全半角を揃えた氏名）を索引付きの列に
+持たせ、キーごとの GROUP BY ... HAVING count(*) > 1 で同じキーを持つ行だけを拾う。
+複数のキーでつながった候補は union-find で 1 グループにまとめる。統合は契約の
+tenant_id を一括で付け替えてから重複側の入居者を削除する。
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from dataclasses import dataclass
+from itertools import groupby
+
+from flask import Flask
+from sqlalchemy import delete, event, func, select, update
+
+from .audit import ACTION_MERGE, record_bulk_changes, record_deleted_rows
+from .extensions import db
+from .models import Lease, LeaseArchive, Tenant
+
+# 1 つのキーにこれより多くの入居者が集まる場合は、ありふれた値とみなして候補にしない。
+DEFAULT_MAX_BLOCK_SIZE = 20
+# これより短い電話番号（"000" などの仮入力）はキーにしない。
+MIN_PHONE_DIGITS = 8
+# 判定に使うキー（理由の名前, 列）。
+BLOCKING_KEYS = (
+    ("email", Tenant.email_key),
+    ("phone", Tenant.phone_key),
+    ("name", Tenant.name_sort_key),
+)
+REASON_LABELS = {"email": "メールアドレス", "phone": "電話番号", "name": "氏名"}
+
+
+@dataclass(frozen=True)
+class DuplicateGroup:
+    """同一人物の候補。tenant_ids は昇順で、reasons は一致したキーの名前。"""
+
+    tenant_ids: tuple[int, ...]
+    reasons: tuple[str, ...]
+
+
+def email_key(email: str | None) -> str:
+    return unicodedata.normalize("NFKC", email or "").strip().lower()
+
+
+def phone_key(phone: str | None) -> str:
+    digits = "".join(char for char in unicodedata.normalize("NFKC", phone or "") if char.isdigit())
+    return digits if len(digits) >= MIN_PHONE_DIGITS else ""
+
+
+def _fill_email_key(target, value, _oldvalue, _initiator):
+    target.email_key = email_key(value)
+    return value
+
+
+def _fill_phone_key(target, value, _oldvalue, _initiator):
+    target.phone_key = phone_key(value)
+    return value
+
+
+def find_duplicate_groups(max_block_size: int = DEFAULT_MAX_BLOCK_SIZE) -> list[DuplicateGroup]:
+    """ブロッキングキーが一致する入居者をグループにして、最小の id 順に返す。"""
+    parent: dict[int, int] = {}
+
+    def root(tenant_id: int) -> int:
+        parent.setdefault(tenant_id, tenant_id)
+        while parent[tenant_id] != tenant_id:
+            parent[tenant_id] = parent[parent[tenant_id]]
+            tenant_id = parent[tenant_id]
+        return tenant_id
+
+    links: list[tuple[str, int]] = []
+    for reason, column in BLOCKING_KEYS:
+        # 索引順に走査するだけで重複したキーが分かり、行どうしの比較は要らない。
+        blocks = (
+            select(column.label("key"))
+            .where(column != "")
+            .group_by(column)
+            .having(func.count() > 1, func.count() <= max_block_size)
+            .subquery()
+        )
+        rows = db.session.execute(select(column, Tenant.id).join(blocks, column == blocks.c.key).order_by(column, Tenant.id))
+        for _key, block in groupby(rows, key=lambda row: row[0]):
+            first, *others = (tenant_id for _key, tenant_id in block)
+            for other in others:
+                parent[root(other)] = root(first)
+            links.append((reason, first))
+
+    members: dict[int, list[int]] = {}
+    for tenant_id in parent:
+        members.setdefault(root(tenant_id), []).append(tenant_id)
+    reasons: dict[int, set[str]] = {}
+    for reason, tenant_id in links:
+        reasons.setdefault(root(tenant_id), set()).add(reason)
+    order = [reason for reason, _column in BLOCKING_KEYS]
+    groups = [
+        DuplicateGroup(tuple(sorted(ids)), tuple(reason for reason in order if reason in reasons[group_root]))
+        for group_root, ids in members.items()
+    ]
+    return sorted(groups, key=lambda group: group.tenant_ids[0])
+
+
+def merge_tenants(target_id: int, duplicate_ids: list[int]) -> int:
+    """重複側の契約（アーカイブ分を含む）を target に付け替えて重複側を削除し、付け替えた件数を返す。"""
+    duplicate_ids = sorted(set(duplicate_ids) - {target_id})
+    if not duplicate_ids:
+        return 0
+    if db.session.get(Tenant, target_id) is None:
+        raise LookupError(f"tenant {target_id} does not exist")
+    moved = 0
+    for model, lease_id in ((Lease, Lease.id), (LeaseArchive, LeaseArchive.lease_id)):
+        rows = db.session.execute(select(lease_id, model.tenant_id).where(model.tenant_id.in_(duplicate_ids))).all()
+        if not rows:
+            continue
+        db.session.execute(
+            update(model).where(model.tenant_id.in_(duplicate_ids)).values(tenant_id=target_id),
+            execution_options={"synchronize_session": False},
+        )
+        for old_tenant_id, grouped in groupby(sorted(rows, key=lambda row: row[1]), key=lambda row: row[1]):
+            ids = [row[0] for row in grouped]
+            record_bulk_changes(db.session, Lease, ids, ACTION_MERGE, {"tenant_id": (old_tenant_id, target_id)})
+        moved += len(rows)
+    deleted = (
+        db.session.execute(
+            delete(Tenant).where(Tenant.id.in_(duplicate_ids)).returning(*Tenant.__table__.columns),
+            execution_options={"synchronize_session": False},
+        )
+        .mappings()
+        .all()
+    )
+    record_deleted_rows(db.session, Tenant, deleted)
+    db.session.commit()
+    return moved
+
+
+def init_tenant_duplicates(app: Flask) -> None:
+    """メールアドレス・電話番号への代入のたびにブロッキングキーを埋めるフックを登録する。"""
+    for attribute, listener in ((Tenant.email, _fill_email_key), (Tenant.phone, _fill_phone_key)):
+        if not event.contains(attribute, "set", listener):
+            event.listen(attribute, "set", listener, retval=True)
@@ -0,0 +1,108 @@
+"""号室（unit テーブル）を入居者・契約の保存に合わせて用意するモジュール。
+
+画面や CLI は従来どおり物件と号室の文字列を入居者・契約へ設定する。フラッシュ直前に
+(property_id, unit_number) から号室を引き当て、無ければ作成して unit_id を埋めるので、
+号室の一覧や空室判定は入居者を走査せず unit テーブルの索引で引ける。
+号室の打ち間違いを直したときなど、付け替えで参照が無くなった号室はフラッシュ後に削除する。
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional, Union
+
+import sqlalchemy as sa
+from flask import Flask
+from sqlalchemy import event
+
+from .models import Lease, LeaseArchive, Property, Tenant, Unit
+from .partitioning import PartitionedSession
+
+# 号室を参照するモデル。どちらも property_id / unit_number / unit を持つ。
+UNIT_OWNERS = (Tenant, Lease)
+# unit_id で号室を参照するモデル（削除してよいかの判定に使う）。
+UNIT_REFERENCES = (Tenant, Lease, LeaseArchive)
+_WATCHED_ATTRIBUTES = ("property_id", "property", "unit_number")
+# 付け替えで離れた号室の id を before_flush から after_flush へ渡す session.info のキー。
+_LEFT_UNITS_KEY = "units_left"
+
+
+def _needs_unit(obj) -> bool:
+    state = sa.inspect(obj)
+    if state.pending:
+        return True
+    return any(state.attrs[name].history.has_changes() for name in _WATCHED_ATTRIBUTES)
+
+
+def _owner_property(obj) -> Union[Property, int, None]:
+    """付け替え先の物件。relationship で設定されていればそちら（未採番の物件もあり得る）。"""
+    added = sa.inspect(obj).attrs.property.history.added
+    if added and added[0] is not None:
+        property_obj = added[0]
+        return property_obj.id if property_obj.id is not None else property_obj
+    return obj.property_id
+
+
+def _remember_left_unit(session, obj, unit: Optional[Unit]) -> None:
+    if obj.unit_id is not None and (unit is None or unit.id != obj.unit_id):
+        session.info.setdefault(_LEFT_UNITS_KEY, set()).add(obj.unit_id)
+
+
+def _resolve_units(session, _flush_context, _instances) -> None:
+    resolved: dict[tuple, Optional[Unit]] = {}
+    targets = [obj for obj in (*session.new, *session.dirty) if isinstance(obj, UNIT_OWNERS) and _needs_unit(obj)]
+    if not targets:
+        return
+    with session.no_autoflush:
+        for obj in targets:
+            owner = _owner_property(obj)
+            unit_number = obj.unit_number
+            if owner is None or not unit_number:
+                _remember_left_unit(session, obj, None)
+                obj.unit = None
+                continue
+            key = (owner if isinstance(owner, int) else id(owner), unit_number)
+            if key not in resolved:
+                unit = None
+                if isinstance(owner, int):
+                    unit = session.scalars(
+                        sa.select(Unit).where(Unit.property_id == owner, Unit.unit_number == unit_number),
+                    ).first()
+                if unit is None:
+                    unit = Unit(unit_number=unit_number)
+                    if isinstance(owner, int):
+                        unit.property_id = owner
+                    else:
+                        unit.property = owner
+                    session.add(unit)
+                resolved[key] = unit
+            _remember_left_unit(session, obj, resolved[key])
+            obj.unit = resolved[key]
+
+
+def prune_orphan_units(session, unit_ids: Optional[Iterable[int]] = None) -> int:
+    """入居者・契約・アーカイブのどこからも参照されない号室を削除し、件数を返す。
+
+    unit_ids を省くと全号室が対象。入居者の削除で空いた号室は、参照が残っていなくても
+    付け替えと違って本物の空室なので、フラッシュ後の自動削除の対象にはしない。
+    """
+    stmt = sa.delete(Unit).where(*(~sa.exists().where(model.unit_id == Unit.id) for model in UNIT_REFERENCES))
+    if unit_ids is not None:
+        unit_ids = list(unit_ids)
+        if not unit_ids:
+            return 0
+        stmt = stmt.where(Unit.id.in_(unit_ids))
+    return session.execute(stmt, execution_options={"synchronize_session": "fetch"}).rowcount
+
+
+def _prune_left_units(session, _flush_context) -> None:
+    left = session.info.pop(_LEFT_UNITS_KEY, None)
+    if left:
+        prune_orphan_units(session, left)
+
+
+def init_units(app: Flask) -> None:
+    """入居者・契約のフラッシュ前に号室を解決し、フラッシュ後に離れた号室を片付けるフックを登録する。"""
+    if not event.contains(PartitionedSession, "before_flush", _resolve_units):
+        event.listen(PartitionedSession, "before_flush", _resolve_units)
+    if not event.contains(PartitionedSession, "after_flush", _prune_left_units):
+        event.listen(PartitionedSession, "after_flush", _prune_left_units)
@@ -0,0 +1,245 @@
+"""一覧画面用の軽量な行オブジェクトと、それを組み立てる列指定の select。
+
+一覧テンプレートが読むのは数列だけなので、ORM オブジェクトを生成して
+アイデンティティマップで追跡する代わりに、必要な列だけを取得して
+__slots__ 付きのクラスへ詰める。編集フォームなど更新を伴う処理は従来どおり ORM を使う。
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Select, literal, null, or_, select, union_all
+
+from .extensions import db
+from .models import Lease, LeaseArchive, LeaseStatus, Property, Tenant, Unit
+
+
+class PropertyRow:
+    __slots__ = ("id", "name", "address", "note")
+
+    def __init__(self, id: int, name: str, address: str, note: Optional[str]) -> None:  # noqa: A002
+        self.id = id
+        self.name = name
+        self.address = address
+        self.note = note
+
+
+class TenantRow:
+    __slots__ = ("id", "name", "email", "phone", "property_id", "unit_number", "property_name")
+
+    def __init__(
+        self,
+        id: int,  # noqa: A002
+        name: str,
+        email: str,
+        phone: Optional[str],
+        property_id: Optional[int],
+        unit_number: Optional[str],
+        property_name: Optional[str],
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.email = email
+        self.phone = phone
+        self.property_id = property_id
+        self.unit_number = unit_number
+        self.property_name = property_name
+
+
+class LeaseRow:
+    """契約一覧の 1 行。空室行（is_vacancy）は契約を持たず id・入居者・賃料などが None になる。
+
+    アーカイブ済みの行（is_archived）の id は移動前の lease.id。
+    """
+
+    __slots__ = (
+        "id",
+        "property_id",
+        "property_name",
+        "unit_number",
+        "tenant_id",
+        "tenant_name",
+        "rent",
+        "status",
+        "start_date",
+        "end_date",
+        "is_vacancy",
+        "is_archived",
+    )
+
+    def __init__(
+        self,
+        id: Optional[int],  # noqa: A002
+        property_id: int,
+        property_name: str,
+        unit_number: Optional[str],
+        tenant_id: Optional[int],
+        tenant_name: Optional[str],
+        rent: Optional[Decimal],
+        status: str,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        is_vacancy: bool = False,
+        is_archived: bool = False,
+    ) -> None:
+        self.id = id
+        self.property_id = property_id
+        self.property_name = property_name
+        self.unit_number = unit_number
+        self.tenant_id = tenant_id
+        self.tenant_name = tenant_name
+        self.rent = rent
+        self.status = status
+        self.start_date = start_date
+        self.end_date = end_date
+        self.is_vacancy = is_vacancy
+        self.is_archived = is_archived
+
+
+def property_rows() -> list[PropertyRow]:
+    stmt = select(Property.id, Property.name, Property.address, Property.note).order_by(Property.name_sort_key, Property.id)
+    return [PropertyRow(*row) for row in db.session.execute(stmt)]
+
+
+def tenant_rows(
+    property_id: Optional[int] = None,
+    order_by_property: bool = True,
+    tenant_ids: Optional[list[int]] = None,
+) -> list[TenantRow]:
+    """入居者一覧。order_by_property=False なら入居者名順（契約フォームの候補用）。
+
+    tenant_ids を渡すとその入居者だけに絞る（重複候補の確認画面用）。
+
+    並び順は name_sort_key の索引に沿わせ、同じキーは id で決める。
+    """
+    stmt = select(
+        Tenant.id,
+        Tenant.name,
+        Tenant.email,
+        Tenant.phone,
+        Tenant.property_id,
+        Tenant.unit_number,
+        Property.name,
+    ).outerjoin(Property, Tenant.property_id == Property.id)
+    if not order_by_property:
+        stmt = stmt.order_by(Tenant.name_sort_key, Tenant.id)
+    elif property_id is None:
+        stmt = stmt.order_by(Property.name_sort_key, Property.id, Tenant.unit_number, Tenant.name_sort_key, Tenant.id)
+    else:
+        # 1 物件に絞るときは (property_id, unit_number, name_sort_key) の索引順そのまま。
+        stmt = stmt.order_by(Tenant.unit_number, Tenant.name_sort_key, Tenant.id)
+    if property_id is not None:
+        stmt = stmt.where(Tenant.property_id == property_id)
+    if tenant_ids is not None:
+        stmt = stmt.where(Tenant.id.in_(tenant_ids))
+    return [TenantRow(*row) for row in db.session.execute(stmt)]
+
+
+def lease_rows(
+    property_id: Optional[int] = None,
+    include_archived: bool = False,
+    include_vacancies: bool = False,
+) -> list[LeaseRow]:
+    """契約一覧。include_archived なら lease_archive の行も UNION ALL で並べる。
+
+    include_vacancies なら現在有効な契約（未解約で終了日が今日以降）の無い号室を空室行として
+    同じ文で併せて返す。契約の有無は lease.unit_id の索引で号室ごとに引くので、入居者は走査しない。
+    """
+    if not include_archived and not include_vacancies:
+        stmt = (
+            select(
+                Lease.id,
+                Lease.property_id,
+                Property.name,
+                Lease.unit_number,
+                Lease.tenant_id,
+                Tenant.name,
+                Lease.rent,
+                Lease.status,
+                Lease.start_date,
+                Lease.end_date,
+            )
+            .join(Property, Lease.property_id == Property.id)
+            .join(Tenant, Lease.tenant_id == Tenant.id)
+            .order_by(Property.name_sort_key, Property.id, Lease.unit_number, Lease.start_date.desc())
+        )
+        if property_id is not None:
+            stmt = stmt.where(Lease.property_id == property_id)
+        return [LeaseRow(*row) for row in db.session.execute(stmt)]
+
+    def columns(model, lease_id, archived: bool) -> Select:
+        stmt = select(
+            lease_id.label("id"),
+            model.property_id,
+            Property.name.label("property_name"),
+            model.unit_number,
+            model.tenant_id,
+            Tenant.name.label("tenant_name"),
+            model.rent,
+            model.status,
+            model.start_date,
+            model.end_date,
+            literal(False).label("is_vacancy"),
+            literal(archived).label("is_archived"),
+            Property.name_sort_key.label("property_sort_key"),
+        )
+        stmt = stmt.join(Property, model.property_id == Property.id).join(Tenant, model.tenant_id == Tenant.id)
+        if property_id is not None:
+            stmt = stmt.where(model.property_id == property_id)
+        return stmt
+
+    def vacancies() -> Select:
+        # 解約済み・終了日を過ぎた契約しか無い号室は空室として扱う。
+        has_lease = (
+            select(Lease.id)
+            .where(
+                Lease.unit_id == Unit.id,
+                Lease.status != LeaseStatus.TERMINATED,
+                or_(Lease.end_date.is_(None), Lease.end_date >= date.today()),
+            )
+            .exists()
+        )
+        stmt = (
+            select(
+                null().label("id"),
+                Unit.property_id,
+                Property.name.label("property_name"),
+                Unit.unit_number,
+                null().label("tenant_id"),
+                null().label("tenant_name"),
+                null().label("rent"),
+                literal("空室").label("status"),
+                null().label("start_date"),
+                null().label("end_date"),
+                literal(True).label("is_vacancy"),
+                literal(False).label("is_archived"),
+                Property.name_sort_key.label("property_sort_key"),
+            )
+            .join(Property, Unit.property_id == Property.id)
+            .where(~has_lease)
+        )
+        if property_id is not None:
+            stmt = stmt.where(Unit.property_id == property_id)
+        return stmt
+
+    parts = [columns(Lease, Lease.id, False)]
+    if include_archived:
+        parts.append(columns(LeaseArchive, LeaseArchive.lease_id, True))
+    if include_vacancies:
+        parts.append(vacancies())
+    rows = union_all(*parts).subquery()
+    # 同じ号室では契約を開始日の新しい順に並べ、空室行はその後ろに置く。
+    stmt = select(rows).order_by(
+        rows.c.property_sort_key,
+        rows.c.property_id,
+        rows.c.unit_number,
+        rows.c.is_vacancy,
+        rows.c.start_date.desc(),
+    )
+    return [
+        LeaseRow(*row[:-3], is_vacancy=bool(row.is_vacancy), is_archived=bool(row.is_archived))
+        for row in db.session.execute(stmt)
+    ]
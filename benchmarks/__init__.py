@@ -0,0 +1 @@
+"""性能計測用スクリプト群（pytest の収集対象外）。"""
@@ -0,0 +1,84 @@
+"""ベンチマークスクリプトで共有するアプリ生成とデータ投入のヘルパー。"""
+
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app import create_app
+from app.extensions import db
+from app.models import Lease, LeaseStatus, Property, Tenant, User
+from config import TestConfig
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+class BenchConfig(TestConfig):
+    TESTING = False
+
+
+def make_app(config_object: type = BenchConfig):
+    """ベンチ用ユーザーを持つ空のアプリを生成する。"""
+    app = create_app(config_object)
+    with app.app_context():
+        db.create_all()
+        user = User(email=BENCH_EMAIL)
+        user.set_password(BENCH_PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+    return app
+
+
+def populate(app, properties: int = 20, units: int = 30, leases_per_unit: int = 2, seed: int = 0) -> None:
+    """物件 × 号室 × 契約の合成データをまとめて投入する。"""
+    rng = random.Random(seed)
+    statuses = list(LeaseStatus.ALL)
+    with app.app_context():
+        property_rows = [
+            {"name": f"ベンチ物件{index:03d}", "address": f"東京都千代田区{index}-1-1", "note": "ベンチマーク用"}
+            for index in range(properties)
+        ]
+        db.session.execute(db.insert(Property), property_rows)
+        property_ids = db.session.scalars(db.select(Property.id).order_by(Property.id)).all()
+
+        tenant_rows = []
+        for property_id in property_ids:
+            for unit_index in range(units):
+                unit = f"{unit_index // 10 + 1}{unit_index % 10 + 1:02d}"
+                tenant_rows.append(
+                    {
+                        "name": f"入居者{property_id}-{unit}",
+                        "email": f"tenant{property_id}-{unit}@example.com",
+                        "phone": f"090-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+                        "property_id": property_id,
+                        "unit_number": unit,
+                    },
+                )
+        db.session.execute(db.insert(Tenant), tenant_rows)
+        tenants = db.session.execute(db.select(Tenant.id, Tenant.property_id, Tenant.unit_number)).all()
+
+        today = date.today()
+        lease_rows = []
+        for tenant_id, property_id, unit in tenants:
+            for lease_index in range(leases_per_unit):
+                start = today - timedelta(days=rng.randint(0, 720) + 365 * lease_index)
+                lease_rows.append(
+                    {
+                        "property_id": property_id,
+                        "tenant_id": tenant_id,
+                        "unit_number": unit,
+                        "rent": Decimal(rng.randint(60, 180)) * Decimal("1000"),
+                        "start_date": start,
+                        "end_date": start + timedelta(days=rng.choice([180, 365, 730])),
+                        "status": rng.choice(statuses),
+                    },
+                )
+        db.session.execute(db.insert(Lease), lease_rows)
+        db.session.commit()
+
+
+def login(client) -> None:
+    response = client.post("/auth/login", data={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    assert response.status_code == 302, response.status_code
@@ -0,0 +1,60 @@
+"""レスポンス圧縮の転送量と 1 レスポンスあたりの CPU コストを計測する。
+
+実行例: python -m benchmarks.bench_compression --properties 20 --units 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.compression import brotli, compress_bytes
+
+from ._common import login, make_app, populate
+
+PATHS = ("/", "/properties", "/tenants", "/leases")
+
+
+def _cpu_per_call(func, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=20)
+    parser.add_argument("--units", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app()
+    populate(app, properties=args.properties, units=args.units)
+    client = app.test_client()
+    login(client)
+
+    variants = [("gzip", level) for level in (1, 6, 9)]
+    if brotli is not None:
+        variants += [("br", level) for level in (1, 4, 9)]
+
+    print(f"{'path':<12}{'encoding':<10}{'bytes':>10}{'ratio':>8}{'cpu ms':>9}{'request ms':>12}")
+    for path in PATHS:
+        body = client.get(path).data
+        plain_cpu = _cpu_per_call(lambda: client.get(path), args.repeat)
+        print(f"{path:<12}{'identity':<10}{len(body):>10}{1.0:>8.2f}{0.0:>9.2f}{plain_cpu * 1000:>12.2f}")
+        for encoding, level in variants:
+            compressed = compress_bytes(body, encoding, level, level)
+            cpu = _cpu_per_call(lambda: compress_bytes(body, encoding, level, level), args.repeat)
+            app.config.update(COMPRESS_LEVEL=level, COMPRESS_BROTLI_LEVEL=level, COMPRESS_ALGORITHMS=(encoding,))
+            request_cpu = _cpu_per_call(
+                lambda: client.get(path, headers={"Accept-Encoding": encoding}),
+                args.repeat,
+            )
+            label = f"{encoding}-{level}"
+            ratio = len(compressed) / len(body)
+            print(f"{'':<12}{label:<10}{len(compressed):>10}{ratio:>8.2f}{cpu * 1000:>9.2f}{request_cpu * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
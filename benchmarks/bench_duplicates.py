@@ -0,0 +1,79 @@
+"""入居者の重複候補探し（ブロッキングキーの GROUP BY）の時間・メモリを計測する。
+
+実行例: python -m benchmarks.bench_duplicates --tenants 500000 --duplicate-rate 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from app.extensions import db
+from app.models import Property, Tenant
+from app.sort_keys import sort_key
+from app.tenant_duplicates import email_key, find_duplicate_groups, phone_key
+
+from ._common import make_app
+
+BATCH_SIZE = 50000
+
+
+def populate_tenants(app, tenants: int, duplicate_rate: float, seed: int = 0) -> None:
+    """一括 INSERT は ORM のフックを通らないため、キー列もここで計算して入れる。"""
+    rng = random.Random(seed)
+    with app.app_context():
+        db.session.execute(db.insert(Property), [{"name": "ベンチ物件", "address": "東京都千代田区1-1-1"}])
+        property_id = db.session.scalar(db.select(Property.id))
+        rows = []
+        for index in range(tenants):
+            name, email, phone = f"入居者{index:07d}", f"tenant{index:07d}@example.com", f"090{index:08d}"
+            if index and rng.random() < duplicate_rate:
+                # 既存の入居者を表記揺れ付きで登録し直したもの。
+                original = rng.randrange(index)
+                name, email, phone = f"ニュウキョシャ{original:07d}", f"Tenant{original:07d}@Example.com", f"090-{original:08d}"
+            rows.append(
+                {
+                    "name": name,
+                    "name_sort_key": sort_key(name),
+                    "email": email,
+                    "email_key": email_key(email),
+                    "phone": phone,
+                    "phone_key": phone_key(phone),
+                    "property_id": property_id,
+                    "unit_number": f"{index % 1000:03d}",
+                },
+            )
+            if len(rows) >= BATCH_SIZE:
+                db.session.execute(db.insert(Tenant), rows)
+                rows.clear()
+        if rows:
+            db.session.execute(db.insert(Tenant), rows)
+        db.session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tenants", type=int, default=100000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    app = make_app()
+    populate_tenants(app, args.tenants, args.duplicate_rate)
+    with app.app_context():
+        tracemalloc.start()
+        started = time.perf_counter()
+        groups = find_duplicate_groups()
+        elapsed = time.perf_counter() - started
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        members = sum(len(group.tenant_ids) for group in groups)
+        print(
+            f"find_duplicate_groups: {args.tenants} 件中 {len(groups)} グループ（{members} 件） "
+            f"{elapsed:.2f} s (最大 {peak / 1024 / 1024:.1f} MiB)",
+        )
+
+
+if __name__ == "__main__":
+    main()
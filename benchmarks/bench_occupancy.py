@@ -0,0 +1,87 @@
+"""稼働行列のベクトル化実装と素朴な契約ループ実装を比較する。
+
+実行例: python -m benchmarks.bench_occupancy --leases 1000000 --months 24
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+
+from app.analytics import LeaseIntervals, compute_occupancy, month_buckets
+
+
+def synthetic_intervals(leases: int, properties: int, units: int, seed: int = 0) -> LeaseIntervals:
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2015-01-01") + rng.integers(0, 365 * 10, leases).astype("timedelta64[D]")
+    length = rng.integers(90, 365 * 3, leases).astype("timedelta64[D]")
+    end = start + length
+    end[rng.random(leases) < 0.1] = np.datetime64("NaT")
+    return LeaseIntervals(
+        property_id=rng.integers(1, properties + 1, leases),
+        unit_number=np.array([f"{value:03d}" for value in rng.integers(1, units + 1, leases)], dtype=object),
+        start_date=start,
+        end_date=end,
+        status=np.full(leases, "active", dtype=object),
+        rent=rng.integers(50, 200, leases).astype(np.float64) * 1000,
+    )
+
+
+def naive_occupancy(intervals: LeaseIntervals, first_month: date, months: int) -> dict:
+    """契約ごと・月ごとに Python で重なりを判定する比較用実装。"""
+    buckets = month_buckets(first_month, months)
+    month_ends = [*buckets[1:], month_buckets(buckets[-1], 2)[1]]
+    occupied: dict[tuple[int, str], list[bool]] = {}
+    revenue: dict[tuple[int, str], list[float]] = {}
+    starts = intervals.start_date.tolist()
+    ends = intervals.end_date.tolist()
+    for index in range(len(intervals)):
+        key = (int(intervals.property_id[index]), intervals.unit_number[index])
+        flags = occupied.setdefault(key, [False] * months)
+        totals = revenue.setdefault(key, [0.0] * months)
+        start, end = starts[index], ends[index]
+        for col in range(months):
+            if start < month_ends[col] and (end is None or end >= buckets[col]):
+                flags[col] = True
+                totals[col] += float(intervals.rent[index])
+    return occupied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--leases", type=int, default=1_000_000)
+    parser.add_argument("--properties", type=int, default=500)
+    parser.add_argument("--units", type=int, default=60)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--skip-naive", action="store_true")
+    args = parser.parse_args()
+
+    intervals = synthetic_intervals(args.leases, args.properties, args.units)
+    first_month = date(2022, 1, 1)
+
+    started = time.perf_counter()
+    matrix = compute_occupancy(intervals, first_month, args.months)
+    vectorized = time.perf_counter() - started
+    print(f"leases={args.leases:,} units={len(matrix.unit_keys):,} months={args.months}")
+    print(f"vectorized: {vectorized:8.3f} s")
+
+    if args.skip_naive:
+        return
+    started = time.perf_counter()
+    expected = naive_occupancy(intervals, first_month, args.months)
+    naive = time.perf_counter() - started
+    print(f"naive loop: {naive:8.3f} s  ({naive / vectorized:.1f}x slower)")
+
+    mismatches = sum(
+        1
+        for row, key in enumerate(matrix.unit_keys)
+        if matrix.occupied[row].tolist() != expected[key]
+    )
+    print(f"mismatched units: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""契約期間の重複点検（1 回の整列走査）と 1 件ごとの重複判定の時間・メモリを計測する。
+
+実行例: python -m benchmarks.bench_overlaps --properties 200 --units 100 --leases-per-unit 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from datetime import date
+
+from app.extensions import db
+from app.lease_overlaps import find_overlaps, overlapping_leases
+from app.models import Lease
+
+from ._common import make_app, populate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=100)
+    parser.add_argument("--units", type=int, default=50)
+    parser.add_argument("--leases-per-unit", type=int, default=4)
+    parser.add_argument("--checks", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = make_app()
+    populate(app, properties=args.properties, units=args.units, leases_per_unit=args.leases_per_unit)
+    with app.app_context():
+        total = db.session.scalar(db.select(db.func.count(Lease.id)))
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        found = sum(1 for _overlap in find_overlaps())
+        elapsed = time.perf_counter() - started
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"find_overlaps: {total} 件中 {found} 件の重複 {elapsed:.2f} s (最大 {peak / 1024 / 1024:.1f} MiB)")
+
+        samples = db.session.execute(db.select(Lease.property_id, Lease.unit_number).limit(args.checks)).all()
+        started = time.perf_counter()
+        for property_id, unit_number in samples:
+            overlapping_leases(property_id, unit_number, date.today(), None)
+        elapsed = time.perf_counter() - started
+        print(f"overlapping_leases: {len(samples)} 回 平均 {elapsed / max(len(samples), 1) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""レントロール生成のワーカー数ごとの所要時間を計測する。
+
+実行例: python -m benchmarks.bench_rent_roll --properties 64 --units 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from app.extensions import db
+from app.rent_roll import generate_rent_rolls
+
+from ._common import BenchConfig, make_app, populate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=64)
+    parser.add_argument("--units", type=int, default=200)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        class FileConfig(BenchConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{Path(workdir) / 'bench.db'}"
+
+        app = make_app(FileConfig)
+        populate(app, properties=args.properties, units=args.units)
+        month = date.today().replace(day=1)
+
+        workers = 1
+        baseline = None
+        with app.app_context():
+            while workers <= args.max_workers:
+                started = time.perf_counter()
+                generate_rent_rolls(db.engine, month, Path(workdir) / f"out_{workers}.zip", workers=workers)
+                elapsed = time.perf_counter() - started
+                baseline = baseline or elapsed
+                print(f"workers={workers:<3} {elapsed:8.3f} s  speedup={baseline / elapsed:5.2f}x")
+                workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""契約一覧の ORM 読み込みと __slots__ 行オブジェクトのメモリ・描画時間を比較する。
+
+実行例: python -m benchmarks.bench_view_models --rows 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import math
+import time
+import tracemalloc
+
+from flask import render_template_string
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models import Lease, Property
+from app.view_models import lease_rows
+
+from ._common import login, make_app, populate
+
+# 契約一覧テーブルと同じ列を読むだけの最小テンプレート。
+ORM_TEMPLATE = """{% for lease in leases %}<tr><td>{{ lease.id }}</td><td>{{ lease.property.name }}</td>
+<td>{{ lease.unit_number or "-" }}</td><td>{{ lease.tenant.name }}</td><td>{{ lease.rent }}</td>
+<td>{{ lease.status }}</td><td>{{ lease.start_date }}</td><td>{{ lease.end_date or "-" }}</td></tr>{% endfor %}"""
+ROW_TEMPLATE = """{% for lease in leases %}<tr><td>{{ lease.id }}</td><td>{{ lease.property_name }}</td>
+<td>{{ lease.unit_number or "-" }}</td><td>{{ lease.tenant_name }}</td><td>{{ lease.rent }}</td>
+<td>{{ lease.status }}</td><td>{{ lease.start_date }}</td><td>{{ lease.end_date or "-" }}</td></tr>{% endfor %}"""
+
+
+def load_orm() -> list[Lease]:
+    """変更前の契約一覧と同じ joinedload による読み込み。"""
+    return (
+        Lease.query.options(joinedload(Lease.property), joinedload(Lease.tenant))
+        .join(Property)
+        .order_by(Property.name.asc(), Lease.unit_number.asc(), Lease.start_date.desc())
+        .all()
+    )
+
+
+def measure(label: str, loader, template: str, repeat: int) -> None:
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    rows = loader()
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_10k = retained / len(rows) * 10_000
+
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        render_template_string(template, leases=loader())
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"{label:<12} rows={len(rows):,} memory/10k={per_10k / 1024 / 1024:6.2f} MiB  load+render={best * 1000:8.1f} ms")
+    del rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    properties = 20
+    units = math.ceil(args.rows / properties)
+    app = make_app()
+    populate(app, properties=properties, units=units, leases_per_unit=1)
+
+    with app.test_request_context():
+        measure("ORM", load_orm, ORM_TEMPLATE, args.repeat)
+        measure("view model", lease_rows, ROW_TEMPLATE, args.repeat)
+
+    client = app.test_client()
+    login(client)
+    started = time.perf_counter()
+    response = client.get("/leases")
+    elapsed = time.perf_counter() - started
+    print(f"GET /leases (全件): {elapsed * 1000:.1f} ms, {len(response.data) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
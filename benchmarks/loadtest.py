@@ -0,0 +1,350 @@
+"""wsgi:app をローカルのマルチワーカーサーバーで起動し、複数プロセスから負荷をかける。
+
+ログイン・ダッシュボード・契約一覧・入居者編集・契約の登録更新・削除を
+重み付きでランダムに繰り返し、一定間隔ごとのスループット・エラー率・
+レイテンシのパーセンタイルを表示する。CSRF は本番と同じく有効なまま、
+各フォームからトークンを読み取って送信する。
+
+実行例: python -m benchmarks.loadtest --clients 50 --workers 4 --duration 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.cookiejar
+import json
+import multiprocessing
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+PASSWORD = "loadtest-password"
+SCENARIOS = {
+    "login": 1,
+    "dashboard": 4,
+    "lease_list": 3,
+    "tenant_edit": 2,
+    "lease_upsert": 2,
+    "delete": 1,
+}
+CSRF_PATTERN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+# 子プロセスで werkzeug の多プロセスサーバー（リクエストごとに fork）を起動する。
+WERKZEUG_SERVER = (
+    "import sys\n"
+    "from werkzeug.serving import run_simple\n"
+    "from wsgi import app\n"
+    "workers = int(sys.argv[3])\n"
+    "run_simple(sys.argv[1], int(sys.argv[2]), app, processes=workers, threaded=workers == 1)\n"
+)
+
+
+def client_email(index: int) -> str:
+    return f"loadtest{index}@example.com"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(database_uri: str, clients: int, properties: int, units: int) -> None:
+    """スキーマ・クライアント用ユーザー・物件/入居者/契約データを作成する。"""
+    from app import create_app
+    from app.extensions import db
+    from app.models import User
+    from config import Config
+
+    from ._common import populate
+
+    class LoadTestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_uri
+
+    app = create_app(LoadTestConfig)
+    with app.app_context():
+        db.create_all()
+        for index in range(clients):
+            user = User(email=client_email(index))
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+    populate(app, properties=properties, units=units, leases_per_unit=1)
+    app.extensions["audit"].shutdown()
+    with app.app_context():
+        db.engine.dispose()
+
+
+def start_server(server: str, database_uri: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_uri,
+        SECRET_KEY="loadtest-secret",
+        # リクエストごとに fork するサーバーでは子プロセス終了時にキューが失われるため同期で書く。
+        AUDIT_ASYNC="0",
+    )
+    if server == "gunicorn":
+        command = ["gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "--log-level", "warning", "wsgi:app"]
+    else:
+        command = [sys.executable, "-c", WERKZEUG_SERVER, "127.0.0.1", str(port), str(workers)]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/auth/login", timeout=1).read()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("サーバーの起動に失敗しました。")
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("サーバーが 30 秒以内に応答しませんでした。")
+
+
+class LoadClient:
+    """1 ユーザー分のセッション（Cookie）を持ち、シナリオごとの通信時間を記録する。"""
+
+    def __init__(self, base_url: str, index: int, started: float, rng: random.Random) -> None:
+        self.base_url = base_url
+        self.index = index
+        self.started = started
+        self.rng = rng
+        self.records: list[tuple[float, str, float, bool]] = []
+        self.units: list[tuple[int, int, str]] = []
+        self.created = 0
+        self._new_session()
+
+    def _new_session(self) -> None:
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, scenario: str, path: str, data: dict | None = None) -> str:
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        started = time.perf_counter()
+        ok, text = True, ""
+        try:
+            with self.opener.open(self.base_url + path, data=body, timeout=60) as response:
+                text = response.read().decode("utf-8", "replace")
+        except (urllib.error.URLError, OSError):
+            ok = False
+        elapsed = time.perf_counter() - started
+        self.records.append((time.monotonic() - self.started, scenario, elapsed, ok))
+        return text
+
+    def csrf(self, html: str) -> str:
+        match = CSRF_PATTERN.search(html)
+        return match.group(1) if match else ""
+
+    def login(self, scenario: str = "login") -> None:
+        self._new_session()
+        html = self.request(scenario, "/auth/login")
+        self.request(
+            scenario,
+            "/auth/login",
+            {"email": client_email(self.index), "password": PASSWORD, "csrf_token": self.csrf(html)},
+        )
+
+    def load_units(self) -> None:
+        """API から (入居者 ID, 物件 ID, 号室) の一覧を取得して操作対象にする。"""
+        cursor = None
+        while True:
+            query = "fields=property_id,unit_number,name&limit=1000" + (f"&cursor={cursor}" if cursor else "")
+            text = self.request("setup", f"/api/v1/tenants?{query}")
+            page = json.loads(text or '{"data": [], "next_cursor": null}')
+            self.units.extend(
+                (row["id"], row["property_id"], row["unit_number"])
+                for row in page["data"]
+                if row["property_id"] and row["unit_number"] and not row["name"].startswith("負荷試験")
+            )
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+
+    def dashboard(self) -> None:
+        self.request("dashboard", "/")
+        self.request("dashboard", "/api/dashboard")
+
+    def lease_list(self) -> None:
+        _, property_id, _ = self.rng.choice(self.units)
+        self.request("lease_list", f"/leases?property_id={property_id}")
+
+    def tenant_edit(self) -> None:
+        tenant_id, property_id, unit = self.rng.choice(self.units)
+        html = self.request("tenant_edit", f"/tenants?tenant_id={tenant_id}")
+        self.request(
+            "tenant_edit",
+            "/tenants",
+            {
+                "csrf_token": self.csrf(html),
+                "tenant_id": tenant_id,
+                "property_id": property_id,
+                "unit_number": unit,
+                "name": f"入居者{property_id}-{unit}",
+                "email": f"tenant{property_id}-{unit}@example.com",
+                "phone": f"090-{self.rng.randint(1000, 9999)}-{self.rng.randint(1000, 9999)}",
+            },
+        )
+
+    def lease_upsert(self) -> None:
+        tenant_id, property_id, unit = self.rng.choice(self.units)
+        html = self.request("lease_upsert", f"/leases?property_id={property_id}")
+        self.request(
+            "lease_upsert",
+            "/leases",
+            {
+                "csrf_token": self.csrf(html),
+                "lease_id": "",
+                "property_id": property_id,
+                "unit_number": unit,
+                "tenant_id": tenant_id,
+                "rent": f"{self.rng.randint(60, 180) / 10:.1f}",
+                "start_date": date.today().isoformat(),
+                "status": "active",
+            },
+        )
+
+    def delete(self) -> None:
+        """使い捨ての入居者を登録し、API で ID を引いてから削除する。"""
+        _, property_id, _ = self.rng.choice(self.units)
+        self.created += 1
+        name = f"負荷試験{self.index}-{self.created}"
+        html = self.request("delete", f"/tenants?property_id={property_id}")
+        self.request(
+            "delete",
+            "/tenants",
+            {
+                "csrf_token": self.csrf(html),
+                "property_id": property_id,
+                "unit_number": f"LT{self.index}-{self.created}",
+                "name": name,
+                "email": f"loadtest-tenant{self.index}-{self.created}@example.com",
+            },
+        )
+        text = self.request("delete", f"/api/v1/tenants?property_id={property_id}&fields=name&limit=1000")
+        rows = json.loads(text or '{"data": []}')["data"]
+        tenant_id = next((row["id"] for row in rows if row["name"] == name), None)
+        if tenant_id is None:
+            self.records.append((time.monotonic() - self.started, "delete", 0.0, False))
+            return
+        html = self.request("delete", f"/tenants?property_id={property_id}")
+        self.request(
+            "delete",
+            f"/tenants/{tenant_id}/delete",
+            {"csrf_token": self.csrf(html), "tenant_id": tenant_id, "next_url": "", "submit": "削除"},
+        )
+
+
+def run_client(index: int, base_url: str, duration: float, seed: int, started: float, results) -> None:
+    rng = random.Random(seed + index)
+    client = LoadClient(base_url, index, started, rng)
+    client.login()
+    client.load_units()
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name] for name in names]
+    deadline = started + duration
+    while time.monotonic() < deadline:
+        scenario = rng.choices(names, weights)[0]
+        if scenario == "login":
+            client.login()
+        else:
+            getattr(client, scenario)()
+    results.put(client.records)
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def format_stats(latencies: list[float], errors: int, seconds: float) -> str:
+    values = sorted(latencies)
+    total = len(values)
+    return (
+        f"{total / seconds:8.1f} req/s  err {errors / total * 100 if total else 0:5.1f}%  "
+        f"p50 {percentile(values, 0.50) * 1000:7.1f}  p95 {percentile(values, 0.95) * 1000:7.1f}  "
+        f"p99 {percentile(values, 0.99) * 1000:7.1f} ms"
+    )
+
+
+def report(records: list[tuple[float, str, float, bool]], duration: float, interval: float) -> None:
+    records = [record for record in records if record[1] != "setup"]
+    print(f"\n時間経過（{interval:.0f} 秒ごと）")
+    buckets = int(duration // interval) + 1
+    for bucket in range(buckets):
+        start, end = bucket * interval, (bucket + 1) * interval
+        window = [record for record in records if start <= record[0] < end]
+        if window:
+            errors = sum(1 for record in window if not record[3])
+            seconds = min(end, duration) - start or interval
+            print(f"  {start:5.0f}-{end:<5.0f}s {format_stats([record[2] for record in window], errors, seconds)}")
+
+    print("\nシナリオ別")
+    for scenario in SCENARIOS:
+        selected = [record for record in records if record[1] == scenario]
+        if selected:
+            errors = sum(1 for record in selected if not record[3])
+            print(f"  {scenario:<13}{format_stats([record[2] for record in selected], errors, duration)}")
+    errors = sum(1 for record in records if not record[3])
+    print(f"  {'合計':<11}{format_stats([record[2] for record in records], errors, duration)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50, help="クライアントプロセス数")
+    parser.add_argument("--workers", type=int, default=4, help="サーバーのワーカープロセス数")
+    parser.add_argument("--server", choices=("werkzeug", "gunicorn"), default="werkzeug")
+    parser.add_argument("--duration", type=float, default=60.0, help="計測時間（秒）")
+    parser.add_argument("--interval", type=float, default=5.0, help="時系列集計の間隔（秒）")
+    parser.add_argument("--properties", type=int, default=10)
+    parser.add_argument("--units", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_uri = f"sqlite:///{Path(workdir) / 'loadtest.db'}"
+        print(f"データ準備中（ユーザー {args.clients} 名、物件 {args.properties} 件 × {args.units} 号室）...")
+        prepare_database(database_uri, args.clients, args.properties, args.units)
+
+        port = free_port()
+        server = start_server(args.server, database_uri, port, args.workers)
+        print(f"{args.server} (workers={args.workers}) を 127.0.0.1:{port} で起動しました。")
+        try:
+            results = multiprocessing.Queue()
+            started = time.monotonic()
+            processes = [
+                multiprocessing.Process(
+                    target=run_client,
+                    args=(index, f"http://127.0.0.1:{port}", args.duration, args.seed, started, results),
+                )
+                for index in range(args.clients)
+            ]
+            for process in processes:
+                process.start()
+            records = []
+            for _ in processes:
+                records.extend(results.get())
+            for process in processes:
+                process.join()
+            elapsed = time.monotonic() - started
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"クライアント {args.clients} 並列、{elapsed:.1f} 秒")
+    report(records, args.duration, args.interval)
+
+
+if __name__ == "__main__":
+    main()
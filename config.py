@@ -17,8 +17,102 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = True
 
+    # レスポンス圧縮（app/compression.py）。br は brotli 導入時のみ有効。
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") == "1"
+    COMPRESS_ALGORITHMS = ("br", "gzip")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_BROTLI_LEVEL = int(os.getenv("COMPRESS_BROTLI_LEVEL", "4"))
+    COMPRESS_MIMETYPES = (
+        "text/html",
+        "text/css",
+        "text/csv",
+        "application/json",
+        "application/javascript",
+        "text/javascript",
+    )
+
+    # ダッシュボード API の Cache-Control max-age（秒）と静的ファイルの長期キャッシュ期間。
+    DASHBOARD_CACHE_MAX_AGE = int(os.getenv("DASHBOARD_CACHE_MAX_AGE", "60"))
+    ASSET_MAX_AGE = 60 * 60 * 24 * 365
+
+    # 「満了予定」として扱う日数（ダッシュボードと /leases/expiring の既定値）。
+    EXPIRING_LEASE_DAYS = int(os.getenv("EXPIRING_LEASE_DAYS", "30"))
+    # 満了予定件数のスナップショットを作り直す間隔（秒、SCHEDULER_ENABLED=1 のとき）。契約が変わると次の作成までは都度数える。
+    LEASE_EXPIRY_SNAPSHOT_INTERVAL = int(os.getenv("LEASE_EXPIRY_SNAPSHOT_INTERVAL", "900"))
+
+    # レントロール生成ジョブ（app/rent_roll.py）。既定の出力先は instance/rent_rolls。
+    RENT_ROLL_DIR = os.getenv("RENT_ROLL_DIR")
+    # 終了したジョブと zip を残しておく秒数。次のジョブの開始時に古いものから消す。
+    RENT_ROLL_JOB_TTL = int(os.getenv("RENT_ROLL_JOB_TTL", str(24 * 60 * 60)))
+    # 同時に動かすジョブの上限（全組織の合計）。各ジョブは CPU コア数ぶんのプロセスを使う。組織ごとには 1 件まで。
+    RENT_ROLL_MAX_JOBS = int(os.getenv("RENT_ROLL_MAX_JOBS", "1"))
+
+    # 監査ログ（app/audit.py）。キューが満杯の間は呼び出し元で直接書き込む。
+    AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "1") == "1"
+    AUDIT_ASYNC = os.getenv("AUDIT_ASYNC", "1") == "1"
+    AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+    AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    AUDIT_POLL_INTERVAL = 0.5
+    AUDIT_ENQUEUE_TIMEOUT = 0.1
+
+    # プロセス内スケジューラと契約状態の自動更新（app/lease_status.py）。
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "0") == "1"
+    LEASE_STATUS_INTERVAL = int(os.getenv("LEASE_STATUS_INTERVAL", "3600"))
+    LEASE_STATUS_CHUNK_SIZE = int(os.getenv("LEASE_STATUS_CHUNK_SIZE", "1000"))
+    # 解約済み契約のアーカイブ（app/lease_archive.py）で 1 トランザクションに移す件数。
+    LEASE_ARCHIVE_CHUNK_SIZE = int(os.getenv("LEASE_ARCHIVE_CHUNK_SIZE", "1000"))
+
+    # Prometheus 形式の /metrics（app/metrics.py）。複数ワーカーは METRICS_DIR を共有する。
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+    METRICS_DIR = os.getenv("METRICS_DIR")
+
+    # スロークエリログ（app/slow_queries.py）。SLOW_QUERY_ENABLED=1 で有効、既定の出力先は instance/slow_queries.jsonl。
+    SLOW_QUERY_ENABLED = os.getenv("SLOW_QUERY_ENABLED", "0") == "1"
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG")
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+    # 2 段キャッシュ（app/cache.py）。共有ストアは同一ホストのワーカー間で使う SQLite ファイル。
+    CACHE_MEMORY_BYTES = int(os.getenv("CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+    CACHE_SHARED_ENABLED = os.getenv("CACHE_SHARED_ENABLED", "1") == "1"
+    CACHE_SHARED_PATH = os.getenv("CACHE_SHARED_PATH")
+    CACHE_SHARED_MAX_ENTRIES = int(os.getenv("CACHE_SHARED_MAX_ENTRIES", "10000"))
+    # 他のワーカーのコミットが反映されるまでの最大遅延（秒）。
+    CACHE_GENERATION_POLL = float(os.getenv("CACHE_GENERATION_POLL", "1.0"))
+
+    # オンラインバックアップ（app/backup.py）。既定の保存先は instance/backups。
+    BACKUP_DIR = os.getenv("BACKUP_DIR")
+    BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+    # ステップ間の待ち時間（秒）。この間は元の DB のロックを保持しない。
+    BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.01"))
+    BACKUP_COMPRESS = os.getenv("BACKUP_COMPRESS", "1") == "1"
+    BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+    # 管理画面から起動したジョブの状態を残しておく秒数。
+    BACKUP_JOB_TTL = int(os.getenv("BACKUP_JOB_TTL", str(24 * 60 * 60)))
+
+    # ルートのプロファイル（flask profile-route、app/profiling.py）。既定の出力先は instance/profiles。
+    PROFILE_DIR = os.getenv("PROFILE_DIR")
+
+    # 本番サーバー（flask serve、app/server.py）。ワーカー数 0 なら CPU コア数。
+    SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "0"))
+    # 1 ワーカーが処理したら入れ替わるリクエスト数（0 で無制限）と、入れ替えを分散させる揺らぎ。
+    SERVE_MAX_REQUESTS = int(os.getenv("SERVE_MAX_REQUESTS", "1000"))
+    SERVE_MAX_REQUESTS_JITTER = int(os.getenv("SERVE_MAX_REQUESTS_JITTER", "50"))
+    # 停止時に処理中のリクエストを待つ最大秒数。
+    SERVE_GRACEFUL_TIMEOUT = float(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))
+
 
 class TestConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     WTF_CSRF_ENABLED = False
+    # インメモリ DB は接続を 1 本だけ共有するため、監査ログは同期で書き込む。
+    AUDIT_ASYNC = False
+    # 明示していないリレーションの遅延ロードを例外にする（app/strict_loading.py）。
+    STRICT_LOADING = True
+    # テストの実行時間次第で instance/ にログが書かれないようにする。
+    SLOW_QUERY_ENABLED = False
+    # テストごとにインメモリ DB を作り直すため、キャッシュもプロセス内だけで持つ。
+    CACHE_SHARED_ENABLED = False
@@ -1,6 +1,7 @@
 import logging
 from logging.config import fileConfig
 
+import sqlalchemy as sa
 from flask import current_app
 
 from alembic import context
@@ -15,7 +16,18 @@ fileConfig(config.config_file_name)
 logger = logging.getLogger('alembic.env')
 
 
+def get_partition_organization():
+    # flask partitions upgrade から呼ばれた場合は対象組織のパーティションを返す
+    partitions = current_app.extensions.get('partitions')
+    if partitions is None:
+        return None
+    return partitions.migration_organization
+
+
 def get_engine():
+    organization = get_partition_organization()
+    if organization is not None:
+        return current_app.extensions['partitions'].engine_for(organization)
     try:
         # Flask-SQLAlchemy<3 と Alchemical に対応した呼び出し
         return current_app.extensions['migrate'].db.get_engine()
@@ -91,8 +103,22 @@ def run_migrations_online():
         conf_args["process_revision_directives"] = process_revision_directives
 
     connectable = get_engine()
+    organization = get_partition_organization()
+    if organization is not None and current_app.extensions['partitions'].uses_schemas:
+        # スキーマ分割時はバージョン管理テーブルも組織スキーマ側に置く
+        conf_args = dict(conf_args, version_table_schema=organization)
 
     with connectable.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            # batch 操作はテーブルを作り直すため、DROP TABLE が ON DELETE CASCADE を
+            # 発火させないよう、マイグレーション中は外部キー制約を無効にする
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.commit()
+        if 'version_table_schema' in conf_args:
+            connection.execute(
+                sa.schema.CreateSchema(conf_args['version_table_schema'], if_not_exists=True)
+            )
+            connection.commit()
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
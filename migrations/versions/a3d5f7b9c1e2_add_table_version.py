@@ -0,0 +1,35 @@
+"""参照データキャッシュ用に table_version テーブルを追加
+
+Revision ID: a3d5f7b9c1e2
+Revises: f1c8e2a4b7d3
+Create Date: 2026-10-19 16:12:08.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'a3d5f7b9c1e2'
+down_revision = 'f1c8e2a4b7d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    table_version = op.create_table('table_version',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    # ### Alembic コマンドここまで ###
+    op.bulk_insert(table_version, [
+        {'table_name': name, 'version': 0} for name in ('lease', 'property', 'tenant')
+    ])
+
+
+def downgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    op.drop_table('table_version')
+    # ### Alembic コマンドここまで ###
@@ -0,0 +1,38 @@
+"""lease.id を AUTOINCREMENT にしてアーカイブ済みの id を再利用させない
+
+Revision ID: a7c9e1b3d5f2
+Revises: f5b7d9e1a3c4
+Create Date: 2026-10-19 22:14:05.532718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'a7c9e1b3d5f2'
+down_revision = 'f5b7d9e1a3c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite は AUTOINCREMENT を後から付けられないため、テーブルを作り直す。
+    with op.batch_alter_table('lease', schema=None, recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+
+    # 既にアーカイブへ移った id より後から採番させる（作り直した時点の lease の最大 id だけでは足りない）。
+    bind = op.get_bind()
+    bind.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = 'lease'"))
+    bind.execute(
+        sa.text(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT 'lease', max("
+            "(SELECT coalesce(max(id), 0) FROM lease), "
+            "(SELECT coalesce(max(lease_id), 0) FROM lease_archive))"
+        )
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('lease', schema=None, recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+        pass
@@ -0,0 +1,40 @@
+"""契約満了予定の索引と日次スナップショットを追加
+
+Revision ID: b4d1e7a2c903
+Revises: 3cfe3b42a11e
+Create Date: 2026-10-19 10:12:41.208311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'b4d1e7a2c903'
+down_revision = '3cfe3b42a11e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    op.create_table('lease_expiry_snapshot',
+    sa.Column('snapshot_date', sa.Date(), nullable=False),
+    sa.Column('horizon_days', sa.Integer(), nullable=False),
+    sa.Column('expiring_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('snapshot_date', 'horizon_days')
+    )
+    with op.batch_alter_table('lease', schema=None) as batch_op:
+        batch_op.create_index('ix_lease_status_end_date', ['status', 'end_date'], unique=False)
+
+    # ### Alembic コマンドここまで ###
+
+
+def downgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('lease', schema=None) as batch_op:
+        batch_op.drop_index('ix_lease_status_end_date')
+
+    op.drop_table('lease_expiry_snapshot')
+    # ### Alembic コマンドここまで ###
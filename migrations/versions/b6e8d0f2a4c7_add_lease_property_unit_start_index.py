@@ -0,0 +1,31 @@
+"""契約の期間重複チェック用に (property_id, unit_number, start_date) 索引を追加
+
+Revision ID: b6e8d0f2a4c7
+Revises: a3d5f7b9c1e2
+Create Date: 2026-10-19 16:05:12.418093
+
+"""
+from alembic import op
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'b6e8d0f2a4c7'
+down_revision = 'a3d5f7b9c1e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('lease', schema=None) as batch_op:
+        batch_op.create_index('ix_lease_property_unit_start_date', ['property_id', 'unit_number', 'start_date'], unique=False)
+
+    # ### Alembic コマンドここまで ###
+
+
+def downgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('lease', schema=None) as batch_op:
+        batch_op.drop_index('ix_lease_property_unit_start_date')
+
+    # ### Alembic コマンドここまで ###
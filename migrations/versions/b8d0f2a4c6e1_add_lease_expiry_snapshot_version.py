@@ -0,0 +1,32 @@
+"""満了予定スナップショットに作成時点の lease の版カウンタを追加
+
+Revision ID: b8d0f2a4c6e1
+Revises: a7c9e1b3d5f2
+Create Date: 2026-10-19 22:41:18.306215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'b8d0f2a4c6e1'
+down_revision = 'a7c9e1b3d5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('lease_expiry_snapshot', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lease_version', sa.Integer(), server_default='0', nullable=False))
+
+    # ### Alembic コマンドここまで ###
+
+
+def downgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('lease_expiry_snapshot', schema=None) as batch_op:
+        batch_op.drop_column('lease_version')
+
+    # ### Alembic コマンドここまで ###
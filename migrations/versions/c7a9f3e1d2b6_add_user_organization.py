@@ -0,0 +1,34 @@
+"""ユーザーに organization を追加
+
+Revision ID: c7a9f3e1d2b6
+Revises: b4d1e7a2c903
+Create Date: 2026-10-19 11:03:27.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'c7a9f3e1d2b6'
+down_revision = 'b4d1e7a2c903'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('organization', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_user_organization'), ['organization'], unique=False)
+
+    # ### Alembic コマンドここまで ###
+
+
+def downgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_organization'))
+        batch_op.drop_column('organization')
+
+    # ### Alembic コマンドここまで ###
@@ -0,0 +1,54 @@
+"""解約済み契約の保管先 lease_archive テーブルを追加
+
+Revision ID: c8f0a2b4d6e9
+Revises: b6e8d0f2a4c7
+Create Date: 2026-10-19 17:22:40.915327
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'c8f0a2b4d6e9'
+down_revision = 'b6e8d0f2a4c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    op.create_table('lease_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lease_id', sa.Integer(), nullable=False),
+    sa.Column('property_id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('rent', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('unit_number', sa.String(length=50), nullable=True),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['property_id'], ['property.id'], name='fk_lease_archive_property_id', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenant.id'], name='fk_lease_archive_tenant_id', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('lease_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_lease_archive_end_date', ['end_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_lease_archive_lease_id'), ['lease_id'], unique=False)
+        batch_op.create_index('ix_lease_archive_property_unit_start_date', ['property_id', 'unit_number', 'start_date'], unique=False)
+
+    # ### Alembic コマンドここまで ###
+
+
+def downgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('lease_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_lease_archive_property_unit_start_date')
+        batch_op.drop_index(batch_op.f('ix_lease_archive_lease_id'))
+        batch_op.drop_index('ix_lease_archive_end_date')
+
+    op.drop_table('lease_archive')
+    # ### Alembic コマンドここまで ###
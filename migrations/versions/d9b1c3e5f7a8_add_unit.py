@@ -0,0 +1,85 @@
+"""号室を unit テーブルへ切り出し、入居者・契約から unit_id で参照する
+
+Revision ID: d9b1c3e5f7a8
+Revises: c8f0a2b4d6e9
+Create Date: 2026-10-19 19:05:12.406218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'd9b1c3e5f7a8'
+down_revision = 'c8f0a2b4d6e9'
+branch_labels = None
+depends_on = None
+
+# unit_id で号室を参照するテーブル。
+UNIT_OWNERS = ('tenant', 'lease', 'lease_archive')
+
+
+def upgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    op.create_table('unit',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('property_id', sa.Integer(), nullable=False),
+    sa.Column('unit_number', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['property_id'], ['property.id'], name='fk_unit_property_id', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('property_id', 'unit_number', name='uq_unit_property_unit_number')
+    )
+    with op.batch_alter_table('tenant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unit_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_tenant_unit_id'), ['unit_id'], unique=False)
+        batch_op.create_foreign_key('fk_tenant_unit_id', 'unit', ['unit_id'], ['id'], ondelete='SET NULL')
+
+    with op.batch_alter_table('lease', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unit_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_lease_unit_id'), ['unit_id'], unique=False)
+        batch_op.create_foreign_key('fk_lease_unit_id', 'unit', ['unit_id'], ['id'], ondelete='SET NULL')
+
+    with op.batch_alter_table('lease_archive', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unit_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_lease_archive_unit_id', 'unit', ['unit_id'], ['id'], ondelete='SET NULL')
+
+    # ### Alembic コマンドここまで ###
+
+    # 入居者・契約・アーカイブに現れる (物件, 号室) の組を号室として登録し、各行から参照させる。
+    sources = ' UNION '.join(
+        f"SELECT property_id, unit_number FROM {table} "
+        f"WHERE property_id IS NOT NULL AND unit_number IS NOT NULL AND unit_number <> ''"
+        for table in UNIT_OWNERS
+    )
+    op.execute(f'INSERT INTO unit (property_id, unit_number) {sources}')
+    for table in UNIT_OWNERS:
+        op.execute(
+            f'UPDATE {table} SET unit_id = ('
+            f'SELECT unit.id FROM unit '
+            f'WHERE unit.property_id = {table}.property_id AND unit.unit_number = {table}.unit_number)',
+        )
+    table_version = sa.table('table_version', sa.column('table_name', sa.String), sa.column('version', sa.Integer))
+    op.bulk_insert(table_version, [{'table_name': 'unit', 'version': 0}])
+
+
+def downgrade():
+    op.execute(sa.text("DELETE FROM table_version WHERE table_name = 'unit'"))
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('lease_archive', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_lease_archive_unit_id', type_='foreignkey')
+        batch_op.drop_column('unit_id')
+
+    with op.batch_alter_table('lease', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_lease_unit_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_lease_unit_id'))
+        batch_op.drop_column('unit_id')
+
+    with op.batch_alter_table('tenant', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_tenant_unit_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_tenant_unit_id'))
+        batch_op.drop_column('unit_id')
+
+    op.drop_table('unit')
+    # ### Alembic コマンドここまで ###
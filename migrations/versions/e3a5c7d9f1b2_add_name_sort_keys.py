@@ -0,0 +1,68 @@
+"""物件・入居者に並べ替え用の name_sort_key 列と索引を追加
+
+Revision ID: e3a5c7d9f1b2
+Revises: d9b1c3e5f7a8
+Create Date: 2026-10-19 20:12:48.553104
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'e3a5c7d9f1b2'
+down_revision = 'd9b1c3e5f7a8'
+branch_labels = None
+depends_on = None
+
+
+# このリビジョン時点の app/sort_keys.py の正規化を固定した写し。あとで sort_key を変えても
+# このマイグレーションが書く値は変わらない。pykakasi による漢字の読みは環境によって結果が
+# 変わるため使わない（読みが必要なら pykakasi を入れて flask rebuild-sort-keys を実行する）。
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+
+def _sort_key(name):
+    text = unicodedata.normalize('NFKC', name or '')
+    return ' '.join(text.split()).translate(_KATAKANA_TO_HIRAGANA).casefold()[:255]
+
+
+def upgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('name_sort_key', sa.String(length=255), server_default='', nullable=False))
+        batch_op.create_index(batch_op.f('ix_property_name_sort_key'), ['name_sort_key'], unique=False)
+
+    with op.batch_alter_table('tenant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('name_sort_key', sa.String(length=255), server_default='', nullable=False))
+        batch_op.create_index(batch_op.f('ix_tenant_name_sort_key'), ['name_sort_key'], unique=False)
+        batch_op.create_index('ix_tenant_property_unit_name_sort_key', ['property_id', 'unit_number', 'name_sort_key'], unique=False)
+
+    # ### Alembic コマンドここまで ###
+
+    # 既存の行は名前からキーを作って埋める（以後は保存時に埋まる）。
+    bind = op.get_bind()
+    for table_name in ('property', 'tenant'):
+        table = sa.table(table_name, sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('name_sort_key', sa.String))
+        rows = bind.execute(sa.select(table.c.id, table.c.name)).all()
+        if rows:
+            bind.execute(
+                table.update().where(table.c.id == sa.bindparam('row_id')).values(name_sort_key=sa.bindparam('key')),
+                [{'row_id': row_id, 'key': _sort_key(name)} for row_id, name in rows],
+            )
+
+
+def downgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('tenant', schema=None) as batch_op:
+        batch_op.drop_index('ix_tenant_property_unit_name_sort_key')
+        batch_op.drop_index(batch_op.f('ix_tenant_name_sort_key'))
+        batch_op.drop_column('name_sort_key')
+
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_property_name_sort_key'))
+        batch_op.drop_column('name_sort_key')
+
+    # ### Alembic コマンドここまで ###
@@ -0,0 +1,31 @@
+"""契約の状態自動更新用に (status, start_date) 索引を追加
+
+Revision ID: e5a9c3d7b1f4
+Revises: d2f6b8c4a1e5
+Create Date: 2026-10-19 12:31:52.640187
+
+"""
+from alembic import op
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'e5a9c3d7b1f4'
+down_revision = 'd2f6b8c4a1e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('lease', schema=None) as batch_op:
+        batch_op.create_index('ix_lease_status_start_date', ['status', 'start_date'], unique=False)
+
+    # ### Alembic コマンドここまで ###
+
+
+def downgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('lease', schema=None) as batch_op:
+        batch_op.drop_index('ix_lease_status_start_date')
+
+    # ### Alembic コマンドここまで ###
@@ -0,0 +1,58 @@
+"""物件・入居者の削除を外部キーの ON DELETE CASCADE で伝播させる
+
+Revision ID: f1c8e2a4b7d3
+Revises: e5a9c3d7b1f4
+Create Date: 2026-10-19 15:04:26.318552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'f1c8e2a4b7d3'
+down_revision = 'e5a9c3d7b1f4'
+branch_labels = None
+depends_on = None
+
+# 初回マイグレーションの契約テーブルの外部キーは名前が無いため、
+# SQLite の batch 操作ではこの命名規則で名前を与えてから削除する。
+NAMING_CONVENTION = {
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s',
+}
+FOREIGN_KEYS = (
+    ('tenant', 'property_id', 'property', 'fk_tenant_property_id'),
+    ('lease', 'property_id', 'property', 'fk_lease_property_id'),
+    ('lease', 'tenant_id', 'tenant', 'fk_lease_tenant_id'),
+)
+
+
+def _existing_name(table, column, referred_table):
+    """反映済みの外部キー名。名前が無ければ命名規則の名前を返す。"""
+    for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if foreign_key['constrained_columns'] == [column] and foreign_key['name']:
+            return foreign_key['name']
+    return NAMING_CONVENTION['fk'] % {
+        'table_name': table,
+        'column_0_name': column,
+        'referred_table_name': referred_table,
+    }
+
+
+def _replace_foreign_keys(ondelete):
+    for table in ('tenant', 'lease'):
+        targets = [fk for fk in FOREIGN_KEYS if fk[0] == table]
+        names = [_existing_name(table, column, referred) for _, column, referred, _ in targets]
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            for name in names:
+                batch_op.drop_constraint(name, type_='foreignkey')
+            for _, column, referred, new_name in targets:
+                batch_op.create_foreign_key(new_name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_keys(None)
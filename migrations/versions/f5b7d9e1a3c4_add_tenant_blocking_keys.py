@@ -0,0 +1,62 @@
+"""入居者に重複候補探し用の email_key / phone_key 列と索引を追加
+
+Revision ID: f5b7d9e1a3c4
+Revises: e3a5c7d9f1b2
+Create Date: 2026-10-19 21:03:27.184095
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.tenant_duplicates import email_key, phone_key
+
+
+# Alembic が利用するリビジョン識別子。
+revision = 'f5b7d9e1a3c4'
+down_revision = 'e3a5c7d9f1b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('tenant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('email_key', sa.String(length=255), server_default='', nullable=False))
+        batch_op.add_column(sa.Column('phone_key', sa.String(length=50), server_default='', nullable=False))
+        batch_op.create_index(batch_op.f('ix_tenant_email_key'), ['email_key'], unique=False)
+        batch_op.create_index(batch_op.f('ix_tenant_phone_key'), ['phone_key'], unique=False)
+
+    # ### Alembic コマンドここまで ###
+
+    # 既存の入居者はメールアドレス・電話番号からキーを作って埋める（以後は保存時に埋まる）。
+    bind = op.get_bind()
+    tenant = sa.table(
+        'tenant',
+        sa.column('id', sa.Integer),
+        sa.column('email', sa.String),
+        sa.column('phone', sa.String),
+        sa.column('email_key', sa.String),
+        sa.column('phone_key', sa.String),
+    )
+    rows = bind.execute(sa.select(tenant.c.id, tenant.c.email, tenant.c.phone)).all()
+    if rows:
+        bind.execute(
+            tenant.update()
+            .where(tenant.c.id == sa.bindparam('row_id'))
+            .values(email_key=sa.bindparam('email_value'), phone_key=sa.bindparam('phone_value')),
+            [
+                {'row_id': row_id, 'email_value': email_key(email), 'phone_value': phone_key(phone)}
+                for row_id, email, phone in rows
+            ],
+        )
+
+
+def downgrade():
+    # ### Alembic が自動生成したコマンド。必要があれば調整してください。 ###
+    with op.batch_alter_table('tenant', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tenant_phone_key'))
+        batch_op.drop_index(batch_op.f('ix_tenant_email_key'))
+        batch_op.drop_column('phone_key')
+        batch_op.drop_column('email_key')
+
+    # ### Alembic コマンドここまで ###
@@ -0,0 +1,46 @@
+"""テスト全体で共有する Flask アプリ・クライアントのフィクスチャ。"""
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.models import User
+from config import TestConfig
+from query_budget import query_budget as _query_budget
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(email="tester@example.com")
+        user.set_password("password123")
+        db.session.add(user)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_client(app, client):
+    response = client.post(
+        "/auth/login",
+        data={"email": "tester@example.com", "password": "password123"},
+        follow_redirects=True,
+    )
+    assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def query_budget():
+    """with query_budget(n): ... でブロック内の SQL 発行回数を n 回までに制限する。"""
+    return _query_budget
@@ -0,0 +1,46 @@
+"""ルートごとの SQL 発行回数に上限を設けるためのヘルパー。
+
+    with query_budget(3):
+        client.get("/")
+
+    @query_budget(10)
+    def test_xxx(...): ...
+
+全 Engine（組織パーティションを含む）の cursor 実行を数え、上限を超えたら
+発行された SQL を並べて AssertionError にする。
+"""
+
+from __future__ import annotations
+
+from contextlib import ContextDecorator
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class query_budget(ContextDecorator):  # noqa: N801 - デコレータとして小文字で使う
+    def __init__(self, limit: int, label: Optional[str] = None) -> None:
+        self.limit = limit
+        self.label = label
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, _conn, _cursor, statement, _parameters, _context, executemany) -> None:
+        self.statements.append(statement)
+
+    def __enter__(self) -> "query_budget":
+        self.statements = []
+        event.listen(Engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        event.remove(Engine, "before_cursor_execute", self._record)
+        if exc_type is None and self.count > self.limit:
+            listing = "\n".join(f"  {index + 1}. {sql.splitlines()[0][:160]}" for index, sql in enumerate(self.statements))
+            label = f"{self.label}: " if self.label else ""
+            raise AssertionError(f"{label}SQL が {self.count} 回発行されました（上限 {self.limit} 回）\n{listing}")
+        return False
@@ -0,0 +1,95 @@
+"""稼働行列の計算結果とレポート API を検証するテスト。"""
+
+from datetime import date
+from decimal import Decimal
+
+from app.analytics import compute_occupancy, intervals_from_rows
+from app.extensions import db
+from app.models import Lease, LeaseStatus, Property, Tenant, Unit
+
+
+def test_compute_occupancy_matches_interval_overlap():
+    rows = [
+        # 物件 1 / 101: 2024-01〜03 のみ
+        (1, "101", date(2024, 1, 15), date(2024, 3, 10), LeaseStatus.TERMINATED, Decimal("100000")),
+        # 物件 1 / 102: 2024-02 から終了日未定
+        (1, "102", date(2024, 2, 1), None, LeaseStatus.ACTIVE, Decimal("80000")),
+        # 物件 2 / 号室未設定: 期間外
+        (2, None, date(2023, 1, 1), date(2023, 6, 30), LeaseStatus.TERMINATED, Decimal("50000")),
+    ]
+    matrix = compute_occupancy(intervals_from_rows(rows), date(2024, 1, 1), 4)
+
+    assert matrix.unit_keys == [(1, "101"), (1, "102"), (2, "")]
+    assert matrix.occupied.astype(int).tolist() == [[1, 1, 1, 0], [0, 1, 1, 1], [0, 0, 0, 0]]
+    assert matrix.unit_revenue[0].tolist() == [100000.0, 100000.0, 100000.0, 0.0]
+    assert matrix.property_ids == [1, 2]
+    assert matrix.unit_counts.tolist() == [2, 1]
+    assert matrix.occupancy_rate[0].tolist() == [0.5, 1.0, 1.0, 0.5]
+    assert matrix.property_revenue[0].tolist() == [100000.0, 180000.0, 180000.0, 80000.0]
+
+
+def test_occupancy_endpoints(app, auth_client):
+    with app.app_context():
+        property_obj = Property(name="HQ", address="1 Main St")
+        tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj, unit_number="101")
+        db.session.add(
+            Lease(
+                property=property_obj,
+                tenant=tenant,
+                unit_number="101",
+                rent=Decimal("120000"),
+                start_date=date(2024, 2, 1),
+                end_date=date(2024, 2, 29),
+                status=LeaseStatus.TERMINATED,
+            ),
+        )
+        db.session.commit()
+
+    response = auth_client.get("/reports/occupancy?from=2024-01&months=3")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["months"] == ["2024-01", "2024-02", "2024-03"]
+    (hq,) = data["properties"]
+    assert hq["name"] == "HQ"
+    assert hq["occupancy_rate"] == [0.0, 1.0, 0.0]
+    assert hq["units"][0]["occupied"] == [0, 1, 0]
+
+    csv_response = auth_client.get("/reports/occupancy.csv?from=2024-01&months=3")
+    lines = csv_response.get_data(as_text=True).splitlines()
+    assert lines[0] == "property_id,property_name,unit_number,month,occupied,revenue"
+    assert lines[2].endswith("2024-02,1,120000.00")
+
+    assert auth_client.get("/reports/occupancy?months=0").status_code == 400
+    assert auth_client.get("/reports/occupancy?status=unknown").status_code == 400
+
+
+def test_occupancy_counts_units_without_leases(app, auth_client):
+    with app.app_context():
+        property_obj = Property(name="HQ", address="1 Main St")
+        tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj, unit_number="101")
+        db.session.add_all(
+            [
+                Lease(property=property_obj, tenant=tenant, unit_number="101", rent=Decimal("100000"), start_date=date(2024, 1, 1)),
+                Unit(property=property_obj, unit_number="102"),
+            ],
+        )
+        db.session.commit()
+
+    (hq,) = auth_client.get("/reports/occupancy?from=2024-01&months=2").get_json()["properties"]
+    assert [unit["unit_number"] for unit in hq["units"]] == ["101", "102"]
+    assert hq["occupancy_rate"] == [0.5, 0.5]
+
+
+def test_compute_occupancy_without_leases_lists_vacant_units():
+    matrix = compute_occupancy(intervals_from_rows([]), date(2024, 1, 1), 2, units=[(1, "101")])
+
+    assert matrix.unit_keys == [(1, "101")]
+    assert matrix.occupancy_rate.tolist() == [[0.0, 0.0]]
+
+
+def test_occupancy_csv_without_rows_still_has_header(auth_client):
+    lines = auth_client.get("/reports/occupancy.csv?from=2024-01&months=3&level=property").get_data(as_text=True).splitlines()
+    assert lines == ["property_id,property_name,month,unit_count,occupied_units,occupancy_rate,revenue"]
+
+    lines = auth_client.get("/reports/occupancy.csv?from=2024-01&months=3").get_data(as_text=True).splitlines()
+    assert lines == ["property_id,property_name,unit_number,month,occupied,revenue"]
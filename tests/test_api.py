@@ -0,0 +1,52 @@
+"""読み取り専用 API（/api/v1）のフィールド選択・絞り込み・カーソルページングを検証するテスト。"""
+
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Lease, Property, Tenant
+
+
+def _populate():
+    for index in range(2):
+        property_obj = Property(name=f"Building {index}", address="Tokyo")
+        for unit in range(3):
+            tenant = Tenant(
+                name=f"Tenant {index}-{unit}",
+                email=f"t{index}{unit}@example.com",
+                property=property_obj,
+                unit_number=f"10{unit}",
+            )
+            db.session.add(Lease(property=property_obj, tenant=tenant, rent=Decimal("85000.50"), unit_number=tenant.unit_number))
+    db.session.commit()
+
+
+def test_fields_projection_and_filter(app, auth_client):
+    with app.app_context():
+        _populate()
+        property_id = db.session.scalar(db.select(Property.id).where(Property.name == "Building 1"))
+
+    data = auth_client.get(f"/api/v1/leases?fields=rent,unit_number&property_id={property_id}").get_json()
+    assert len(data["data"]) == 3
+    assert set(data["data"][0]) == {"id", "rent", "unit_number"}
+    assert data["data"][0]["rent"] == 85000.5
+    assert data["next_cursor"] is None
+
+    assert auth_client.get("/api/v1/tenants?fields=password").status_code == 400
+    assert auth_client.get("/api/v1/tenants?property_id=abc").status_code == 400
+    assert auth_client.get("/api/v1/units").status_code == 404
+
+
+def test_cursor_pagination_walks_all_rows(app, auth_client):
+    with app.app_context():
+        _populate()
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/v1/tenants?fields=name&limit=4" + (f"&cursor={cursor}" if cursor else "")
+        page = auth_client.get(url).get_json()
+        seen.extend(row["name"] for row in page["data"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 6 and len(set(seen)) == 6
+    assert auth_client.get("/api/v1/tenants?cursor=not-a-cursor").status_code == 400
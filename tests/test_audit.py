@@ -0,0 +1,83 @@
+"""監査ログ（変更差分の収集・非同期一括書き込み・閲覧画面）を検証するテスト。"""
+
+from decimal import Decimal
+
+from app import create_app
+from app.extensions import db
+from app.models import AuditEvent, Lease, Property, Tenant
+from config import TestConfig
+
+
+def _events(entity, entity_id):
+    return db.session.scalars(
+        db.select(AuditEvent)
+        .where(AuditEvent.entity_type == entity, AuditEvent.entity_id == entity_id)
+        .order_by(AuditEvent.id),
+    ).all()
+
+
+def test_field_level_diffs_are_recorded_on_commit(app):
+    with app.app_context():
+        property_obj = Property(name="HQ", address="1 Main St")
+        tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj)
+        lease = Lease(property=property_obj, tenant=tenant, rent=Decimal("100000"), unit_number="101")
+        db.session.add(lease)
+        db.session.commit()
+
+        lease.rent = Decimal("120000")
+        lease.status = "active"
+        db.session.commit()
+
+        # ロールバックされた変更は記録しない。
+        lease.rent = Decimal("1")
+        db.session.flush()
+        db.session.rollback()
+
+        # 契約は読み込まれていなくても ON DELETE CASCADE で削除され、削除イベントも残る。
+        lease_id, tenant_id = lease.id, tenant.id
+        db.session.delete(tenant)
+        db.session.commit()
+        assert db.session.get(Lease, lease_id, populate_existing=True) is None
+
+        events = _events("lease", lease_id)
+        assert [event.action for event in events] == ["create", "update", "delete"]
+        assert events[0].changes["unit_number"] == [None, "101"]
+        assert events[1].changes == {"rent": ["100000.00", "120000"], "status": ["pending", "active"]}
+        assert events[2].changes["rent"][0] == "120000.00"
+        assert [event.action for event in _events("tenant", tenant_id)] == ["create", "delete"]
+
+
+def test_audit_view_filters_by_entity(app, auth_client):
+    auth_client.post("/properties", data={"name": "Sunrise", "address": "Tokyo"})
+    with app.app_context():
+        property_id = db.session.scalar(db.select(Property.id))
+        event = _events("property", property_id)[0]
+        assert event.endpoint == "core.properties"
+        assert event.user_id is not None
+
+    html = auth_client.get(f"/audit?entity=property&id={property_id}").get_data(as_text=True)
+    assert "Sunrise" in html and "tester@example.com" in html
+    assert "変更履歴はありません" in auth_client.get("/audit?entity=lease&id=1").get_data(as_text=True)
+
+
+def test_background_writer_batches_and_flushes(tmp_path):
+    class AsyncConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'audit.db'}"
+        AUDIT_ASYNC = True
+        AUDIT_BATCH_SIZE = 50
+
+    app = create_app(AsyncConfig)
+    writer = app.extensions["audit"]
+    with app.app_context():
+        db.create_all()
+        for index in range(120):
+            db.session.add(Property(name=f"P{index}", address="Tokyo"))
+        db.session.commit()
+        writer.flush()
+        assert db.session.scalar(db.select(db.func.count(AuditEvent.id))) == 120
+
+        db.session.add(Property(name="last", address="Osaka"))
+        db.session.commit()
+        writer.shutdown()
+        assert writer.written == 121
+        db.drop_all()
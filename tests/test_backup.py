@@ -0,0 +1,176 @@
+"""オンラインバックアップ・世代管理・復元のテスト。"""
+
+import gzip
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from app.backup import BackupError, BackupJob, backup_database, list_backups, prune_backups, restore_database
+from app.extensions import db
+from app.jobs import JobStore
+from app.models import Property, User
+from app.reference_data import table_versions
+from config import TestConfig
+
+
+def _file_config(tmp_path):
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'crm.db'}"
+        BACKUP_DIR = str(tmp_path / "backups")
+        BACKUP_STEP_SLEEP = 0
+
+    return FileConfig
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    app = create_app(_file_config(tmp_path))
+    with app.app_context():
+        db.create_all()
+        user = User(email="tester@example.com")
+        user.set_password("password123")
+        db.session.add_all([user, *(Property(name=f"物件{index}", address="Tokyo") for index in range(200))])
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def _property_count(path) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT count(*) FROM property").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_writers_proceed_between_backup_steps(tmp_path, file_app):
+    source = tmp_path / "crm.db"
+    results = []
+    backup = threading.Thread(
+        target=lambda: results.append(backup_database(source, tmp_path / "out", pages=1, sleep=0.02, compress=False)),
+    )
+    backup.start()
+    time.sleep(0.05)
+    writer = sqlite3.connect(source, timeout=1)
+    started = time.perf_counter()
+    with writer:
+        writer.execute("INSERT INTO property (name, address) VALUES ('途中', 'Osaka')")
+    writer.close()
+    assert time.perf_counter() - started < 0.5
+    assert backup.is_alive()
+    backup.join()
+
+    result = results[0]
+    assert result.steps > 1
+    assert result.max_lock_seconds < 0.5
+    assert result.throughput > 0
+    # 途中で書き込まれた行も含めて複製し直される。
+    assert _property_count(result.path) == 201
+
+
+def test_cli_backup_compresses_and_prunes(tmp_path, file_app):
+    runner = file_app.test_cli_runner()
+    for _ in range(3):
+        result = runner.invoke(args=["backup", "--keep", "2"])
+        assert result.exit_code == 0, result.output
+        assert "MiB/s" in result.output and "ロック合計" in result.output
+    kept = list_backups(tmp_path / "backups", "main")
+    assert len(kept) == 2
+    assert all(path.name.endswith(".db.gz") for path in kept)
+    with gzip.open(kept[0]) as packed:
+        assert packed.read(16) == b"SQLite format 3\x00"
+
+    assert prune_backups(tmp_path / "backups", "main", 1) == kept[1:]
+
+
+def test_restore_verifies_integrity_and_advances_versions(tmp_path, file_app):
+    source = tmp_path / "crm.db"
+    good = backup_database(source, tmp_path / "backups", compress=True)
+    with file_app.app_context():
+        db.session.execute(db.delete(Property))
+        db.session.commit()
+        versions_before = dict(table_versions())
+
+    broken = tmp_path / "backups" / "main-20000101-000000.db"
+    broken.write_bytes(b"SQLite format 3\x00" + b"\x00" * 100)
+    with pytest.raises(BackupError):
+        restore_database(broken, source)
+    assert _property_count(source) == 0
+
+    result = file_app.test_cli_runner().invoke(args=["restore", str(good.path), "--yes"])
+    assert result.exit_code == 0, result.output
+    assert _property_count(source) == 200
+    with file_app.app_context():
+        # 復元前より版カウンタが進み、削除後に作られたキャッシュは使われない。
+        assert table_versions()["property"] > versions_before["property"]
+        assert db.session.scalar(db.select(db.func.count(Property.id))) == 200
+
+
+def test_memory_database_cannot_be_backed_up(app):
+    result = app.test_cli_runner().invoke(args=["backup"])
+    assert result.exit_code != 0
+    assert "SQLite のファイル DB 以外" in result.output
+
+
+def _login(app, email):
+    client = app.test_client()
+    client.post("/auth/login", data={"email": email, "password": "password123"})
+    return client
+
+
+def test_admin_backup_job(tmp_path, file_app):
+    client = _login(file_app, "tester@example.com")
+    assert client.post("/admin/backups").status_code == 403
+    assert client.get("/admin/backups").status_code == 403
+
+    result = file_app.test_cli_runner().invoke(args=["set-role", "tester@example.com", "admin"])
+    assert result.exit_code == 0, result.output
+    with file_app.app_context():
+        other = User(email="other-admin@example.com", role="admin", organization="acme")
+        other.set_password("password123")
+        db.session.add(other)
+        db.session.commit()
+    response = client.post("/admin/backups")
+    assert response.status_code == 202
+    # 他の組織の管理者からはジョブもバックアップの一覧も見えない。
+    other_client = _login(file_app, "other-admin@example.com")
+    assert other_client.get(response.headers["Location"]).status_code == 404
+
+    status = {}
+    for _ in range(100):
+        status = client.get(response.headers["Location"]).get_json()
+        if status["state"] in ("finished", "failed"):
+            break
+        time.sleep(0.05)
+    assert status["state"] == "finished", status
+    assert status["results"][0]["name"] == "main"
+    assert [entry["file"] for entry in client.get("/admin/backups").get_json()["backups"]] == [
+        status["results"][0]["path"].rsplit("/", 1)[-1],
+    ]
+    assert other_client.get("/admin/backups").get_json()["backups"] == []
+
+
+def test_backup_jobs_are_shared_between_workers_and_pruned(tmp_path, file_app):
+    file_app.test_cli_runner().invoke(args=["set-role", "tester@example.com", "admin"])
+    # 同じ DB と BACKUP_DIR を使う、別プロセスのワーカー相当のアプリ。
+    other_worker = create_app(_file_config(tmp_path))
+    store = JobStore(tmp_path / "backups")
+    # 別のワーカーで実行中のジョブと、終了から TTL を過ぎたジョブ。
+    running = BackupJob(id=uuid.uuid4().hex, state="running")
+    expired = BackupJob(id=uuid.uuid4().hex, state="finished", finished_at=datetime.now() - timedelta(days=2))
+    store.save(running.to_record())
+    store.save(expired.to_record())
+
+    client = _login(other_worker, "tester@example.com")
+    assert client.get(f"/admin/backups/{running.id}").get_json()["state"] == "running"
+    response = client.post("/admin/backups")
+    assert response.status_code == 202
+    assert response.get_json()["id"] == running.id
+    assert store.load(expired.id) is None
@@ -0,0 +1,164 @@
+"""2 段キャッシュ（LRU と共有 SQLite）と世代番号による無効化のテスト。"""
+
+import multiprocessing
+import sqlite3
+import time
+from pathlib import Path
+
+from app import create_app
+from app.cache import Cache, LRUTier, SharedTier, dependency
+from config import TestConfig
+
+
+def test_lru_evicts_least_recently_used_by_size():
+    tier = LRUTier(max_bytes=100)
+    tier.set("a", (), "A", 40)
+    tier.set("b", (), "B", 40)
+    assert tier.get("a") == ((), "A")
+    tier.set("c", (), "C", 40)
+    assert tier.get("b") is None
+    assert tier.get("a") is not None and tier.get("c") is not None
+    assert tier.size == 80
+
+    tier.set("huge", (), "H", 101)
+    assert tier.get("huge") is None
+
+
+def test_invalidate_rebuilds_only_dependent_entries():
+    cache = Cache(memory_bytes=1 << 20)
+    calls = []
+
+    def loader(value):
+        def load():
+            calls.append(value)
+            return value
+
+        return load
+
+    assert cache.get_or_set("p", loader("p1"), depends_on=("org:property",)) == "p1"
+    assert cache.get_or_set("t", loader("t1"), depends_on=("org:tenant",)) == "t1"
+    assert cache.get_or_set("p", loader("p2"), depends_on=("org:property",)) == "p1"
+
+    cache.invalidate(["org:property"])
+    assert cache.get_or_set("p", loader("p2"), depends_on=("org:property",)) == "p2"
+    assert cache.get_or_set("t", loader("t2"), depends_on=("org:tenant",)) == "t1"
+    assert calls == ["p1", "t1", "p2"]
+
+
+def test_shared_tier_serves_other_workers(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    first = Cache(1 << 20, SharedTier(path, 100), poll_interval=0)
+    second = Cache(1 << 20, SharedTier(path, 100), poll_interval=0)
+
+    assert first.get_or_set("k", lambda: {"v": 1}, depends_on=("org:lease",)) == {"v": 1}
+    assert second.get_or_set("k", lambda: {"v": 2}, depends_on=("org:lease",)) == {"v": 1}
+
+    second.invalidate(["org:lease"])
+    assert first.get_or_set("k", lambda: {"v": 3}, depends_on=("org:lease",)) == {"v": 3}
+
+
+def test_shared_tier_prunes_oldest_entries(tmp_path):
+    tier = SharedTier(tmp_path / "cache.sqlite", max_entries=10)
+    for index in range(11):
+        tier.set(f"k{index}", (), b"x")
+    assert tier.get("k0") is None
+    assert tier.get("k10") is not None
+
+
+def _bump_in_child(path: str, count: int) -> None:
+    cache = Cache(1 << 20, SharedTier(Path(path), 100), poll_interval=0)
+    for _ in range(count):
+        cache.invalidate(["org:tenant"])
+
+
+def test_concurrent_invalidations_are_all_counted_and_seen_within_poll(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    reader = Cache(1 << 20, SharedTier(path, 100), poll_interval=0.2)
+    assert reader.get_or_set("tenants", lambda: "before", depends_on=("org:tenant",)) == "before"
+
+    processes = [multiprocessing.Process(target=_bump_in_child, args=(str(path), 50)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+    assert SharedTier(path, 100).generations()["org:tenant"] == 200
+
+    # 読み直しの間隔が過ぎれば、他のワーカーの無効化が必ず反映される。
+    time.sleep(0.25)
+    assert reader.get_or_set("tenants", lambda: "after", depends_on=("org:tenant",)) == "after"
+
+
+def _write_and_invalidate(cache_path: str, source_path: str, count: int) -> None:
+    cache = Cache(1 << 20, SharedTier(Path(cache_path), 100), poll_interval=0.05)
+    source = sqlite3.connect(source_path, timeout=10, isolation_level=None)
+    for _ in range(count):
+        # 本物の書き込みと同じく、元データをコミットしてから世代を進める。
+        source.execute("UPDATE counter SET value = value + 1")
+        cache.invalidate(["db:org:counter"])
+
+
+def _read_until_checked(cache_path: str, source_path: str, check, results) -> None:
+    cache = Cache(1 << 20, SharedTier(Path(cache_path), 100), poll_interval=0.05)
+    source = sqlite3.connect(source_path, timeout=10, isolation_level=None)
+
+    def load() -> int:
+        return source.execute("SELECT value FROM counter").fetchone()[0]
+
+    while not check.is_set():
+        cache.get_or_set("counter", load, depends_on=("db:org:counter",))
+    results.put([cache.get_or_set("counter", load, depends_on=("db:org:counter",)) for _ in range(20)])
+
+
+def test_concurrent_readers_see_the_last_write_after_the_poll_window(tmp_path):
+    cache_path, source_path = str(tmp_path / "cache.sqlite"), str(tmp_path / "source.sqlite")
+    SharedTier(Path(cache_path), 100)
+    with sqlite3.connect(source_path) as source:
+        source.execute("CREATE TABLE counter (value INTEGER NOT NULL)")
+        source.execute("INSERT INTO counter VALUES (0)")
+    check, results = multiprocessing.Event(), multiprocessing.Queue()
+    readers = [multiprocessing.Process(target=_read_until_checked, args=(cache_path, source_path, check, results)) for _ in range(3)]
+    writers = [multiprocessing.Process(target=_write_and_invalidate, args=(cache_path, source_path, 30)) for _ in range(3)]
+    for process in (*readers, *writers):
+        process.start()
+    for process in writers:
+        process.join()
+    assert all(process.exitcode == 0 for process in writers)
+
+    # 最後の無効化から読み直し間隔が過ぎたあとは、どのワーカーも最新の値を読む。
+    time.sleep(0.1)
+    check.set()
+    reads = [results.get(timeout=10) for _ in readers]
+    for process in readers:
+        process.join()
+    assert reads == [[90] * 20] * 3
+
+
+def test_app_shared_tier_uses_configured_path(tmp_path):
+    class SharedCacheConfig(TestConfig):
+        CACHE_SHARED_ENABLED = True
+        CACHE_SHARED_PATH = str(tmp_path / "cache.sqlite")
+        CACHE_GENERATION_POLL = 0
+
+    first, second = create_app(SharedCacheConfig), create_app(SharedCacheConfig)
+    first.extensions["cache"].get_or_set("answer", lambda: 42)
+
+    assert (tmp_path / "cache.sqlite").exists()
+    assert second.extensions["cache"].get_or_set("answer", lambda: 0) == 42
+
+
+def test_dependencies_are_namespaced_per_database(tmp_path):
+    apps = []
+    for name in ("a", "b"):
+
+        class DatabaseConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / f'{name}.db'}"
+
+        apps.append(create_app(DatabaseConfig))
+
+    names = []
+    for app in apps:
+        with app.app_context():
+            names.append(dependency("lease"))
+    assert names[0] != names[1]
+    assert all(name.endswith(":-:lease") for name in names)
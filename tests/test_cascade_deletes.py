@@ -0,0 +1,107 @@
+"""物件・入居者の削除が ON DELETE CASCADE で 1 回の DELETE になることを検証するテスト。"""
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from app.extensions import db
+from app.models import AuditEvent, Lease, Property, Tenant, User
+from config import TestConfig
+
+
+@pytest.fixture
+def no_audit_app():
+    class NoAuditConfig(TestConfig):
+        AUDIT_ENABLED = False
+
+    app = create_app(NoAuditConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(email="tester@example.com")
+        user.set_password("password123")
+        db.session.add(user)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def _populate():
+    kept = Property(name="Kept", address="Osaka")
+    kept_tenant = Tenant(name="Kept Tenant", email="kept@example.com", property=kept)
+    db.session.add(Lease(property=kept, tenant=kept_tenant, rent=Decimal("50000")))
+    building = Property(name="Tower", address="Tokyo")
+    for index in range(20):
+        tenant = Tenant(name=f"T{index}", email=f"t{index}@example.com", property=building, unit_number=str(index))
+        db.session.add(Lease(property=building, tenant=tenant, rent=Decimal("80000")))
+    db.session.commit()
+    return building.id, tenant.id
+
+
+def _statements(client, url, data):
+    statements = []
+
+    def capture(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", capture)
+    try:
+        response = client.post(url, data=data)
+    finally:
+        event.remove(Engine, "before_cursor_execute", capture)
+    assert response.status_code == 302
+    # ログインユーザーの読み込みと参照データ用の版カウンタ更新は数えない。
+    return [statement for statement in statements if not statement.startswith(("SELECT user.", "UPDATE table_version"))]
+
+
+def _login(app):
+    client = app.test_client()
+    client.post("/auth/login", data={"email": "tester@example.com", "password": "password123"})
+    return client
+
+
+def test_property_delete_is_one_statement_and_cascades(no_audit_app):
+    app = no_audit_app
+    with app.app_context():
+        building_id, _tenant_id = _populate()
+    client = _login(app)
+
+    statements = _statements(client, "/properties", {"property_id": building_id, "submit": "削除"})
+    assert len(statements) == 1 and statements[0].startswith("DELETE FROM property")
+
+    with app.app_context():
+        assert db.session.scalars(db.select(Property.name)).all() == ["Kept"]
+        assert db.session.scalars(db.select(Tenant.name)).all() == ["Kept Tenant"]
+        assert db.session.scalar(db.select(db.func.count(Lease.id))) == 1
+
+
+def test_tenant_delete_is_one_statement_and_cascades(no_audit_app):
+    app = no_audit_app
+    with app.app_context():
+        building_id, tenant_id = _populate()
+    client = _login(app)
+
+    statements = _statements(client, f"/tenants/{tenant_id}/delete", {"tenant_id": tenant_id, "submit": "削除"})
+    assert len(statements) == 1 and statements[0].startswith("DELETE FROM tenant")
+    assert client.post("/tenants/9999/delete", data={"tenant_id": 9999, "submit": "削除"}).status_code == 404
+
+    with app.app_context():
+        assert db.session.get(Tenant, tenant_id) is None
+        assert db.session.scalar(db.select(db.func.count(Tenant.id)).where(Tenant.property_id == building_id)) == 19
+        assert db.session.scalar(db.select(db.func.count(Lease.id))) == 20
+
+
+def test_cascaded_rows_are_audited(app):
+    with app.app_context():
+        building_id, _tenant_id = _populate()
+    _login(app).post("/properties", data={"property_id": building_id, "submit": "削除"})
+
+    with app.app_context():
+        deletes = db.session.execute(
+            db.select(AuditEvent.entity_type, db.func.count()).where(AuditEvent.action == "delete").group_by(AuditEvent.entity_type),
+        ).all()
+        assert dict(deletes) == {"property": 1, "tenant": 20, "lease": 20}
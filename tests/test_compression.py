@@ -0,0 +1,66 @@
+"""レスポンス圧縮フックの適用条件とストリーミング対応を検証するテスト。"""
+
+import gzip
+import zlib
+
+from flask import Response, stream_with_context
+
+
+def _register_test_routes(app):
+    @app.route("/_stream")
+    def _stream():
+        def generate():
+            for index in range(50):
+                yield f"<p>row {index}</p>\n" * 20
+
+        return Response(
+            stream_with_context(generate()), mimetype="text/html", headers={"Accept-Ranges": "bytes"}
+        )
+
+    @app.route("/_encoded")
+    def _encoded():
+        body = gzip.compress(b"x" * 2000)
+        return Response(body, mimetype="text/html", headers={"Content-Encoding": "gzip"})
+
+
+def test_html_is_gzipped_when_accepted(auth_client):
+    plain = auth_client.get("/leases")
+    compressed = auth_client.get("/leases", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert gzip.decompress(compressed.data) == plain.data
+    assert len(compressed.data) < len(plain.data)
+
+
+def test_small_responses_are_not_compressed(app, client):
+    app.config["COMPRESS_MIN_SIZE"] = 10**6
+    response = client.get("/auth/login", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_streamed_response_is_compressed_without_buffering(app, client):
+    _register_test_routes(app)
+    response = client.get("/_stream", headers={"Accept-Encoding": "gzip"}, buffered=False)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert "Accept-Ranges" not in response.headers
+    chunks = list(response.response)
+    # 各チャンクが個別にフラッシュされて届く。
+    assert len(chunks) > 1
+    body = zlib.decompress(b"".join(chunks), 31).decode()
+    assert body.count("<p>row 49</p>") == 20
+
+
+def test_already_encoded_response_is_left_untouched(app, client):
+    _register_test_routes(app)
+    response = client.get("/_encoded", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == b"x" * 2000
+
+
+def test_uncompressed_response_keeps_accept_ranges(app, client):
+    _register_test_routes(app)
+    response = client.get("/_stream")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Accept-Ranges"] == "bytes"
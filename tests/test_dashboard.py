@@ -0,0 +1,104 @@
+"""ダッシュボード API と静的ファイルのフィンガープリント URL を検証するテスト。"""
+
+import re
+from datetime import date
+from decimal import Decimal
+
+from app.assets import asset_digest
+from app.extensions import db
+from app.models import Lease, LeaseStatus, Property, Tenant
+
+
+def _create_lease(app):
+    with app.app_context():
+        property_obj = Property(name="HQ", address="1 Main St")
+        tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj, unit_number="101")
+        lease = Lease(
+            property=property_obj,
+            tenant=tenant,
+            unit_number="101",
+            rent=Decimal("120000"),
+            start_date=date(2024, 1, 1),
+            status=LeaseStatus.ACTIVE,
+        )
+        db.session.add_all([property_obj, tenant, lease])
+        db.session.commit()
+
+
+def test_dashboard_shell_defers_data_to_api(auth_client):
+    html = auth_client.get("/").get_data(as_text=True)
+    assert "/api/dashboard" in html
+    assert "cdn.jsdelivr.net/npm/chart.js" not in html
+    assert re.search(r"/static/vendor/chartjs/chart\.umd\.min\.js\?v=[0-9a-f]{12}", html)
+    assert "cdn.jsdelivr.net" not in html
+    assert re.search(r"/static/vendor/bulma/bulma\.min\.css\?v=[0-9a-f]{12}", html)
+
+
+def test_dashboard_api_returns_metrics_for_month(app, auth_client):
+    _create_lease(app)
+    response = auth_client.get("/api/dashboard?month=2024-03")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["month"] == "2024-03"
+    assert data["property_count"] == 1
+    assert data["lease_count"] == 1
+    assert data["property_labels"] == ["HQ"]
+    assert data["property_values"] == [12.0]
+    assert data["forecast_counts"] == [1]
+    assert "private" in response.headers["Cache-Control"]
+    assert "max-age=60" in response.headers["Cache-Control"]
+
+    cached = auth_client.get(
+        "/api/dashboard?month=2024-03",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert cached.status_code == 304
+
+
+def test_dashboard_labels_follow_sort_key_order(app, auth_client):
+    with app.app_context():
+        # 名前の文字コード順なら ["beta", "あおば", "ベルビュー", "Ａｌｐｈａ"] になる。
+        starts = {"ベルビュー": date(2024, 1, 1), "Ａｌｐｈａ": date(2024, 1, 1), "beta": date(2024, 3, 1), "あおば": date(2024, 1, 1)}
+        for name, start in starts.items():
+            property_obj = Property(name=name, address="Tokyo")
+            tenant = Tenant(name=f"{name}の入居者", email="t@example.com", property=property_obj, unit_number="101")
+            db.session.add(
+                Lease(
+                    property=property_obj,
+                    tenant=tenant,
+                    unit_number="101",
+                    rent=Decimal("10000"),
+                    start_date=start,
+                    status=LeaseStatus.ACTIVE,
+                ),
+            )
+        db.session.commit()
+
+    data = auth_client.get("/api/dashboard?month=2024-03").get_json()
+    # beta は当月分（予測）にしか現れないが、並び順の途中に入る。
+    assert data["property_labels"] == ["Ａｌｐｈａ", "beta", "あおば", "ベルビュー"]
+    assert data["property_counts"] == [1, 0, 1, 1]
+    assert data["forecast_counts"] == [1, 1, 1, 1]
+
+
+def test_dashboard_api_rejects_invalid_month(auth_client):
+    response = auth_client.get("/api/dashboard?month=2024-13")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_fingerprinted_static_files_are_cached_long(app, client):
+    with app.test_request_context():
+        digest = asset_digest("css/theme.css")
+    response = client.get(f"/static/css/theme.css?v={digest}")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["Cache-Control"]
+    assert "max-age=31536000" in response.headers["Cache-Control"]
+    response.close()
+
+
+def test_stale_fingerprint_is_not_cached_as_immutable(client):
+    response = client.get("/static/css/theme.css?v=abc")
+    assert response.status_code == 200
+    assert "immutable" not in response.headers.get("Cache-Control", "")
+    response.close()
@@ -0,0 +1,136 @@
+"""解約済み契約のアーカイブと、アーカイブを含めた一覧・集計のテスト。"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.blueprints.core.routes import build_dashboard_data
+from app.extensions import db
+from app.lease_archive import archive_leases
+from app.models import AuditEvent, Lease, LeaseArchive, LeaseStatus, Property, Tenant, Unit
+
+
+@pytest.fixture
+def history(app):
+    """2023 年に終わった解約済み契約 3 件と、現役の契約 1 件。"""
+    with app.app_context():
+        property_obj = Property(name="HQ", address="Tokyo")
+        tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj, unit_number="101")
+        leases = [
+            Lease(
+                property=property_obj,
+                tenant=tenant,
+                unit_number="101",
+                rent=Decimal("100000"),
+                start_date=date(2023, month, 1),
+                end_date=date(2023, month + 1, 1) - timedelta(days=1),
+                status=LeaseStatus.TERMINATED,
+            )
+            for month in (1, 2, 3)
+        ]
+        leases.append(
+            Lease(
+                property=property_obj,
+                tenant=tenant,
+                unit_number="101",
+                rent=Decimal("120000"),
+                start_date=date(2023, 4, 1),
+                status=LeaseStatus.ACTIVE,
+            ),
+        )
+        db.session.add_all([property_obj, tenant, *leases])
+        db.session.commit()
+        yield [lease.id for lease in leases]
+
+
+def test_archive_moves_old_terminated_leases_in_chunks(app, history):
+    with app.app_context():
+        assert archive_leases(date(2023, 3, 1), chunk_size=1) == 2
+        assert sorted(db.session.scalars(db.select(Lease.id))) == history[2:]
+        archived = db.session.scalars(db.select(LeaseArchive).order_by(LeaseArchive.lease_id)).all()
+        assert [row.lease_id for row in archived] == history[:2]
+        assert archived[0].end_date == date(2023, 1, 31)
+        assert archived[0].rent == Decimal("100000")
+        archived_events = db.session.scalars(
+            db.select(AuditEvent.entity_id).where(AuditEvent.entity_type == "lease", AuditEvent.action == "archive"),
+        )
+        assert sorted(archived_events) == history[:2]
+
+        assert archive_leases(date(2023, 3, 1)) == 0
+
+
+def test_list_hides_archived_leases_unless_requested(app, auth_client, history):
+    with app.app_context():
+        archive_leases(date(2024, 1, 1))
+
+    default_html = auth_client.get("/leases").get_data(as_text=True)
+    assert "アーカイブ済みも表示" in default_html
+    assert "2023-01-01" not in default_html
+
+    archived_html = auth_client.get("/leases?archived=1").get_data(as_text=True)
+    assert "2023-01-01" in archived_html
+    assert archived_html.count("アーカイブ済み</span>") == 3
+
+
+def test_aggregates_include_archived_leases(app, auth_client, history):
+    with app.app_context():
+        before = build_dashboard_data(date(2023, 3, 1))
+        assert archive_leases(date(2024, 1, 1)) == 3
+        after = build_dashboard_data(date(2023, 3, 1))
+    assert after == before
+    assert after["lease_count"] == 4
+    assert after["property_values"] == [10.0]
+
+    data = auth_client.get("/reports/occupancy?from=2023-01&months=4").get_json()
+    assert data["properties"][0]["revenue"] == [100000.0, 100000.0, 100000.0, 120000.0]
+
+
+def test_archive_command(app, history):
+    result = app.test_cli_runner().invoke(args=["archive-leases", "--older-than", "30"])
+    assert result.exit_code == 0, result.output
+    assert "3 件をアーカイブしました" in result.output
+
+
+def test_new_leases_do_not_reuse_archived_ids(app, history):
+    with app.app_context():
+        lease = db.session.get(Lease, history[-1])
+        lease.status = LeaseStatus.TERMINATED
+        lease.end_date = date(2023, 4, 30)
+        db.session.commit()
+        property_id, tenant_id = lease.property_id, lease.tenant_id
+        assert archive_leases(date(2023, 5, 1)) == 4
+
+        replacement = Lease(
+            property_id=property_id,
+            tenant_id=tenant_id,
+            unit_number="101",
+            rent=Decimal("120000"),
+            start_date=date(2023, 5, 1),
+        )
+        db.session.add(replacement)
+        db.session.commit()
+        assert replacement.id > max(history)
+
+
+def test_merging_properties_keeps_archived_leases(app, auth_client, history):
+    with app.app_context():
+        assert archive_leases(date(2023, 3, 1)) == 2
+        other = Property(name="Annex", address="Tokyo")
+        db.session.add(other)
+        db.session.commit()
+        target_id = other.id
+
+    response = auth_client.post("/properties", data={"property_id": target_id, "name": "HQ", "address": "Tokyo"})
+    assert response.status_code == 302
+
+    with app.app_context():
+        assert db.session.scalars(db.select(Property.id)).all() == [target_id]
+        archived = db.session.scalars(db.select(LeaseArchive).order_by(LeaseArchive.lease_id)).all()
+        assert [(row.lease_id, row.property_id) for row in archived] == [(history[0], target_id), (history[1], target_id)]
+        unit = db.session.get(Unit, archived[0].unit_id)
+        assert (unit.property_id, unit.unit_number) == (target_id, "101")
+        merged = db.session.scalars(
+            db.select(AuditEvent.entity_id).where(AuditEvent.entity_type == "lease", AuditEvent.action == "merge"),
+        )
+        assert sorted(merged) == history[:2]
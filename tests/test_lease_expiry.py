@@ -0,0 +1,97 @@
+"""満了予定キュー（索引付き範囲検索・日次スナップショット）を検証するテスト。"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select, text, update
+
+from app.extensions import db
+from app.lease_expiry import expiring_count, refresh_all_organizations
+from app.models import Lease, LeaseExpirySnapshot, LeaseStatus, Property, Tenant
+
+
+def _populate():
+    today = date.today()
+    property_obj = Property(name="HQ", address="1 Main St")
+    tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj, unit_number="101")
+    cases = [
+        ("soon", LeaseStatus.ACTIVE, today + timedelta(days=5)),
+        ("pending", LeaseStatus.PENDING, today + timedelta(days=30)),
+        ("later", LeaseStatus.ACTIVE, today + timedelta(days=31)),
+        ("terminated", LeaseStatus.TERMINATED, today + timedelta(days=3)),
+        ("past", LeaseStatus.ACTIVE, today - timedelta(days=1)),
+        ("open", LeaseStatus.ACTIVE, None),
+    ]
+    for unit, status, end_date in cases:
+        db.session.add(
+            Lease(
+                property=property_obj,
+                tenant=tenant,
+                unit_number=unit,
+                rent=Decimal("100000"),
+                start_date=today - timedelta(days=300),
+                end_date=end_date,
+                status=status,
+            ),
+        )
+    db.session.commit()
+
+
+def test_expiring_view_api_and_cli(app, auth_client):
+    with app.app_context():
+        _populate()
+
+    data = auth_client.get("/api/leases/expiring?days=30").get_json()
+    assert [lease["unit_number"] for lease in data["leases"]] == ["soon", "pending"]
+    assert data["leases"][0]["days_left"] == 5
+    assert auth_client.get("/api/leases/expiring?days=0").status_code == 400
+
+    html = auth_client.get("/leases/expiring?days=40").get_data(as_text=True)
+    assert "later" in html and "terminated" not in html
+
+    result = app.test_cli_runner().invoke(args=["expiring-leases", "--days", "30", "--snapshot"])
+    assert result.exit_code == 0, result.output
+    assert "30日以内に満了する契約: 2 件" in result.output
+
+
+def test_dashboard_reads_snapshot_until_a_lease_changes(app, auth_client):
+    assert auth_client.get("/api/dashboard").get_json()["expiring_count"] == 0
+    with app.app_context():
+        _populate()
+        # ダッシュボードの GET はスナップショットを作らず、無ければその場で数える。
+        assert db.session.query(LeaseExpirySnapshot).count() == 0
+    assert auth_client.get("/api/dashboard").get_json()["expiring_count"] == 2
+
+    result = app.test_cli_runner().invoke(args=["expiring-leases", "--snapshot"])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        # スナップショットがあればそちらを読む（件数を書き換えて確かめる）。
+        db.session.execute(update(LeaseExpirySnapshot).values(expiring_count=99))
+        db.session.commit()
+    assert auth_client.get("/api/dashboard").get_json()["expiring_count"] == 99
+
+    with app.app_context():
+        lease = db.session.scalars(select(Lease).where(Lease.unit_number == "later")).one()
+        lease.end_date = date.today() + timedelta(days=10)
+        db.session.commit()
+    # 契約が変わったあとのスナップショットは読まず、その場で数える。
+    assert auth_client.get("/api/dashboard").get_json()["expiring_count"] == 3
+
+
+def test_scheduler_refreshes_snapshots(app):
+    with app.app_context():
+        _populate()
+        assert refresh_all_organizations() == {None: 2}
+        assert expiring_count(30) == 2
+
+
+def test_expiring_query_uses_status_end_date_index(app):
+    with app.app_context():
+        plan = db.session.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT id FROM lease "
+                "WHERE status IN ('active', 'pending') AND end_date >= :start AND end_date <= :end",
+            ),
+            {"start": "2024-01-01", "end": "2024-01-31"},
+        ).all()
+    assert any("ix_lease_status_end_date" in row[-1] for row in plan)
@@ -0,0 +1,86 @@
+"""同じ部屋の契約期間の重複判定と全件点検のテスト。"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.extensions import db
+from app.lease_overlaps import LeaseOverlap, find_overlaps, overlapping_leases
+from app.models import Lease, Property, Tenant
+
+
+@pytest.fixture
+def room(app):
+    with app.app_context():
+        property_obj = Property(name="HQ", address="Tokyo")
+        tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj, unit_number="101")
+        db.session.add_all([property_obj, tenant])
+        db.session.commit()
+        yield property_obj.id, tenant.id
+
+
+def _lease(property_id, tenant_id, start, end, unit="101"):
+    lease = Lease(property_id=property_id, tenant_id=tenant_id, rent=Decimal("100000"), unit_number=unit, start_date=start, end_date=end)
+    db.session.add(lease)
+    db.session.commit()
+    return lease.id
+
+
+def test_overlapping_leases_uses_half_open_periods(room):
+    property_id, tenant_id = room
+    first = _lease(property_id, tenant_id, date(2024, 1, 1), date(2024, 4, 1))
+    open_ended = _lease(property_id, tenant_id, date(2024, 10, 1), None)
+
+    # 前の契約の終了日に始まる契約は重ならない。
+    assert overlapping_leases(property_id, "101", date(2024, 4, 1), date(2024, 10, 1)) == []
+    assert [lease.id for lease in overlapping_leases(property_id, "101", date(2024, 3, 31), None)] == [first, open_ended]
+    assert [lease.id for lease in overlapping_leases(property_id, "101", date(2030, 1, 1), date(2030, 2, 1))] == [open_ended]
+    assert overlapping_leases(property_id, "102", date(2024, 1, 1), None) == []
+    assert overlapping_leases(property_id, "101", date(2024, 1, 1), date(2024, 2, 1), exclude_id=first) == []
+
+
+def test_find_overlaps_scans_each_room_once(room):
+    property_id, tenant_id = room
+    long_lease = _lease(property_id, tenant_id, date(2024, 1, 1), date(2024, 12, 1))
+    inside = _lease(property_id, tenant_id, date(2024, 2, 1), date(2024, 3, 1))
+    renewal = _lease(property_id, tenant_id, date(2024, 12, 1), date(2025, 6, 1))
+    tail = _lease(property_id, tenant_id, date(2025, 5, 1), None)
+    _lease(property_id, tenant_id, date(2024, 2, 1), None, unit="102")
+
+    overlaps = list(find_overlaps(batch_size=2))
+    assert overlaps == [
+        LeaseOverlap(property_id, "101", long_lease, inside, date(2024, 2, 1), date(2024, 3, 1)),
+        LeaseOverlap(property_id, "101", renewal, tail, date(2025, 5, 1), date(2025, 6, 1)),
+    ]
+
+
+def test_create_rejects_overlap_instead_of_overwriting(app, auth_client, room):
+    property_id, tenant_id = room
+    with app.app_context():
+        existing = _lease(property_id, tenant_id, date(2024, 1, 1), None)
+
+    form = {"property_id": property_id, "tenant_id": tenant_id, "rent": "10", "unit_number": "101", "status": "pending"}
+    response = auth_client.post("/leases", data={**form, "start_date": "2025-01-01", "end_date": ""}, follow_redirects=True)
+    assert "期間の重なる契約があります" in response.get_data(as_text=True)
+
+    with app.app_context():
+        db.session.get(Lease, existing).end_date = date(2025, 1, 1)
+        db.session.commit()
+    response = auth_client.post("/leases", data={**form, "start_date": "2025-01-01", "end_date": ""}, follow_redirects=True)
+    assert "契約を登録しました。" in response.get_data(as_text=True)
+
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count(Lease.id))) == 2
+        assert list(find_overlaps()) == []
+
+
+def test_check_overlaps_command_exits_non_zero(app, room):
+    property_id, tenant_id = room
+    with app.app_context():
+        _lease(property_id, tenant_id, date(2024, 1, 1), None)
+        _lease(property_id, tenant_id, date(2024, 6, 1), date(2024, 7, 1))
+
+    result = app.test_cli_runner().invoke(args=["check-overlaps"])
+    assert result.exit_code == 1
+    assert "期間の重なる契約: 1 件" in result.output
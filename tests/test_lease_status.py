@@ -0,0 +1,92 @@
+"""契約状態の一括自動更新（チャンク UPDATE・CLI・スケジューラ）を検証するテスト。"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models import AuditEvent, Lease, LeaseStatus, Property, Tenant
+
+TODAY = date(2024, 6, 15)
+
+
+def _populate(today=TODAY):
+    property_obj = Property(name="HQ", address="1 Main St")
+    tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj)
+    cases = [
+        ("starts", LeaseStatus.PENDING, today - timedelta(days=1), None),
+        ("starts-today", LeaseStatus.PENDING, today, today + timedelta(days=30)),
+        ("future", LeaseStatus.PENDING, today + timedelta(days=1), None),
+        ("ended", LeaseStatus.ACTIVE, today - timedelta(days=90), today - timedelta(days=1)),
+        ("ends-today", LeaseStatus.ACTIVE, today - timedelta(days=90), today),
+        ("never-started", LeaseStatus.PENDING, today - timedelta(days=90), today - timedelta(days=10)),
+        ("closed", LeaseStatus.TERMINATED, today - timedelta(days=90), today - timedelta(days=10)),
+    ]
+    for unit, status, start_date, end_date in cases:
+        db.session.add(
+            Lease(
+                property=property_obj,
+                tenant=tenant,
+                unit_number=unit,
+                rent=Decimal("100000"),
+                start_date=start_date,
+                end_date=end_date,
+                status=status,
+            ),
+        )
+    db.session.commit()
+
+
+def test_cli_advances_statuses_in_chunks(app):
+    with app.app_context():
+        _populate()
+
+    result = app.test_cli_runner().invoke(
+        args=["advance-lease-status", "--date", TODAY.isoformat(), "--chunk-size", "1"],
+    )
+    assert result.exit_code == 0, result.output
+    assert "pending->terminated: 1 件" in result.output
+    assert "active->terminated: 1 件" in result.output
+    assert "pending->active: 2 件" in result.output
+    assert "合計 4 件" in result.output
+
+    with app.app_context():
+        statuses = dict(db.session.execute(db.select(Lease.unit_number, Lease.status)).all())
+        assert statuses == {
+            "starts": "active",
+            "starts-today": "active",
+            "future": "pending",
+            "ended": "terminated",
+            "ends-today": "active",
+            "never-started": "terminated",
+            "closed": "terminated",
+        }
+        updates = db.session.scalars(db.select(AuditEvent).where(AuditEvent.action == "update")).all()
+        assert len(updates) == 4
+        assert updates[0].changes == {"status": ["pending", "terminated"]}
+
+    # 2 回目は何も変わらない。
+    result = app.test_cli_runner().invoke(args=["advance-lease-status", "--date", TODAY.isoformat()])
+    assert "合計 0 件" in result.output
+
+
+def test_scheduler_runs_registered_job(app):
+    with app.app_context():
+        _populate(date.today())
+    scheduler = app.extensions["scheduler"]
+    assert scheduler.run_pending() == ["advance-lease-status", "lease-expiry-snapshot"]
+    # 次回の実行時刻までは再実行しない。
+    assert scheduler.run_pending() == []
+    with app.app_context():
+        assert db.session.scalar(db.select(Lease.status).where(Lease.unit_number == "future")) == "pending"
+        assert db.session.scalar(db.select(Lease.status).where(Lease.unit_number == "starts")) == "active"
+
+
+def test_pending_start_query_uses_status_start_date_index(app):
+    with app.app_context():
+        plan = db.session.execute(
+            text("EXPLAIN QUERY PLAN SELECT id FROM lease WHERE status = 'pending' AND start_date <= :today"),
+            {"today": "2024-06-15"},
+        ).all()
+    assert any("ix_lease_status_start_date" in row[-1] for row in plan)
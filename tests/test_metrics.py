@@ -0,0 +1,120 @@
+"""/metrics エンドポイントと mmap 計測値ストアのテスト。"""
+
+import multiprocessing
+import os
+import re
+import threading
+from pathlib import Path
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.metrics import MetricsStore, render_exposition
+from app.models import User
+from config import TestConfig
+
+
+@pytest.fixture
+def metrics_app(tmp_path):
+    class MetricsConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'metrics.db'}"
+        METRICS_ENABLED = True
+        METRICS_DIR = str(tmp_path / "metrics")
+
+    app = create_app(MetricsConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(email="tester@example.com")
+        user.set_password("password123")
+        db.session.add(user)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def _sample(body: str, line_prefix: str) -> float:
+    match = re.search(rf"^{re.escape(line_prefix)} (\S+)$", body, re.MULTILINE)
+    assert match, f"{line_prefix} が見つかりません"
+    return float(match.group(1))
+
+
+def test_metrics_disabled_by_default(client):
+    assert client.get("/metrics").status_code == 404
+
+
+def test_request_latency_status_and_pool_metrics(metrics_app):
+    client = metrics_app.test_client()
+    client.post("/auth/login", data={"email": "tester@example.com", "password": "password123"})
+    client.get("/leases")
+    client.get("/leases")
+    client.get("/properties/999/edit")
+
+    response = client.get("/metrics")
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert _sample(body, 'http_requests_total{endpoint="core.leases",method="GET",status="200"}') == 2
+    assert _sample(body, 'http_requests_total{endpoint="auth.login",method="POST",status="302"}') == 1
+    assert 'status="404"' in body
+    assert _sample(body, 'http_request_duration_seconds_count{endpoint="core.leases",method="GET"}') == 2
+    assert _sample(body, 'http_request_duration_seconds_bucket{endpoint="core.leases",method="GET",le="+Inf"}') == 2
+    assert _sample(body, 'http_request_db_seconds_count{endpoint="core.leases"}') == 2
+    assert _sample(body, 'db_statements_total{endpoint="core.leases"}') >= 2
+    assert _sample(body, 'db_pool_checked_out{database="default"}') == 0
+    assert "endpoint=\"metrics\"" not in body
+
+
+def _record_in_child(directory: str, retire: bool = False) -> None:
+    store = MetricsStore(Path(directory))
+    for _ in range(100):
+        store.inc("http_requests_total", {"endpoint": "core.leases", "method": "GET", "status": "200"})
+        store.observe("http_request_duration_seconds", {"endpoint": "core.leases", "method": "GET"}, 0.02)
+    store.set_gauge("db_pool_size", {"database": "default"}, 5)
+    if retire:
+        store.retire()
+
+
+def test_store_aggregates_across_processes(tmp_path):
+    processes = [multiprocessing.Process(target=_record_in_child, args=(str(tmp_path),)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    body = render_exposition(MetricsStore(tmp_path).collect())
+    assert _sample(body, 'http_requests_total{endpoint="core.leases",method="GET",status="200"}') == 300
+    labels = 'endpoint="core.leases",method="GET",le="0.01"'
+    assert _sample(body, f"http_request_duration_seconds_bucket{{{labels}}}") == 0
+    labels = 'endpoint="core.leases",method="GET",le="0.025"'
+    assert _sample(body, f"http_request_duration_seconds_bucket{{{labels}}}") == 300
+    assert _sample(body, 'http_request_duration_seconds_sum{endpoint="core.leases",method="GET"}') == pytest.approx(6.0)
+
+
+def test_exited_processes_are_folded_into_the_aggregate_file(tmp_path):
+    # 終了時に retire したワーカーと、retire せずに終わったワーカー（次の collect で畳まれる）。
+    for retire in (True, False, False):
+        process = multiprocessing.Process(target=_record_in_child, args=(str(tmp_path), retire))
+        process.start()
+        process.join()
+
+    store = MetricsStore(tmp_path)
+
+    def record() -> None:
+        for _ in range(500):
+            store.inc("http_requests_total", {"endpoint": "core.index", "method": "GET", "status": "200"})
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    body = render_exposition(store.collect())
+    assert _sample(body, 'http_requests_total{endpoint="core.leases",method="GET",status="200"}') == 300
+    assert _sample(body, 'http_requests_total{endpoint="core.index",method="GET",status="200"}') == 2000
+    assert 'db_pool_size{database="default"}' not in body
+    assert sorted(path.name for path in tmp_path.glob("*.db")) == ["aggregate.db", f"counter_{os.getpid()}.db"]
+    # 畳んだ後に読み直しても二重に数えない。
+    assert render_exposition(store.collect()) == body
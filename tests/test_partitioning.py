@@ -0,0 +1,147 @@
+"""組織ごとのデータベース分割とパーティション単位のマイグレーションを検証するテスト。"""
+
+import sqlite3
+from datetime import date
+from decimal import Decimal
+
+import pytest
+import sqlalchemy as sa
+
+from app import create_app
+from app.extensions import db
+from app.lease_archive import archive_leases
+from app.models import Lease, LeaseArchive, LeaseStatus, Property, Tenant, User
+from app.partitioning import use_organization
+from config import TestConfig
+
+
+@pytest.fixture
+def partitioned_app(tmp_path):
+    class PartitionConfig(TestConfig):
+        ORG_DATABASE_URI_TEMPLATE = f"sqlite:///{tmp_path}/{{organization}}.db"
+
+    app = create_app(PartitionConfig)
+    with app.app_context():
+        db.create_all()
+        for email, organization in (("acme@example.com", "acme"), ("plain@example.com", None)):
+            user = User(email=email, organization=organization)
+            user.set_password("password123")
+            db.session.add(user)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        app.extensions["partitions"].dispose()
+        db.session.remove()
+        db.drop_all()
+
+
+def _login(app, email):
+    client = app.test_client()
+    client.post("/auth/login", data={"email": email, "password": "password123"})
+    return client
+
+
+def test_requests_use_the_users_organization_partition(partitioned_app, tmp_path):
+    with partitioned_app.app_context():
+        partitioned_app.extensions["partitions"].create_all("acme")
+
+    acme = _login(partitioned_app, "acme@example.com")
+    response = acme.post(
+        "/properties",
+        data={"name": "ACME Tower", "address": "1 Main St"},
+        follow_redirects=True,
+    )
+    assert "物件を登録しました。" in response.get_data(as_text=True)
+    assert "ACME Tower" in acme.get("/properties").get_data(as_text=True)
+    assert acme.get("/api/dashboard").get_json()["property_count"] == 1
+
+    plain = _login(partitioned_app, "plain@example.com")
+    assert "ACME Tower" not in plain.get("/properties").get_data(as_text=True)
+    assert plain.get("/api/dashboard").get_json()["property_count"] == 0
+
+    with sqlite3.connect(tmp_path / "acme.db") as conn:
+        assert conn.execute("SELECT name FROM property").fetchall() == [("ACME Tower",)]
+    with partitioned_app.app_context():
+        assert Property.query.count() == 0
+        with use_organization("acme"):
+            assert Property.query.count() == 1
+
+
+def test_partitions_upgrade_migrates_every_organization(partitioned_app, tmp_path):
+    runner = partitioned_app.test_cli_runner()
+    result = runner.invoke(args=["partitions", "upgrade"])
+    assert result.exit_code == 0, result.output
+    assert "1 組織のパーティション" in result.output
+
+    with sqlite3.connect(tmp_path / "acme.db") as conn:
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {"property", "tenant", "lease", "alembic_version"} <= tables
+
+    listing = runner.invoke(args=["partitions", "list"])
+    assert listing.output.startswith("acme\t")
+    assert runner.invoke(args=["expiring-leases", "--org", "ACME!"]).exit_code != 0
+
+
+def test_occupancy_report_reads_archived_leases_from_the_partition(partitioned_app):
+    with partitioned_app.app_context():
+        partitioned_app.extensions["partitions"].create_all("acme")
+        for organization, rent in ((None, Decimal("5")), ("acme", Decimal("1"))):
+            with use_organization(organization):
+                property_obj = Property(name="HQ", address="1 Main St")
+                tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj, unit_number="101")
+                for start, end in ((date(2024, 1, 1), date(2024, 1, 31)), (date(2024, 2, 1), None)):
+                    status = LeaseStatus.TERMINATED if end else LeaseStatus.ACTIVE
+                    db.session.add(
+                        Lease(
+                            property=property_obj,
+                            tenant=tenant,
+                            unit_number="101",
+                            rent=rent,
+                            start_date=start,
+                            end_date=end,
+                            status=status,
+                        ),
+                    )
+                db.session.commit()
+                assert archive_leases(date(2024, 6, 1)) == 1
+
+        # ORM を通さない UNION も構成する SELECT のテーブルから組織のパーティションへ振り分ける。
+        with use_organization("acme"):
+            rents = db.session.execute(
+                sa.union_all(sa.select(Lease.__table__.c.rent), sa.select(LeaseArchive.__table__.c.rent)),
+            ).scalars()
+            assert sorted(rents) == [Decimal("1"), Decimal("1")]
+
+    acme = _login(partitioned_app, "acme@example.com")
+    (hq,) = acme.get("/reports/occupancy?from=2024-01&months=2").get_json()["properties"]
+    assert hq["revenue"] == [1.0, 1.0]
+
+
+def test_registration_cannot_choose_an_organization(partitioned_app):
+    client = partitioned_app.test_client()
+    client.post(
+        "/auth/register",
+        data={
+            "email": "intruder@example.com",
+            "password": "password123",
+            "confirm_password": "password123",
+            "organization": "acme",
+        },
+    )
+    with partitioned_app.app_context():
+        user = User.query.filter_by(email="intruder@example.com").one()
+        assert user.organization is None
+
+
+def test_partitions_assign_sets_and_clears_organization(partitioned_app):
+    runner = partitioned_app.test_cli_runner()
+    result = runner.invoke(args=["partitions", "assign", "plain@example.com", "beta"])
+    assert result.exit_code == 0, result.output
+    with partitioned_app.app_context():
+        assert User.query.filter_by(email="plain@example.com").one().organization == "beta"
+
+    assert runner.invoke(args=["partitions", "assign", "plain@example.com"]).exit_code == 0
+    assert runner.invoke(args=["partitions", "assign", "plain@example.com", "Beta!"]).exit_code != 0
+    assert runner.invoke(args=["partitions", "assign", "nobody@example.com", "beta"]).exit_code != 0
+    with partitioned_app.app_context():
+        assert User.query.filter_by(email="plain@example.com").one().organization is None
@@ -0,0 +1,75 @@
+"""flask profile-route のレポート出力のテスト。"""
+
+import cProfile
+import pstats
+
+from app.extensions import db
+from app.models import Property
+from app.profiling import collapsed_stacks, profile_route
+
+
+def test_profile_route_writes_reports_as_user(app, tmp_path):
+    with app.app_context():
+        db.session.add(Property(name="計測物件", address="Tokyo"))
+        db.session.commit()
+
+    report = profile_route(app, "/leases", repeat=3, user_email="tester@example.com", output_dir=tmp_path, top=5)
+
+    assert report.status_codes == {200: 3}
+    stats = pstats.Stats(str(report.pstats_path))
+    assert any(name == "leases" for _filename, _lineno, name in stats.stats)
+    lines = report.collapsed_path.read_text(encoding="utf-8").splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("routes.py" in line and "(leases)" in line for line in lines)
+    allocations = report.allocations_path.read_text(encoding="utf-8").splitlines()
+    assert allocations[0] == "GET /leases x 3"
+    assert len(allocations) <= 3 + 5
+
+
+def test_profile_route_posts_form_without_csrf_token(app, tmp_path):
+    app.config["WTF_CSRF_ENABLED"] = True
+    report = profile_route(
+        app,
+        "/properties",
+        method="POST",
+        repeat=2,
+        user_email="tester@example.com",
+        data={"name": "POST計測", "address": "Osaka"},
+        output_dir=tmp_path,
+    )
+
+    assert report.status_codes == {302: 2}
+    assert app.config["WTF_CSRF_ENABLED"] is True
+    with app.app_context():
+        assert db.session.query(Property).filter_by(name="POST計測").count() == 1
+
+
+def test_collapsed_stacks_split_time_by_caller():
+    def leaf():
+        return sum(range(20000))
+
+    def left():
+        return leaf()
+
+    def right():
+        return leaf() + leaf()
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    left()
+    right()
+    profiler.disable()
+
+    stacks = collapsed_stacks(pstats.Stats(profiler))
+    left_leaf = sum(value for stack, value in stacks.items() if "(left);" in stack and stack.endswith("(leaf)"))
+    right_leaf = sum(value for stack, value in stacks.items() if "(right);" in stack and stack.endswith("(leaf)"))
+    assert 0 < left_leaf < right_leaf
+
+
+def test_profile_route_cli_rejects_unknown_user(app, tmp_path):
+    result = app.test_cli_runner().invoke(
+        args=["profile-route", "/", "--as-user", "nobody@example.com", "--output-dir", str(tmp_path)],
+    )
+
+    assert result.exit_code != 0
+    assert "nobody@example.com" in result.output
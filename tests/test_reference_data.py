@@ -0,0 +1,106 @@
+"""テーブル版カウンタで無効化する参照データキャッシュのテスト。"""
+
+import pytest
+import sqlalchemy as sa
+
+from app import create_app
+from app.extensions import db
+from app.models import Property, Tenant, Unit, User
+from app.reference_data import property_choices, table_versions, units_by_property
+from config import TestConfig
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """同じ DB ファイルを共有する 2 つのワーカー（キャッシュは別々）。"""
+
+    class SharedFileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'shared.db'}"
+
+    first, second = create_app(SharedFileConfig), create_app(SharedFileConfig)
+    with first.app_context():
+        db.create_all()
+        user = User(email="tester@example.com")
+        user.set_password("password123")
+        db.session.add_all([user, Property(name="Beta", address="Osaka"), Property(name="Alpha", address="Tokyo")])
+        db.session.commit()
+    yield first, second
+    with first.app_context():
+        db.drop_all()
+
+
+def test_choices_are_reused_until_another_worker_commits(workers, query_budget):
+    first, second = workers
+    with second.app_context():
+        assert [name for _id, name in property_choices()] == ["Alpha", "Beta"]
+    with second.app_context(), query_budget(1) as budget:
+        # 2 回目は版カウンタを読むだけで物件テーブルは読まない。
+        assert [name for _id, name in property_choices()] == ["Alpha", "Beta"]
+    assert "table_version" in budget.statements[0]
+
+    with first.app_context():
+        db.session.scalars(sa.select(Property).where(Property.name == "Beta")).one().name = "Aardvark"
+        db.session.commit()
+
+    with second.app_context():
+        assert [name for _id, name in property_choices()] == ["Aardvark", "Alpha"]
+
+
+def test_bulk_statements_and_cascades_bump_versions(workers):
+    first, _second = workers
+    with first.app_context():
+        alpha_id = db.session.scalar(sa.select(Property.id).where(Property.name == "Alpha"))
+        db.session.add_all(
+            [
+                Tenant(name="A", email="a@example.com", property_id=alpha_id, unit_number="102"),
+                Tenant(name="B", email="b@example.com", property_id=alpha_id, unit_number="101"),
+            ],
+        )
+        db.session.commit()
+        assert units_by_property()[alpha_id] == ("101", "102")
+        before = dict(table_versions())
+
+        db.session.execute(sa.update(Unit).where(Unit.unit_number == "102").values(unit_number="201"))
+        db.session.commit()
+        assert units_by_property()[alpha_id] == ("101", "201")
+        assert table_versions()["unit"] == before["unit"] + 1
+
+        db.session.execute(sa.delete(Property).where(Property.id == alpha_id))
+        db.session.commit()
+        after = table_versions()
+        assert [after[name] - before[name] for name in ("property", "unit", "tenant", "lease")] == [1, 2, 1, 1]
+        assert alpha_id not in units_by_property()
+
+
+def test_failed_tenant_post_does_not_reload_properties(workers, query_budget):
+    first, _second = workers
+    client = first.test_client()
+    client.post("/auth/login", data={"email": "tester@example.com", "password": "password123"})
+    client.get("/tenants")
+
+    with query_budget(4) as budget:
+        response = client.post("/tenants", data={"name": "", "email": "bad"})
+    assert response.status_code == 200
+    assert not any(statement.startswith("SELECT property.id, property.name") for statement in budget.statements)
+
+
+def test_databases_sharing_a_cache_file_do_not_see_each_others_choices(tmp_path):
+    apps = []
+    for name in ("a", "b"):
+
+        class DatabaseConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / f'{name}.db'}"
+            CACHE_SHARED_ENABLED = True
+            CACHE_SHARED_PATH = str(tmp_path / "cache.sqlite")
+            CACHE_GENERATION_POLL = 0
+
+        app = create_app(DatabaseConfig)
+        with app.app_context():
+            db.create_all()
+            db.session.add(Property(name=f"{name.upper()}-building", address="Tokyo"))
+            db.session.commit()
+        apps.append(app)
+
+    for app, expected in zip(apps, ("A-building", "B-building")):
+        with app.app_context():
+            assert [name for _id, name in property_choices()] == [expected]
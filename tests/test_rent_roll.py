@@ -0,0 +1,162 @@
+"""レントロールの並列生成・CLI・ジョブ API を検証するテスト。"""
+
+import csv
+import io
+import multiprocessing
+import os
+import time
+import uuid
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+from app import create_app
+from app.extensions import db
+from app.jobs import JobStore
+from app.models import Lease, LeaseStatus, Property, Tenant, User
+from app.rent_roll import RentRollJob, generate_rent_rolls, get_job, prune_jobs
+from config import TestConfig
+
+
+def _populate():
+    for index in range(3):
+        property_obj = Property(name=f"物件{index}", address="東京都")
+        occupied = Tenant(name=f"入居者{index}", email=f"t{index}@example.com", property=property_obj, unit_number="101")
+        vacant = Tenant(name="空室", email="", property=property_obj, unit_number="102")
+        lease = Lease(
+            property=property_obj,
+            tenant=occupied,
+            unit_number="101",
+            rent=Decimal("98000"),
+            start_date=date(2024, 1, 1),
+            status=LeaseStatus.ACTIVE,
+        )
+        db.session.add_all([property_obj, occupied, vacant, lease])
+    db.session.commit()
+
+
+def _read_zip(data) -> dict[str, list[list[str]]]:
+    with zipfile.ZipFile(data) as archive:
+        return {
+            name.rsplit("/", 1)[-1]: list(csv.reader(io.StringIO(archive.read(name).decode("utf-8-sig"))))
+            for name in archive.namelist()
+        }
+
+
+def test_rent_roll_uses_process_pool_with_file_database(tmp_path):
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'rent_roll.db'}"
+
+    app = create_app(FileConfig)
+    progress = []
+    with app.app_context():
+        db.create_all()
+        _populate()
+        output = tmp_path / "rent_roll.zip"
+        results = generate_rent_rolls(
+            db.engine,
+            date(2024, 5, 1),
+            output,
+            workers=2,
+            progress=lambda done, total, name: progress.append((done, total)),
+        )
+
+    assert len(results) == 3
+    assert sorted(progress) == [(1, 3), (2, 3), (3, 3)]
+    files = _read_zip(output)
+    assert len(files) == 3
+    rows = files["00001_物件0.csv"]
+    assert rows[0] == ["号室", "入居者", "賃料", "状態", "契約開始日", "契約終了日"]
+    assert rows[1] == ["101", "入居者0", "98000", "契約中", "2024-01-01", ""]
+    assert rows[2] == ["102", "", "", "空室", "", ""]
+
+
+def test_rent_roll_cli_and_job_endpoint(app, auth_client, tmp_path):
+    app.config["RENT_ROLL_DIR"] = str(tmp_path / "rent_rolls")
+    with app.app_context():
+        _populate()
+        other = User(email="acme@example.com", organization="acme")
+        other.set_password("password123")
+        db.session.add(other)
+        db.session.commit()
+
+    output = tmp_path / "cli.zip"
+    result = app.test_cli_runner().invoke(args=["rent-roll", "--month", "2024-05", "--output", str(output)])
+    assert result.exit_code == 0, result.output
+    assert "[3/3]" in result.output
+    assert len(_read_zip(output)) == 3
+
+    response = auth_client.post("/reports/rent-roll", json={"month": "2024-05"})
+    assert response.status_code == 202
+    status_url = response.headers["Location"]
+    for _ in range(100):
+        status = auth_client.get(status_url).get_json()
+        if status["state"] in ("finished", "failed"):
+            break
+        time.sleep(0.05)
+    assert status["state"] == "finished", status
+    assert status["done"] == status["total"] == 3
+
+    download = auth_client.get(status["download_url"])
+    assert download.headers["Content-Disposition"].endswith("rent_roll_2024-05.zip")
+    assert len(_read_zip(io.BytesIO(download.data))) == 3
+    assert [path.name for path in (tmp_path / "rent_rolls").glob("*.zip")] == [f"rent_roll_2024-05_{status['id']}.zip"]
+
+    # 他の組織の利用者からはジョブの存在も分からない。
+    acme = app.test_client()
+    acme.post("/auth/login", data={"email": "acme@example.com", "password": "password123"})
+    assert acme.get(status_url).status_code == 404
+    assert acme.get(status["download_url"]).status_code == 404
+
+    assert auth_client.post("/reports/rent-roll", json={"month": "bad"}).status_code == 400
+
+
+def test_prune_jobs_removes_expired_zip_files(tmp_path):
+    stale = tmp_path / "rent_roll_2024-01_old.zip"
+    fresh = tmp_path / "rent_roll_2024-02_new.zip"
+    for path in (stale, fresh):
+        path.write_bytes(b"zip")
+    two_days_ago = time.time() - 2 * 24 * 60 * 60
+    os.utime(stale, (two_days_ago, two_days_ago))
+
+    assert prune_jobs(tmp_path, ttl=24 * 60 * 60) == 1
+    assert sorted(path.name for path in tmp_path.glob("*.zip")) == [fresh.name]
+
+
+def _running_job(directory, organization=None, pid=None) -> RentRollJob:
+    job = RentRollJob(id=uuid.uuid4().hex, month=date(2024, 5, 1), path=directory / "x.zip", organization=organization, state="running")
+    if pid is not None:
+        job.pid = pid
+    JobStore(directory).save(job.to_record())
+    return job
+
+
+def test_job_state_is_shared_across_workers_and_limited(app, auth_client, tmp_path):
+    directory = tmp_path / "rent_rolls"
+    app.config["RENT_ROLL_DIR"] = str(directory)
+    # 別のワーカーが起動した実行中のジョブ（状態ファイルだけがこのプロセスから見える）。
+    running = _running_job(directory)
+    status = auth_client.get(f"/reports/rent-roll/{running.id}").get_json()
+    assert status["state"] == "running"
+
+    response = auth_client.post("/reports/rent-roll", json={"month": "2024-05"})
+    assert response.status_code == 429
+    assert "生成中" in response.get_json()["error"]
+
+    # 全体の上限は組織をまたいで数える。
+    JobStore(directory).save({**running.to_record(), "organization": "acme"})
+    response = auth_client.post("/reports/rent-roll", json={"month": "2024-05"})
+    assert response.status_code == 429
+    assert "1 件まで" in response.get_json()["error"]
+
+
+def test_jobs_of_exited_workers_are_reported_as_failed(tmp_path):
+    child = multiprocessing.Process(target=time.sleep, args=(0,))
+    child.start()
+    child.join()
+    job = _running_job(tmp_path, pid=child.pid)
+
+    loaded = get_job(tmp_path, job.id)
+    assert loaded.state == "failed"
+    assert loaded.finished_at is not None
+    assert JobStore(tmp_path).active() == []
@@ -0,0 +1,59 @@
+"""fork 前のウォームアップと prefork サーバーのワーカー入れ替えのテスト。"""
+
+import os
+import signal
+import sys
+import urllib.request
+
+from app import create_app
+from app.extensions import db
+from app.models import Property
+from app.reference_data import property_choices
+from app.server import PreforkServer, warm_up
+from config import TestConfig
+
+
+def test_warm_up_loads_modules_templates_and_reference_data(app, query_budget):
+    with app.app_context():
+        db.session.add(Property(name="HQ", address="Tokyo"))
+        db.session.commit()
+
+    report = warm_up(app)
+    assert "app.backup" in sys.modules and "app.lease_overlaps" in sys.modules
+    assert report.templates == len(app.jinja_env.list_templates()) > 0
+    assert report.organizations == 1
+    # 2 回目以降のコンパイルは Jinja のキャッシュから返る。
+    assert app.jinja_env.get_template("base.html") is app.jinja_env.get_template("base.html")
+    with app.app_context(), query_budget(1):
+        assert [name for _id, name in property_choices()] == ["HQ"]
+
+
+def test_workers_are_recycled_after_max_requests(tmp_path):
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'serve.db'}"
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+    app.add_url_rule("/_pid", "pid", lambda: str(os.getpid()))
+
+    server = PreforkServer(app, "127.0.0.1", 0, workers=1, max_requests=2, graceful_timeout=5)
+    _host, port = server.bind()
+    master = os.fork()
+    if master == 0:
+        try:
+            server.run()
+        finally:
+            os._exit(0)
+    server.socket.close()
+
+    try:
+        pids = [urllib.request.urlopen(f"http://127.0.0.1:{port}/_pid", timeout=10).read().decode() for _ in range(6)]
+    finally:
+        os.kill(master, signal.SIGTERM)
+        _pid, status = os.waitpid(master, 0)
+
+    assert pids[0] == pids[1] and pids[2] == pids[3] and pids[4] == pids[5]
+    assert len(set(pids)) == 3
+    assert str(master) not in pids
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,96 @@
+"""スロークエリログの記録内容と flask slow-queries report のテスト。"""
+
+import json
+
+from app import create_app
+from app.extensions import db
+from app.models import Tenant
+from app.slow_queries import _explain, normalize_sql, read_entries, summarize
+from config import TestConfig
+
+
+def _make_app(tmp_path):
+    class SlowQueryConfig(TestConfig):
+        SLOW_QUERY_ENABLED = True
+        SLOW_QUERY_THRESHOLD_MS = 0
+        SLOW_QUERY_LOG = str(tmp_path / "slow.jsonl")
+
+    return create_app(SlowQueryConfig)
+
+
+def test_normalize_sql_collapses_literals_and_in_lists():
+    first = normalize_sql("SELECT *\n  FROM lease WHERE id IN (?, ?, ?) AND status = 'active' LIMIT 10")
+    second = normalize_sql("SELECT * FROM lease WHERE id IN (?, ?) AND status = 'ended' LIMIT 5")
+    assert first == second == "SELECT * FROM lease WHERE id IN (?, ...) AND status = ? LIMIT ?"
+
+
+def test_slow_statements_are_logged_with_plan_and_redacted_parameters(tmp_path):
+    app = _make_app(tmp_path)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Tenant(name="John Doe", email="john@example.com"))
+        db.session.commit()
+        db.session.scalars(db.select(Tenant).where(Tenant.email == "john@example.com")).all()
+        db.session.remove()
+        db.drop_all()
+
+    entries = list(read_entries(tmp_path / "slow.jsonl"))
+    lookup = next(entry for entry in entries if entry["sql"].startswith("SELECT") and "tenant.email = ?" in entry["sql"])
+    assert lookup["parameters"] == ["<str>"]
+    assert "john@example.com" not in (tmp_path / "slow.jsonl").read_text(encoding="utf-8")
+    assert any("tenant" in line for line in lookup["plan"])
+    assert lookup["endpoint"] is None
+
+
+def _entry(sql, duration_ms, endpoint=None, plan=None):
+    return {"sql": sql, "duration_ms": duration_ms, "endpoint": endpoint, "plan": plan}
+
+
+def test_summarize_groups_by_sql_and_keeps_the_slowest_plan():
+    groups = summarize(
+        [
+            _entry("SELECT * FROM lease", 40, "core.leases", ["SCAN lease"]),
+            _entry("INSERT INTO property", 30),
+            _entry("SELECT * FROM lease", 90, "reports.occupancy", ["SEARCH lease"]),
+            _entry("INSERT INTO property", 50, "core.properties"),
+        ],
+    )
+
+    assert [group.sql for group in groups] == ["SELECT * FROM lease", "INSERT INTO property"]
+    lease, insert = groups
+    assert (lease.count, lease.total_ms, lease.max_ms, lease.average_ms) == (2, 130, 90, 65)
+    assert lease.plan == ["SEARCH lease"]
+    assert lease.endpoints == {"core.leases", "reports.occupancy"}
+    assert insert.endpoints == {"core.properties"}
+
+
+def test_report_ranks_sql_shapes_by_total_time(tmp_path):
+    app = _make_app(tmp_path)
+    entries = [
+        _entry("DROP TABLE property", 5),
+        _entry("INSERT INTO property (name) VALUES (?)", 20, "core.properties", ["SCAN property"]),
+        _entry("INSERT INTO property (name) VALUES (?)", 15, "core.properties"),
+        _entry("SELECT * FROM lease", 10),
+    ]
+    (tmp_path / "slow.jsonl").write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+
+    result = app.test_cli_runner().invoke(args=["slow-queries", "report", "--limit", "2"])
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert lines[0].startswith("#1 合計 35.0 ms / 2 回")
+    assert lines[1] == "    INSERT INTO property (name) VALUES (?)"
+    assert lines[2] == "      SCAN property"
+    assert lines[3].startswith("#2 合計 10.0 ms / 1 回")
+    assert "DROP TABLE" not in result.output
+    assert "SQL 3 種類中 上位 2 件を表示しました" in result.output
+
+
+def test_plans_are_only_captured_on_sqlite():
+    class ServerConnection:
+        dialect = type("Dialect", (), {"name": "postgresql"})()
+
+        @property
+        def connection(self):
+            raise AssertionError("サーバー DB では呼び出し元の接続で EXPLAIN を実行しない")
+
+    assert _explain(ServerConnection(), "SELECT 1", ()) is None
@@ -0,0 +1,67 @@
+"""並べ替え用キー（name_sort_key）の生成と、キー順の一覧のテスト。"""
+
+import sqlalchemy as sa
+
+from app.extensions import db
+from app.models import AuditEvent, Property, Tenant
+from app.reference_data import property_choices
+from app.sort_keys import sort_key
+from app.view_models import property_rows, tenant_rows
+
+
+def test_sort_key_folds_width_case_and_katakana():
+    assert sort_key("ｻﾝﾗｲﾄ  タワー") == sort_key("さんらいと たわー") == "さんらいと たわー"
+    assert sort_key("ＡＢＣ") == sort_key("abc")
+    assert sort_key(None) == ""
+
+
+def test_lists_follow_sort_key_order(app):
+    with app.app_context():
+        names = ["ベルビュー", "Ａｌｐｈａ", "あおば", "beta"]
+        properties = [Property(name=name, address="Tokyo") for name in names]
+        db.session.add_all(properties)
+        db.session.add_all(
+            [
+                Tenant(name="ヤマダ", email="y@example.com", property=properties[0], unit_number="101"),
+                Tenant(name="いとう", email="i@example.com", property=properties[0], unit_number="101"),
+            ],
+        )
+        db.session.commit()
+
+        expected = ["Ａｌｐｈａ", "beta", "あおば", "ベルビュー"]
+        assert [row.name for row in property_rows()] == expected
+        assert [name for _id, name in property_choices()] == expected
+        assert [row.name for row in tenant_rows(properties[0].id)] == ["いとう", "ヤマダ"]
+
+        properties[1].name = "ガンマ"
+        db.session.commit()
+        assert properties[1].name_sort_key == "がんま"
+        # 導出列の更新は監査ログの差分に含めない。
+        changes = db.session.scalars(
+            sa.select(AuditEvent.changes).where(AuditEvent.entity_type == "property", AuditEvent.action == "update"),
+        ).all()
+        assert changes == [{"name": ["Ａｌｐｈａ", "ガンマ"]}]
+
+
+def test_property_list_is_read_in_index_order(app):
+    with app.app_context():
+        plan = db.session.execute(
+            sa.text("EXPLAIN QUERY PLAN SELECT id, name FROM property ORDER BY name_sort_key, id"),
+        ).all()
+    details = [row[-1] for row in plan]
+    assert any("ix_property_name_sort_key" in detail for detail in details)
+    assert not any("TEMP B-TREE" in detail for detail in details)
+
+
+def test_rebuild_sort_keys_command(app):
+    with app.app_context():
+        db.session.add(Property(name="ベルビュー", address="Tokyo"))
+        db.session.commit()
+        db.session.execute(sa.update(Property).values(name_sort_key=""))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rebuild-sort-keys"])
+    assert result.exit_code == 0, result.output
+    assert "1 件更新しました" in result.output
+    with app.app_context():
+        assert db.session.scalar(sa.select(Property.name_sort_key)) == "べるびゅー"
@@ -0,0 +1,42 @@
+"""strict loading モード（raiseload）と SQL 発行回数の上限ヘルパーを検証するテスト。"""
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models import Lease, Property, Tenant
+
+
+def _lease_id():
+    property_obj = Property(name="HQ", address="1 Main St")
+    tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj)
+    lease = Lease(property=property_obj, tenant=tenant, rent=Decimal("100000"))
+    db.session.add(lease)
+    db.session.commit()
+    lease_id = lease.id
+    db.session.expunge_all()
+    return lease_id
+
+
+def test_unplanned_lazy_load_raises(app):
+    with app.app_context():
+        lease_id = _lease_id()
+        lease = db.session.get(Lease, lease_id)
+        with pytest.raises(InvalidRequestError):
+            _ = lease.tenant
+
+        db.session.expunge_all()
+        lease = db.session.scalars(db.select(Lease).options(joinedload(Lease.tenant))).one()
+        assert lease.tenant.name == "John Doe"
+
+
+def test_budget_reports_statements_when_exceeded(app, query_budget):
+    with app.app_context():
+        _lease_id()
+        with pytest.raises(AssertionError, match="上限 1 回"):
+            with query_budget(1):
+                db.session.scalars(db.select(Property)).all()
+                db.session.scalars(db.select(Tenant)).all()
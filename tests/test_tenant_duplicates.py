@@ -0,0 +1,114 @@
+"""ブロッキングキーによる入居者の重複候補探しと統合のテスト。"""
+
+from datetime import date
+from decimal import Decimal
+
+import sqlalchemy as sa
+
+from app.extensions import db
+from app.models import AuditEvent, Lease, LeaseArchive, LeaseStatus, Property, Tenant
+from app.tenant_duplicates import email_key, find_duplicate_groups, phone_key
+
+
+def _add_tenants(*specs):
+    property_obj = Property(name="HQ", address="Tokyo")
+    tenants = [
+        Tenant(name=name, email=email, phone=phone, property=property_obj, unit_number="101") for name, email, phone in specs
+    ]
+    db.session.add_all([property_obj, *tenants])
+    db.session.commit()
+    return property_obj, [tenant.id for tenant in tenants]
+
+
+def test_keys_are_normalized():
+    assert email_key(" John@Example.COM ") == "john@example.com"
+    assert phone_key("０９０-1234-5678") == phone_key("090 1234 5678") == "09012345678"
+    assert phone_key("000") == ""
+
+
+def test_groups_join_candidates_linked_by_any_key(app):
+    with app.app_context():
+        _property, ids = _add_tenants(
+            ("山田太郎", "taro@example.com", "090-1111-2222"),
+            ("山田 太郎", "TARO@example.com", "03-5555-6666"),
+            ("ヤマダ", "other@example.com", "03 5555 6666"),
+            ("佐藤花子", "hanako@example.com", "000"),
+            ("佐藤花子", "hanako2@example.com", "000"),
+            ("佐藤花子", "hanako3@example.com", "000"),
+        )
+        groups = find_duplicate_groups()
+        assert [(group.tenant_ids, group.reasons) for group in groups] == [
+            (tuple(ids[:3]), ("email", "phone")),
+            (tuple(ids[3:]), ("name",)),
+        ]
+        # ありふれた値（上限を超えて集まるキー）は候補にしない。
+        assert [group.tenant_ids for group in find_duplicate_groups(max_block_size=2)] == [tuple(ids[:3])]
+
+
+def test_review_screen_merges_and_repoints_leases(app, auth_client):
+    with app.app_context():
+        property_obj, (keep_id, duplicate_id, other_id) = _add_tenants(
+            ("John Doe", "john@example.com", ""),
+            ("John  Doe", "JOHN@example.com", ""),
+            ("Jane Roe", "jane@example.com", ""),
+        )
+        lease = Lease(
+            property_id=property_obj.id,
+            tenant_id=duplicate_id,
+            unit_number="101",
+            rent=Decimal("100000"),
+            start_date=date(2024, 1, 1),
+        )
+        archived = LeaseArchive(
+            lease_id=999,
+            property_id=property_obj.id,
+            tenant_id=duplicate_id,
+            unit_number="101",
+            rent=Decimal("90000"),
+            start_date=date(2022, 1, 1),
+            end_date=date(2022, 12, 31),
+            status=LeaseStatus.TERMINATED,
+        )
+        db.session.add_all([lease, archived])
+        db.session.commit()
+        lease_id = lease.id
+
+    html = auth_client.get("/tenants/duplicates").get_data(as_text=True)
+    assert "John  Doe" in html and "Jane Roe" not in html
+
+    response = auth_client.post(
+        "/tenants/duplicates/merge",
+        data={"target_id": keep_id, "duplicate_ids": [keep_id, duplicate_id]},
+        follow_redirects=True,
+    )
+    assert "入居者 1 件を統合し、契約 2 件を付け替えました。" in response.get_data(as_text=True)
+
+    with app.app_context():
+        assert sorted(db.session.scalars(sa.select(Tenant.id))) == [keep_id, other_id]
+        assert db.session.get(Lease, lease_id).tenant_id == keep_id
+        assert db.session.scalar(sa.select(LeaseArchive.tenant_id)) == keep_id
+        merged = db.session.scalars(sa.select(AuditEvent).where(AuditEvent.action == "merge")).all()
+        assert sorted(event.entity_id for event in merged) == sorted([lease_id, 999])
+        assert merged[0].changes == {"tenant_id": [duplicate_id, keep_id]}
+        assert find_duplicate_groups() == []
+
+
+def test_find_duplicate_tenants_command(app):
+    with app.app_context():
+        _property, ids = _add_tenants(("A", "a@example.com", "090-1234-5678"), ("B", "b@example.com", "09012345678"))
+
+    result = app.test_cli_runner().invoke(args=["find-duplicate-tenants"])
+    assert result.exit_code == 0, result.output
+    assert f"{ids[0]}, {ids[1]}\t電話番号" in result.output
+    assert "重複候補 1 グループ（入居者 2 件）" in result.output
+
+
+def test_blocking_keys_are_grouped_from_indexes(app):
+    with app.app_context():
+        for column in ("email_key", "phone_key", "name_sort_key"):
+            plan = db.session.execute(
+                sa.text(f"EXPLAIN QUERY PLAN SELECT {column} FROM tenant WHERE {column} != '' GROUP BY {column} HAVING count(*) > 1"),
+            ).all()
+            details = [row[-1] for row in plan]
+            assert any(f"ix_tenant_{column}" in detail for detail in details), details
+            assert not any("TEMP B-TREE" in detail for detail in details), details
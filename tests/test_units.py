@@ -0,0 +1,137 @@
+"""号室（unit テーブル）の引き当てと、号室から組み立てる選択肢・空室行のテスト。"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import sqlalchemy as sa
+
+from app.blueprints.core.routes import merge_duplicate_properties
+from app.extensions import db
+from app.models import Lease, LeaseStatus, Property, Tenant, Unit
+from app.reference_data import units_by_property
+from app.units import prune_orphan_units
+from app.view_models import lease_rows
+
+
+def test_saving_tenants_and_leases_resolves_units(app):
+    with app.app_context():
+        property_obj = Property(name="HQ", address="Tokyo")
+        first = Tenant(name="A", email="a@example.com", property=property_obj, unit_number="101")
+        second = Tenant(name="B", email="b@example.com", property=property_obj, unit_number="101")
+        lease = Lease(property=property_obj, tenant=first, rent=Decimal("100000"), unit_number="101")
+        db.session.add_all([property_obj, first, second, lease])
+        db.session.commit()
+
+        units = db.session.scalars(sa.select(Unit)).all()
+        assert [(unit.property_id, unit.unit_number) for unit in units] == [(property_obj.id, "101")]
+        assert first.unit_id == second.unit_id == lease.unit_id == units[0].id
+
+        second.unit_number = "102"
+        db.session.commit()
+        assert units_by_property()[property_obj.id] == ("101", "102")
+        assert second.unit_id != first.unit_id
+
+        other = Property(name="HQ (dup)", address="Tokyo")
+        moved = Tenant(name="C", email="c@example.com", property=other, unit_number="201")
+        db.session.add_all([other, moved])
+        db.session.commit()
+        merge_duplicate_properties(property_obj, [other])
+        db.session.commit()
+        assert units_by_property() == {property_obj.id: ("101", "102", "201")}
+        assert db.session.get(Unit, moved.unit_id).property_id == property_obj.id
+
+
+def test_vacancy_rows_come_from_units_without_leases(app, auth_client):
+    with app.app_context():
+        property_obj = Property(name="HQ", address="Tokyo")
+        tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj, unit_number="101")
+        waiting = Tenant(name="Jane Roe", email="jane@example.com", property=property_obj, unit_number="102")
+        db.session.add_all(
+            [
+                property_obj,
+                tenant,
+                waiting,
+                Lease(property=property_obj, tenant=tenant, rent=Decimal("100000"), unit_number="101", start_date=date(2024, 1, 1)),
+            ],
+        )
+        db.session.commit()
+
+        rows = lease_rows(include_vacancies=True)
+        assert [(row.unit_number, row.tenant_name, row.is_vacancy) for row in rows] == [
+            ("101", "John Doe", False),
+            ("102", None, True),
+        ]
+
+    html = auth_client.get("/leases").get_data(as_text=True)
+    assert '<span class="button is-static is-light">空室</span>' in html
+
+
+def test_vacancy_check_uses_lease_unit_index(app):
+    with app.app_context():
+        plan = db.session.execute(
+            sa.text(
+                "EXPLAIN QUERY PLAN SELECT unit.id FROM unit "
+                "WHERE NOT EXISTS (SELECT 1 FROM lease WHERE lease.unit_id = unit.id "
+                "AND lease.status != 'terminated' AND (lease.end_date IS NULL OR lease.end_date >= date('now')))",
+            ),
+        ).all()
+    assert any("ix_lease_unit_id" in row[-1] for row in plan)
+
+
+def test_correcting_a_unit_number_prunes_the_abandoned_unit(app):
+    with app.app_context():
+        property_obj = Property(name="HQ", address="Tokyo")
+        tenant = Tenant(name="A", email="a@example.com", property=property_obj, unit_number="1O1")
+        lease = Lease(property=property_obj, tenant=tenant, rent=Decimal("100000"), unit_number="1O1")
+        vacated = Tenant(name="B", email="b@example.com", property=property_obj, unit_number="102")
+        db.session.add_all([property_obj, tenant, lease, vacated])
+        db.session.commit()
+
+        tenant.unit_number = "101"
+        db.session.commit()
+        assert units_by_property()[property_obj.id] == ("101", "102", "1O1")
+
+        lease.unit_number = "101"
+        db.session.commit()
+        assert units_by_property()[property_obj.id] == ("101", "102")
+
+        # 入居者の削除で空いた号室は空室として残す。
+        db.session.delete(vacated)
+        db.session.commit()
+        assert units_by_property()[property_obj.id] == ("101", "102")
+        assert prune_orphan_units(db.session) == 1
+        db.session.commit()
+        assert units_by_property()[property_obj.id] == ("101",)
+
+
+def test_units_whose_leases_have_all_ended_are_vacant(app):
+    with app.app_context():
+        property_obj = Property(name="HQ", address="Tokyo")
+        tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj, unit_number="101")
+        ended = [
+            Lease(
+                property=property_obj,
+                tenant=tenant,
+                rent=Decimal("100000"),
+                unit_number="101",
+                start_date=date(2022, 1, 1),
+                end_date=date(2022, 12, 31),
+                status=LeaseStatus.TERMINATED,
+            ),
+            # 状態の自動更新がまだ走っていない、終了日を過ぎただけの契約。
+            Lease(
+                property=property_obj,
+                tenant=tenant,
+                rent=Decimal("100000"),
+                unit_number="102",
+                start_date=date(2023, 1, 1),
+                end_date=date.today() - timedelta(days=1),
+                status=LeaseStatus.ACTIVE,
+            ),
+            Lease(property=property_obj, tenant=tenant, rent=Decimal("100000"), unit_number="103", start_date=date(2024, 1, 1)),
+        ]
+        db.session.add_all([property_obj, tenant, *ended])
+        db.session.commit()
+
+        vacant = [row.unit_number for row in lease_rows(include_vacancies=True) if row.is_vacancy]
+        assert vacant == ["101", "102"]
@@ -0,0 +1,27 @@
+"""一覧画面用の行オブジェクト（列指定 select + __slots__）を検証するテスト。"""
+
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Lease, Property, Tenant
+from app.view_models import lease_rows, tenant_rows
+
+
+def test_rows_carry_joined_names_without_orm_objects(app, auth_client):
+    with app.app_context():
+        property_obj = Property(name="HQ", address="1 Main St")
+        tenant = Tenant(name="John Doe", email="john@example.com", property=property_obj, unit_number="101")
+        Tenant(name="空室", email="vacant@example.com", property=property_obj, unit_number="102")
+        db.session.add(Lease(property=property_obj, tenant=tenant, rent=Decimal("100000"), unit_number="101"))
+        db.session.commit()
+        db.session.expunge_all()
+
+        rows = lease_rows()
+        assert [(row.property_name, row.tenant_name, row.unit_number) for row in rows] == [("HQ", "John Doe", "101")]
+        assert not hasattr(rows[0], "__dict__")
+        assert [row.property_name for row in tenant_rows()] == ["HQ", "HQ"]
+        # 一覧の読み込みでは ORM オブジェクトをセッションに載せない。
+        assert len(db.session.identity_map) == 0
+
+    html = auth_client.get("/leases").get_data(as_text=True)
+    assert "John Doe" in html and "空室" in html